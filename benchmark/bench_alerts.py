@@ -0,0 +1,98 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: bench_alerts.py
+# Description: alert evaluation per refresh, the changed rows only vs the whole universe
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from utils.alerts import AlertEngine
+from utils.component import JsonDataProcessor
+from benchmark.mock_server import build_snapshot
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+_root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_rules(count: int) -> dict:
+    """count rules, cycling through the three kinds with different thresholds."""
+    rules = {}
+    for i in range(count):
+        if i % 3 == 0:
+            rules[f'cross{i}'] = {'kind': 'cross', 'column': 'increase', 'threshold': -5 + i % 10}
+        elif i % 3 == 1:
+            rules[f'ratio{i}'] = {'kind': 'ratio', 'column': 'turnOver', 'factor': 1.01 + i / 100}
+        else:
+            rules[f'breakout{i}'] = {'kind': 'breakout', 'column': 'curr', 'level': 'highest'}
+    return rules
+
+
+def run(args):
+    stock_list = pd.read_csv(os.path.join(_root_dir, 'stock_code.csv'), header=None)[0].tolist()
+    interest_info_idxs, _, _, _ = JsonDataProcessor().split_json_to_dicts(os.path.join(_root_dir, 'config.json'), 'CN')
+    df = build_snapshot(stock_list, interest_info_idxs)
+    codes = df['stockCode'].to_numpy()
+    columns = ('increase', 'turnOver', 'curr', 'highest')
+    base = {column: df[column].to_numpy(dtype=np.float64) for column in columns}
+
+    print(f'{len(df)} stocks, {args.rules} rules, {args.refreshes} refreshes per case')
+    # a full scan also re-evaluates unchanged rows, which resets the state of the ratio and breakout
+    # rules of those rows (no change against the previous snapshot), so it fires more often
+    print(f"{'changed rows':>13} {'incremental ms':>15} {'full scan ms':>13} {'alerts':>8} {'scan alerts':>12}")
+    for changed in args.changed:
+        timings = {}
+        for mode in ('incremental', 'full scan'):
+            engine = AlertEngine(make_rules(args.rules))
+            engine.prime(base, codes)
+            current = {column: values.copy() for column, values in base.items()}
+            # the same random walk for both modes
+            walk = np.random.default_rng(changed)
+            elapsed = 0.0
+            for step in range(args.refreshes):
+                rows = np.sort(walk.choice(len(codes), size=min(changed, len(codes)), replace=False))
+                previous = {column: values.copy() for column, values in current.items()}
+                current['increase'][rows] += walk.normal(0, 1, len(rows))
+                current['turnOver'][rows] *= walk.uniform(1.0, 1.2, len(rows))
+                current['curr'][rows] *= walk.uniform(0.99, 1.01, len(rows))
+                current['highest'] = np.maximum(current['highest'], current['curr'])
+                if mode == 'full scan':
+                    rows = np.arange(len(codes))
+                start = time.perf_counter()
+                engine.evaluate({column: values[rows] for column, values in current.items()},
+                                {column: values[rows] for column, values in previous.items()},
+                                codes[rows], timestamp=float(step))
+                elapsed += time.perf_counter() - start
+            timings[mode] = (elapsed / args.refreshes, engine.fired)
+        print(f"{changed:>13} {timings['incremental'][0] * 1000:15.3f} {timings['full scan'][0] * 1000:13.3f} "
+              f"{timings['incremental'][1]:>8} {timings['full scan'][1]:>12}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare evaluating alert rules on the changed rows with scanning all rows.')
+    parser.add_argument('--rules', type=int, default=30, help='number of active rules')
+    parser.add_argument('--refreshes', type=int, default=20, help='refreshes per case')
+    parser.add_argument('--changed', type=int, nargs='+', default=[10, 100, 1000, 4736], help='rows changed per refresh')
+    run(parser.parse_args())
+
+# END OF FILE
+#---------------------------------------------------------------------------------
@@ -0,0 +1,91 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: bench_batching.py
+# Description: request count and fetch time, one request per code vs batched requests
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from utils.component import JsonDataProcessor
+from utils.stock import AsyncStockFetcher
+from benchmark.mock_server import MockQuoteServer
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+_root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def _timed_passes(stock_list, urls, interest_info_idxs, concurrency, passes) -> list:
+    # the same fetcher is reused, so the adapted batch size carries over to later passes
+    fetcher = AsyncStockFetcher(stock_list=stock_list, urls=urls,
+                                interest_info_idxs=interest_info_idxs, concurrency=concurrency)
+    timings = []
+    for _ in range(passes):
+        start = time.perf_counter()
+        result = await fetcher.fetch_data()
+        timings.append((time.perf_counter() - start, result, len(fetcher._all_raw_data)))
+    await fetcher.close()
+    return timings
+
+
+async def run(args):
+    stock_list = pd.read_csv(os.path.join(_root_dir, 'stock_code.csv'), header=None)[0].tolist()
+    if args.limit:
+        stock_list = stock_list[:args.limit]
+    interest_info_idxs, _, urls, settings = JsonDataProcessor().split_json_to_dicts(
+        os.path.join(_root_dir, 'config.json'), 'CN')
+
+    server = MockQuoteServer(base_latency=args.latency, capacity=args.capacity, firewall_threshold=args.firewall,
+                             per_code_latency=args.per_code)
+    await server.start()
+    urls = server.request_urls(urls)
+
+    single_urls = dict(urls, batchRequest=dict(urls['batchRequest'], valid=False))
+    batch_urls = dict(urls, batchRequest=dict(urls['batchRequest'], valid=True, maxBatch=args.max_batch))
+    cases = {'single': single_urls, 'batched': batch_urls}
+    try:
+        print(f'{len(stock_list)} codes, server latency {args.latency * 1000:.0f} ms '
+              f'+ {args.per_code * 1000:.2f} ms/code, capacity {args.capacity}')
+        for name, case_urls in cases.items():
+            server.request_count = server.max_in_flight = 0
+            timings = await _timed_passes(stock_list, case_urls, interest_info_idxs,
+                                          settings.get('concurrency', {}), args.passes)
+            for number, (elapsed, result, rows) in enumerate(timings, start=1):
+                print(f'{name:>8} #{number}: {elapsed:8.2f} s  success={result.success_ratio * 100:.1f}%  rows={rows}')
+            print(f'{name:>8}   : requests={server.request_count}  peak in-flight={server.max_in_flight}')
+    finally:
+        await server.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare single-code and batched requests on a local mock server.')
+    parser.add_argument('--limit', type=int, default=0, help='only fetch the first N codes (0 = all)')
+    parser.add_argument('--passes', type=int, default=2, help='fetch passes per case')
+    parser.add_argument('--latency', type=float, default=0.02, help='mock server latency in seconds')
+    parser.add_argument('--per-code', type=float, default=0.0002, help='extra latency per code of a batch request')
+    parser.add_argument('--max-batch', type=int, default=60, help='largest batch the dispatcher may build')
+    parser.add_argument('--capacity', type=int, default=32, help='requests the mock server serves without slowing down')
+    parser.add_argument('--firewall', type=int, default=64, help='in-flight count that triggers the firewall page')
+    asyncio.run(run(parser.parse_args()))
+
+# END OF FILE
+#---------------------------------------------------------------------------------
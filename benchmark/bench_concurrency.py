@@ -0,0 +1,82 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: bench_concurrency.py
+# Description: full-universe fetch time, fixed 5-slot limit vs the AIMD limiter
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from utils.component import JsonDataProcessor
+from utils.stock import AsyncStockFetcher
+from benchmark.mock_server import MockQuoteServer
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+_root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def _timed_fetch(stock_list, urls, interest_info_idxs, concurrency) -> tuple:
+    fetcher = AsyncStockFetcher(stock_list=stock_list, urls=urls,
+                                interest_info_idxs=interest_info_idxs, concurrency=concurrency)
+    start = time.perf_counter()
+    result = await fetcher.fetch_data()
+    elapsed = time.perf_counter() - start
+    await fetcher.close()
+    return elapsed, result, len(fetcher._all_raw_data)
+
+
+async def run(args):
+    stock_list = pd.read_csv(os.path.join(_root_dir, 'stock_code.csv'), header=None)[0].tolist()
+    if args.limit:
+        stock_list = stock_list[:args.limit]
+    interest_info_idxs, _, urls, settings = JsonDataProcessor().split_json_to_dicts(
+        os.path.join(_root_dir, 'config.json'), 'CN')
+
+    server = MockQuoteServer(base_latency=args.latency, capacity=args.capacity, firewall_threshold=args.firewall)
+    await server.start()
+    urls = server.request_urls(urls)
+
+    cases = {
+        'fixed-5': {'floor': 5, 'ceiling': 5},
+        'adaptive': settings.get('concurrency', {}),
+    }
+    try:
+        print(f'{len(stock_list)} codes, server latency {args.latency * 1000:.0f} ms, capacity {args.capacity}')
+        for name, concurrency in cases.items():
+            server.request_count = server.max_in_flight = 0
+            elapsed, result, rows = await _timed_fetch(stock_list, urls, interest_info_idxs, concurrency)
+            print(f'{name:>10}: {elapsed:8.2f} s  success={result.success_ratio * 100:.1f}%  rows={rows}  '
+                  f'requests={server.request_count}  peak in-flight={server.max_in_flight}')
+    finally:
+        await server.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare fixed and adaptive fetch concurrency on a local mock server.')
+    parser.add_argument('--limit', type=int, default=0, help='only fetch the first N codes (0 = all)')
+    parser.add_argument('--latency', type=float, default=0.02, help='mock server latency in seconds')
+    parser.add_argument('--capacity', type=int, default=32, help='requests the mock server serves without slowing down')
+    parser.add_argument('--firewall', type=int, default=64, help='in-flight count that triggers the firewall page')
+    asyncio.run(run(parser.parse_args()))
+
+# END OF FILE
+#---------------------------------------------------------------------------------
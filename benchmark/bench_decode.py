@@ -0,0 +1,110 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: bench_decode.py
+# Description: CPU time per mkline response, json + row lists vs the byte decoder + column arrays
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from operator import itemgetter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from utils import quotes
+from utils.component import JsonDataProcessor
+from utils.quotes import extract_quote, QuoteColumns
+from benchmark.mock_server import build_payload
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+_root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _record(stock_list: list) -> list:
+    # compact separators, like the bodies sent by the real endpoint
+    return [json.dumps(build_payload(code), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            for code in stock_list]
+
+
+def _baseline(bodies, stock_list, interest_info_idxs) -> pd.DataFrame:
+    # the former hot path: decode to str, json.loads the whole payload, one list per row
+    rows = {}
+    for body, stock_code in zip(bodies, stock_list):
+        information = json.loads(body.decode('utf-8'))['data'][stock_code]['qt'][stock_code]
+        raw_data = [information[idx['index']] for idx in interest_info_idxs.values()]
+        raw_data[1] = stock_code
+        raw_data[2:] = [float(item) for item in raw_data[2:]]
+        rows[stock_code] = raw_data
+    return pd.DataFrame(list(rows.values()), columns=interest_info_idxs.keys())
+
+
+def _columnar(bodies, stock_list, interest_info_idxs, extract) -> pd.DataFrame:
+    store = QuoteColumns(list(interest_info_idxs.keys()), stock_list)
+    pick_fields = itemgetter(*[idx['index'] for idx in interest_info_idxs.values()])
+    for body, stock_code in zip(bodies, stock_list):
+        fields = pick_fields(extract(body, stock_code))
+        store.put(stock_code, fields[0], fields[2:])
+    return store.frame()
+
+
+def _cpu_time(repeat: int, func) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.process_time()
+        func()
+        best = min(best, time.process_time() - start)
+    return best
+
+
+def run(args):
+    stock_list = pd.read_csv(os.path.join(_root_dir, 'stock_code.csv'), header=None)[0].tolist()
+    if args.limit:
+        stock_list = stock_list[:args.limit]
+    interest_info_idxs, _, _, _ = JsonDataProcessor().split_json_to_dicts(os.path.join(_root_dir, 'config.json'), 'CN')
+    bodies = _record(stock_list)
+
+    def full_decode(body, stock_code):
+        return quotes.loads(body)['data'][stock_code]['qt'][stock_code]
+
+    cases = {
+        'json + rows': lambda: _baseline(bodies, stock_list, interest_info_idxs),
+        'full decode + columns': lambda: _columnar(bodies, stock_list, interest_info_idxs, full_decode),
+        'quote slice + columns': lambda: _columnar(bodies, stock_list, interest_info_idxs, extract_quote),
+    }
+    expected = cases['json + rows']()
+    print(f"{len(bodies)} payloads of ~{sum(map(len, bodies)) // len(bodies)} bytes, "
+          f"decoder: {'orjson' if quotes.orjson is not None else 'json'}, best of {args.repeat}")
+    print(f"{'case':>22} {'us/response':>12} {'total ms':>10}")
+    for name, func in cases.items():
+        df = func()
+        assert df.sort_values('stockCode', ignore_index=True).equals(
+            expected.sort_values('stockCode', ignore_index=True)), name
+        elapsed = _cpu_time(args.repeat, func)
+        print(f'{name:>22} {elapsed / len(bodies) * 1e6:12.2f} {elapsed * 1000:10.2f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure the CPU time spent decoding mkline responses.')
+    parser.add_argument('--limit', type=int, default=0, help='only decode the first N codes (0 = all)')
+    parser.add_argument('--repeat', type=int, default=5, help='number of repetitions, the best one is reported')
+    run(parser.parse_args())
+
+# END OF FILE
+#---------------------------------------------------------------------------------
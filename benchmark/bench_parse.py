@@ -0,0 +1,114 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: bench_parse.py
+# Description: fetch time and event loop lag, decoding on the event loop vs in a worker pool
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from utils.bars import MinuteBarStore
+from utils.component import JsonDataProcessor
+from utils.stock import AsyncStockFetcher
+from benchmark.mock_server import MockQuoteServer, start_server_process
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+_root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def _watch_loop(lags: list, period=0.001):
+    # how late a timer fires is how long the event loop was busy with something else
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(period)
+        lags.append(time.perf_counter() - start - period)
+
+
+async def _timed_passes(stock_list, urls, interest_info_idxs, concurrency, parse, bars, passes) -> list:
+    fetcher = AsyncStockFetcher(stock_list=stock_list, urls=urls, interest_info_idxs=interest_info_idxs,
+                                concurrency=concurrency, parse=parse,
+                                bar_store=MinuteBarStore() if bars else None)
+    timings = []
+    try:
+        for _ in range(passes):
+            lags = []
+            watcher = asyncio.ensure_future(_watch_loop(lags))
+            start = time.perf_counter()
+            result = await fetcher.fetch_data()
+            elapsed = time.perf_counter() - start
+            watcher.cancel()
+            timings.append((elapsed, result, np.array(lags or [0.0])))
+    finally:
+        await fetcher.close()
+    return timings
+
+
+async def run(args):
+    stock_list = pd.read_csv(os.path.join(_root_dir, 'stock_code.csv'), header=None)[0].tolist()
+    if args.limit:
+        stock_list = stock_list[:args.limit]
+    interest_info_idxs, _, urls, _ = JsonDataProcessor().split_json_to_dicts(
+        os.path.join(_root_dir, 'config.json'), 'CN')
+
+    # the server runs in its own process, so building its payloads does not load the measured event loop
+    server, port, stop = start_server_process(base_latency=args.latency, capacity=10 ** 6, firewall_threshold=10 ** 6)
+    urls = MockQuoteServer(port=port).request_urls(urls)
+    urls['batchRequest']['valid'] = False
+
+    # a fixed concurrency, so every mode keeps the same number of requests in flight
+    concurrency = {'floor': args.concurrency, 'ceiling': args.concurrency, 'initial': args.concurrency}
+    cases = {
+        'inline': {'mode': 'inline'},
+        'thread': {'mode': 'thread', 'workers': args.workers, 'batchSize': args.batch_size},
+        'process': {'mode': 'process', 'workers': args.workers, 'batchSize': args.batch_size},
+    }
+    try:
+        print(f'{len(stock_list)} codes, concurrency {args.concurrency}, server latency {args.latency * 1000:.0f} ms, '
+              f'bars {"on" if args.bars else "off"}, {args.workers} workers, {os.cpu_count()} CPUs')
+        print(f'{"mode":>8}  {"pass":>4}  {"time s":>8}  {"codes/s":>8}  {"lag p50 ms":>10}  {"lag p99 ms":>10}  '
+              f'{"lag max ms":>10}  success')
+        for name, parse in cases.items():
+            timings = await _timed_passes(stock_list, urls, interest_info_idxs, concurrency, parse,
+                                          args.bars, args.passes)
+            for number, (elapsed, result, lags) in enumerate(timings, start=1):
+                p50, p99 = np.percentile(lags, [50, 99]) * 1000
+                print(f'{name:>8}  {number:>4}  {elapsed:8.2f}  {result.total / elapsed:8.0f}  {p50:10.2f}  '
+                      f'{p99:10.2f}  {lags.max() * 1000:10.2f}  {result.success_ratio * 100:.1f}%')
+    finally:
+        stop.set()
+        server.join(timeout=5)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare decoding on the event loop with the parse stage on a local mock server.')
+    parser.add_argument('--limit', type=int, default=0, help='only fetch the first N codes (0 = all)')
+    parser.add_argument('--passes', type=int, default=2, help='fetch passes per mode')
+    parser.add_argument('--concurrency', type=int, default=128, help='requests in flight')
+    parser.add_argument('--latency', type=float, default=0.02, help='mock server latency in seconds')
+    parser.add_argument('--workers', type=int, default=2, help='workers of the parse pool')
+    parser.add_argument('--batch-size', type=int, default=32, help='payloads per parse job')
+    parser.add_argument('--bars', action='store_true', help='also collect the m1 bars (full decode of every payload)')
+    asyncio.run(run(parser.parse_args()))
+
+# END OF FILE
+#---------------------------------------------------------------------------------
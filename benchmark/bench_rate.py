@@ -0,0 +1,97 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: bench_rate.py
+# Description: fetch time and blocks against a rate-limiting mock WAF, with and without the token bucket
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from utils.component import JsonDataProcessor
+from utils.metrics import MetricsRegistry
+from utils.stock import AsyncStockFetcher
+from benchmark.mock_server import MockQuoteServer, start_server_process
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+_root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def _timed_fetch(stock_list, urls, interest_info_idxs, settings, rate_limit) -> tuple:
+    registry = MetricsRegistry()
+    fetcher = AsyncStockFetcher(stock_list=stock_list, urls=urls, interest_info_idxs=interest_info_idxs,
+                                concurrency=settings.get('concurrency'), retry_limit=settings.get('fetch', {}).get('retryLimit', 3),
+                                rate_limit=rate_limit, metrics=registry)
+    start = time.perf_counter()
+    # every blocked request prints a warning
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = await fetcher.fetch_data()
+    elapsed = time.perf_counter() - start
+    await fetcher.close()
+    return elapsed, result, registry.counters
+
+
+async def run(args):
+    stock_list = pd.read_csv(os.path.join(_root_dir, 'stock_code.csv'), header=None)[0].tolist()
+    if args.limit:
+        stock_list = stock_list[:args.limit]
+    interest_info_idxs, _, urls, settings = JsonDataProcessor().split_json_to_dicts(
+        os.path.join(_root_dir, 'config.json'), 'CN')
+
+    cases = {'AIMD only': None}
+    for rate in args.rates:
+        cases[f'bucket {rate:g}/s'] = dict(settings.get('rateLimit', {}), rate=rate, burst=args.burst,
+                                           cooldown=args.block_time)
+    print(f'{len(stock_list)} codes, WAF blocks above {args.threshold} req/s for {args.block_time:g} s, '
+          f'server latency {args.latency * 1000:.0f} ms')
+    print(f"{'limiter':>16} {'time s':>8} {'codes/s':>8} {'requests':>9} {'blocked':>8} {'success':>8}")
+    for name, rate_limit in cases.items():
+        # a fresh server per case, so a block left over from the previous case does not count
+        server, port, stop = start_server_process(base_latency=args.latency, capacity=10 ** 6,
+                                                  firewall_threshold=10 ** 6, rate_threshold=args.threshold,
+                                                  block_time=args.block_time)
+        case_urls = MockQuoteServer(port=port).request_urls(urls)
+        case_urls['batchRequest']['valid'] = False
+        try:
+            elapsed, result, counters = await _timed_fetch(stock_list, case_urls, interest_info_idxs, settings,
+                                                           rate_limit)
+        finally:
+            stop.set()
+            server.join(timeout=5)
+        print(f"{name:>16} {elapsed:8.2f} {result.success_ratio * len(stock_list) / elapsed:8.0f} "
+              f"{counters.get('fetch.requests', 0):9d} {counters.get('fetch.blocks', 0):8d} "
+              f"{result.success_ratio * 100:7.1f}%")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare the token-bucket rate limiter against a rate-limiting mock WAF.')
+    parser.add_argument('--limit', type=int, default=2000, help='only fetch the first N codes (0 = all)')
+    parser.add_argument('--threshold', type=int, default=200, help='requests per second the mock WAF tolerates')
+    parser.add_argument('--block-time', type=float, default=3.0, help='seconds a block lasts, also used as cooldown')
+    parser.add_argument('--rates', type=float, nargs='+', default=[150, 300], help='token bucket rates to compare')
+    parser.add_argument('--burst', type=int, default=20, help='token bucket size')
+    parser.add_argument('--latency', type=float, default=0.02, help='mock server latency in seconds')
+    asyncio.run(run(parser.parse_args()))
+
+# END OF FILE
+#---------------------------------------------------------------------------------
@@ -0,0 +1,103 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: bench_screen.py
+# Description: compiled screens vs the former DataFrame.query path of filter_stocks
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from utils.component import JsonDataProcessor
+from utils.screen import Screen, ScreenBatch
+from utils.stock import StockDatabase
+from benchmark.mock_server import build_snapshot
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+_root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def query_filter(raw_data: pd.DataFrame, thresholds: dict) -> list:
+    """The filter_stocks implementation before the screening engine, kept as the baseline."""
+    query_str = ' and '.join(f"{condition.get('lower', float('-inf'))} <= {metric} <= {condition.get('upper', float('inf'))}"
+                             for metric, condition in thresholds.items())
+    if not query_str:
+        return raw_data['stockCode'].tolist()
+    return raw_data.query(query_str)['stockCode'].tolist()
+
+
+def random_thresholds(rng: random.Random) -> dict:
+    ranges = {'amp': (0, 12), 'turnOver': (0, 15), 'tm': (10, 2000), 'increase': (-10, 10), 'curr': (2, 200)}
+    thresholds = {}
+    for metric in rng.sample(sorted(ranges), rng.randint(1, 4)):
+        low, high = ranges[metric]
+        lower = round(rng.uniform(low, high), 2)
+        thresholds[metric] = {'lower': lower, 'upper': round(rng.uniform(lower, high), 2), 'valid': True}
+    return thresholds
+
+
+def _per_call(repeat: int, func) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def run(args):
+    stock_list = pd.read_csv(os.path.join(_root_dir, 'stock_code.csv'), header=None)[0].tolist()
+    interest_info_idxs, _, _, settings = JsonDataProcessor().split_json_to_dicts(os.path.join(_root_dir, 'config.json'), 'CN')
+    df = build_snapshot(stock_list, interest_info_idxs)
+
+    rng = random.Random(0)
+    screens = [random_thresholds(rng) for _ in range(args.screens)]
+    compiled = [Screen.from_thresholds(thresholds) for thresholds in screens]
+    batch = ScreenBatch({f'screen{i}': thresholds for i, thresholds in enumerate(screens)})
+    plain = StockDatabase(df)
+    indexed = StockDatabase(df, index_columns=settings.get('index', {}).get('columns'))
+
+    # all paths must agree before timing them
+    for thresholds, screen in zip(screens, compiled):
+        expected = sorted(query_filter(df, thresholds))
+        assert sorted(plain.filter_stocks(screen)) == expected
+        assert sorted(indexed.filter_stocks(screen)) == expected
+
+    cases = {
+        'DataFrame.query': lambda: [query_filter(df, thresholds) for thresholds in screens],
+        'compile + mask': lambda: [Screen.from_thresholds(thresholds).mask(plain._arrays) for thresholds in screens],
+        'compiled mask': lambda: [plain.filter_stocks(screen) for screen in compiled],
+        'compiled + index': lambda: [indexed.filter_stocks(screen) for screen in compiled],
+        'batch masks': lambda: batch.masks(plain._arrays),
+        'batch match': lambda: plain.filter_profiles(batch),
+    }
+    print(f'{len(df)} rows, {len(screens)} screens, {len(batch)} unique sub-expressions in the batch')
+    for name, func in cases.items():
+        elapsed = _per_call(args.repeat, func) / len(screens)
+        print(f'{name:>18}: {elapsed * 1e6:10.1f} us per screen')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare compiled screens with the DataFrame.query filter path.')
+    parser.add_argument('--screens', type=int, default=48, help='number of random threshold screens')
+    parser.add_argument('--repeat', type=int, default=20, help='number of passes over all screens')
+    run(parser.parse_args())
+
+# END OF FILE
+#---------------------------------------------------------------------------------
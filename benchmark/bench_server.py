@@ -0,0 +1,122 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: bench_server.py
+# Description: load test of the query server, concurrent clients with and without the response cache
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiohttp
+import numpy as np
+import pandas as pd
+
+from utils.component import JsonDataProcessor
+from utils.history import SnapshotHistory
+from utils.server import QueryServer
+from utils.stock import StockDatabase
+from benchmark.mock_server import build_snapshot
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+_root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_queries(codes: list, count: int) -> list:
+    """count queries mixing lookups, screens, history ranges and deltas, the same ones for every case."""
+    rng = np.random.default_rng(0)
+    queries = ['/status', '/delta', '/snapshot', '/filter', '/filter?expr=increase > 3 and turnOver > 5']
+    for _ in range(count):
+        kind = rng.integers(4)
+        if kind == 0:
+            queries.append('/snapshot?codes=' + ','.join(rng.choice(codes, size=5, replace=False)))
+        elif kind == 1:
+            queries.append(f'/filter?expr=increase > {rng.integers(-5, 6)} and turnOver < {rng.integers(5, 15)}')
+        elif kind == 2:
+            queries.append(f'/history/{rng.choice(codes)}/curr')
+        else:
+            queries.append('/delta')
+    return queries
+
+
+async def client(session, url: str, paths: list, conditional: bool, latencies: list):
+    etags = {}
+    for path in paths:
+        headers = {'If-None-Match': etags[path]} if conditional and path in etags else {}
+        start = time.perf_counter()
+        async with session.get(url + path, headers=headers) as response:
+            await response.read()
+            if response.status not in (200, 304):
+                raise RuntimeError(f'{path}: HTTP {response.status}')
+            etags[path] = response.headers['ETag']
+        latencies.append(time.perf_counter() - start)
+
+
+async def load(server: QueryServer, args, queries: list, conditional: bool) -> tuple:
+    rng = np.random.default_rng(1)
+    latencies = []
+    # every client asks the popular queries (a small set) more often than the rest
+    weights = 1.0 / np.arange(1, len(queries) + 1)
+    weights /= weights.sum()
+    plans = [[queries[i] for i in rng.choice(len(queries), size=args.requests, p=weights)] for _ in range(args.clients)]
+    connector = aiohttp.TCPConnector(limit=args.clients)
+    async with aiohttp.ClientSession(connector=connector, headers={'Accept-Encoding': 'gzip'}) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*[client(session, server.url, plan, conditional, latencies) for plan in plans])
+        elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, np.percentile(latencies, 50) * 1000, np.percentile(latencies, 99) * 1000
+
+
+async def run(args):
+    stock_list = pd.read_csv(os.path.join(_root_dir, 'stock_code.csv'), header=None)[0].tolist()
+    interest_info_idxs, thresholds, _, _ = JsonDataProcessor().split_json_to_dicts(os.path.join(_root_dir, 'config.json'), 'CN')
+    df = build_snapshot(stock_list, interest_info_idxs)
+    history = SnapshotHistory(columns=['curr', 'increase', 'turnOver'])
+    db = StockDatabase(df, history=history, timestamp=0.0)
+    # a few refreshes, so the history ranges and the delta have something to return
+    for step in range(1, 6):
+        df = df.copy()
+        df['curr'] = (df['curr'] * 1.001).round(2)
+        db.update(df, timestamp=step * 60.0)
+    queries = make_queries(db.raw_data['stockCode'].tolist(), args.queries)
+
+    print(f'{len(db.raw_data)} stocks, {args.clients} clients x {args.requests} requests, {len(queries)} distinct queries')
+    print(f"{'case':>22} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'cache hits':>11}")
+    cases = (('no cache', 0, False), ('cache', args.cache_size, False), ('cache + If-None-Match', args.cache_size, True))
+    for name, cache_size, conditional in cases:
+        server = QueryServer(db, thresholds=thresholds, port=args.port, cache_size=cache_size)
+        await server.start()
+        try:
+            throughput, p50, p99 = await load(server, args, queries, conditional)
+        finally:
+            await server.stop()
+        print(f'{name:>22} {throughput:9.0f} {p50:9.2f} {p99:9.2f} {server.hits / (server.hits + server.misses):11.1%}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test the query server with concurrent clients.')
+    parser.add_argument('--clients', type=int, default=20, help='concurrent clients')
+    parser.add_argument('--requests', type=int, default=100, help='requests per client')
+    parser.add_argument('--queries', type=int, default=200, help='distinct random queries besides the common ones')
+    parser.add_argument('--cache-size', type=int, default=256, help='responses cached by the server')
+    parser.add_argument('--port', type=int, default=9121, help='port the server listens on')
+    asyncio.run(run(parser.parse_args()))
+
+# END OF FILE
+#---------------------------------------------------------------------------------
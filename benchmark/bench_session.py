@@ -0,0 +1,102 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: bench_session.py
+# Description: repeated refreshes, a new HTTP session per pass vs one persistent tuned session
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from utils.component import JsonDataProcessor
+from utils.metrics import MetricsRegistry
+from utils.stock import AsyncStockFetcher
+from benchmark.mock_server import MockQuoteServer, start_server_process
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+_root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def _timed_passes(stock_list, urls, interest_info_idxs, concurrency, session, passes) -> tuple:
+    # the metrics count the DNS lookups and new connections of every pass
+    registry = MetricsRegistry()
+    fetcher = AsyncStockFetcher(stock_list=stock_list, urls=urls, interest_info_idxs=interest_info_idxs,
+                                concurrency=concurrency, session=session, metrics=registry)
+    timings = []
+    try:
+        for _ in range(passes):
+            start = time.perf_counter()
+            result = await fetcher.fetch_data()
+            timings.append((time.perf_counter() - start, result.success_ratio))
+    finally:
+        await fetcher.close()
+    return timings, registry
+
+
+async def run(args):
+    stock_list = pd.read_csv(os.path.join(_root_dir, 'stock_code.csv'), header=None)[0].tolist()
+    if args.limit:
+        stock_list = stock_list[:args.limit]
+    interest_info_idxs, _, urls, settings = JsonDataProcessor().split_json_to_dicts(
+        os.path.join(_root_dir, 'config.json'), 'CN')
+
+    server, port, stop = start_server_process(base_latency=args.latency, capacity=10 ** 6, firewall_threshold=10 ** 6)
+    # addressed by host name, so resolving it is part of opening a connection
+    urls = MockQuoteServer(host=args.host, port=port).request_urls(urls)
+    urls['batchRequest']['valid'] = False
+
+    concurrency = {'floor': args.concurrency, 'ceiling': args.concurrency, 'initial': args.concurrency}
+    tuned = dict(settings.get('session', {}), limitPerHost=args.concurrency)
+    cases = {
+        'per-call (default)': {'persistent': False},
+        'per-call (tuned)': dict(tuned, persistent=False),
+        'persistent (tuned)': dict(tuned, persistent=True),
+    }
+    try:
+        print(f'{len(stock_list)} codes per pass, {args.passes} passes, concurrency {args.concurrency}, '
+              f'server latency {args.latency * 1000:.0f} ms, host {args.host}')
+        print(f"{'session':>20} {'first s':>9} {'later s':>9} {'dns':>6} {'connects':>9} {'reused':>8} {'success':>8}")
+        for name, session in cases.items():
+            timings, registry = await _timed_passes(stock_list, urls, interest_info_idxs, concurrency, session,
+                                                    args.passes)
+            later = np.mean([elapsed for elapsed, _ in timings[1:]]) if len(timings) > 1 else float('nan')
+            dns = registry.histograms.get('fetch.dns')
+            connects = registry.histograms.get('fetch.connect')
+            print(f"{name:>20} {timings[0][0]:9.3f} {later:9.3f} {dns.count if dns else 0:6d} "
+                  f"{connects.count if connects else 0:9d} {registry.counters.get('fetch.reused', 0):8d} "
+                  f"{min(ratio for _, ratio in timings) * 100:7.1f}%")
+    finally:
+        stop.set()
+        server.join(timeout=5)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare a session per fetch pass with a persistent session on a local mock server.')
+    parser.add_argument('--limit', type=int, default=300, help='codes fetched per pass (0 = all)')
+    parser.add_argument('--passes', type=int, default=10, help='fetch passes per case')
+    parser.add_argument('--concurrency', type=int, default=32, help='requests in flight')
+    parser.add_argument('--latency', type=float, default=0.02, help='mock server latency in seconds')
+    parser.add_argument('--host', default='localhost', help='host name the mock server is addressed by')
+    asyncio.run(run(parser.parse_args()))
+
+# END OF FILE
+#---------------------------------------------------------------------------------
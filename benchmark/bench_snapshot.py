@@ -0,0 +1,80 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: bench_snapshot.py
+# Description: write/read time and on-disk size of the snapshot backends
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from utils.component import JsonDataProcessor
+from utils.snapshot import CsvSnapshotBackend, NpySnapshotBackend
+from benchmark.mock_server import build_snapshot
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+_root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _disk_size(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def _best_of(repeat: int, func) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(args):
+    stock_list = pd.read_csv(os.path.join(_root_dir, 'stock_code.csv'), header=None)[0].tolist()
+    interest_info_idxs, _, _, _ = JsonDataProcessor().split_json_to_dicts(os.path.join(_root_dir, 'config.json'), 'CN')
+    df = build_snapshot(stock_list, interest_info_idxs)
+
+    backends = [CsvSnapshotBackend(), NpySnapshotBackend('float64'), NpySnapshotBackend('float32')]
+    print(f'{len(df)} rows, best of {args.repeat}')
+    print(f"{'backend':>14} {'write ms':>10} {'read ms':>10} {'open ms':>10} {'size KiB':>10}")
+    with tempfile.TemporaryDirectory() as save_dir:
+        for backend in backends:
+            label = backend.name if backend.name == 'csv' else f'{backend.name}-{backend.float_dtype}'
+            path = backend.save(df, save_dir, label)
+            write = _best_of(args.repeat, lambda: backend.save(df, save_dir, label))
+            read = _best_of(args.repeat, lambda: backend.load(path))
+            # opening without building a DataFrame, only the columnar backend supports it
+            if hasattr(backend, 'load_columns'):
+                open_ms = f'{_best_of(args.repeat, lambda: backend.load_columns(path)) * 1000:10.2f}'
+            else:
+                open_ms = f"{'-':>10}"
+            print(f'{label:>14} {write * 1000:10.2f} {read * 1000:10.2f} {open_ms} {_disk_size(path) / 1024:10.1f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare CSV and columnar snapshot write/read time and size.')
+    parser.add_argument('--repeat', type=int, default=5, help='number of repetitions, the best one is reported')
+    run(parser.parse_args())
+
+# END OF FILE
+#---------------------------------------------------------------------------------
@@ -0,0 +1,145 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: bench_startup.py
+# Description: import times and time to the first prompt of main.py, with and without the startup cache
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from utils.catalog import SnapshotCatalog
+from utils.component import JsonDataProcessor
+from utils.snapshot import CsvSnapshotBackend
+from utils.startup import StartupCache
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+_root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# what main.py imported before its first prompt until the heavy modules were deferred
+_eager_imports = ('import utils.functions, utils.stock, utils.snapshot, utils.history, utils.bars, '
+                  'utils.indicators, utils.scheduler, utils.screen, utils.metrics, pandas; '
+                  "pandas.read_csv('stock_code.csv', header=None)")
+
+
+def time_command(code: str, cwd: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', code], cwd=cwd, check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def _per_call(repeat: int, func) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def time_prompts(work_dir: str, prompts=('(y/n):', 'Waiting for command:')) -> list:
+    """Start main.py, answer 'y' and return the seconds until each prompt appeared on stdout."""
+    env = dict(os.environ, TERM='dumb', PYTHONUNBUFFERED='1')
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, 'main.py'], cwd=work_dir, env=env, stdin=subprocess.PIPE,
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    timings = []
+    output = b''
+    try:
+        for prompt in prompts:
+            while not output.endswith(prompt.encode() + b' '):
+                char = process.stdout.read(1)
+                if not char:
+                    raise RuntimeError(f'main.py exited before printing {prompt!r}')
+                output += char
+            timings.append(time.perf_counter() - start)
+            process.stdin.write(b'y\n' if prompt == prompts[0] else b'exit\n')
+            process.stdin.flush()
+    finally:
+        process.stdin.close()
+        process.wait(timeout=30)
+    return timings
+
+
+def prepare(work_dir: str):
+    """Copy the program into work_dir with one saved snapshot and its manifest."""
+    for name in ('main.py', 'config.json', 'stock_code.csv'):
+        shutil.copy(os.path.join(_root_dir, name), work_dir)
+    shutil.copytree(os.path.join(_root_dir, 'utils'), os.path.join(work_dir, 'utils'),
+                    ignore=shutil.ignore_patterns('__pycache__'))
+    raw_dir = os.path.join(work_dir, 'raw_data')
+    os.makedirs(raw_dir)
+    codes = pd.read_csv(os.path.join(_root_dir, 'stock_code.csv'), header=None)[0]
+    df = pd.DataFrame({'stockName': codes, 'stockCode': codes, 'curr': np.linspace(1, 100, len(codes))})
+    path = CsvSnapshotBackend().save(df, raw_dir, '2026_10_16_15_00')
+    SnapshotCatalog.open(raw_dir).add(path, df)
+
+
+def run(args):
+    with tempfile.TemporaryDirectory() as work_dir:
+        prepare(work_dir)
+        cache_file = os.path.join(work_dir, 'raw_data', 'startup.cache')
+        # compile the byte code once, so every case starts from the same warm __pycache__
+        time_command(_eager_imports, work_dir)
+
+        results = {
+            'python -c pass': [time_command('pass', work_dir) for _ in range(args.repeat)],
+            'light imports': [time_command('import utils.functions, utils.catalog, utils.startup', work_dir)
+                              for _ in range(args.repeat)],
+            'eager imports': [time_command(_eager_imports, work_dir) for _ in range(args.repeat)],
+        }
+        cold, warm = [], []
+        for _ in range(args.repeat):
+            if os.path.exists(cache_file):
+                os.remove(cache_file)
+            cold.append(time_prompts(work_dir))
+            warm.append(time_prompts(work_dir))
+
+    # loading the stock codes and the config in this process, pandas is already imported here
+    stock_code_file, config_file = os.path.join(_root_dir, 'stock_code.csv'), os.path.join(_root_dir, 'config.json')
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = StartupCache(os.path.join(cache_dir, 'startup.cache'))
+        cache.load(stock_code_file, config_file, 'CN')
+        loading = {
+            'read_csv + config': lambda: (pd.read_csv(stock_code_file, header=None)[0].values.tolist(),
+                                          JsonDataProcessor().split_json_to_dicts(config_file, 'CN')),
+            'startup cache': lambda: cache.load(stock_code_file, config_file, 'CN'),
+        }
+        loading = {name: _per_call(50, func) for name, func in loading.items()}
+
+    print(f'{sys.executable}, median of {args.repeat} runs')
+    for name, elapsed in loading.items():
+        print(f'{name:>24}: {elapsed * 1000:8.2f} ms per load')
+    for name, timings in results.items():
+        print(f'{name:>24}: {np.median(timings) * 1000:8.1f} ms')
+    for name, timings in (('no startup cache', cold), ('startup cache', warm)):
+        first, command = np.median(timings, axis=0) * 1000
+        print(f'{name:>24}: {first:8.1f} ms to the first prompt, {command:8.1f} ms to the command prompt')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure import times and the time to the first prompt of main.py.')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per case, the median is reported')
+    run(parser.parse_args())
+
+# END OF FILE
+#---------------------------------------------------------------------------------
@@ -0,0 +1,235 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: bench_suite.py
+# Description: end-to-end benchmark suite against the mock server, results are written as JSON
+#              and optionally compared with a baseline run
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from utils.component import AdaptiveConcurrencyLimiter, JsonDataProcessor
+from utils.snapshot import get_backend, load_snapshot
+from utils.stock import AsyncStockFetcher, StockDatabase
+from benchmark.mock_server import MockQuoteServer, start_server_process
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+_root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# metrics where a larger value is better, all other metrics are times
+_higher_is_better = {'fetch.codes_per_s', 'fetch.success_ratio'}
+
+
+class _RecordingLimiter(AdaptiveConcurrencyLimiter):
+    """The adaptive limiter, also keeping the latency every request reports on release."""
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.latencies = []
+
+    def release(self, latency: float, healthy: bool):
+        self.latencies.append(latency)
+        super().release(latency, healthy)
+
+
+def _best_of(repeat: int, func) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=_root_dir, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+async def bench_fetch(stock_list, urls, interest_info_idxs, settings, passes) -> tuple:
+    """Time full fetch passes, returns the metrics and the fetcher holding the latest pass."""
+    fetcher = AsyncStockFetcher(stock_list=stock_list, urls=urls, interest_info_idxs=interest_info_idxs,
+                                concurrency=settings.get('concurrency'), parse=settings.get('parse'),
+                                retry_limit=settings.get('fetch', {}).get('retryLimit', 3),
+                                snapshot_backend=get_backend(settings.get('snapshot')), session=settings.get('session'))
+    # installed before the first pass, fetch_data keeps a limiter that already exists
+    limiter = fetcher._limiter = _RecordingLimiter.from_config(settings.get('concurrency') or {})
+    elapsed = []
+    try:
+        for _ in range(passes):
+            start = time.perf_counter()
+            result = await fetcher.fetch_data()
+            elapsed.append(time.perf_counter() - start)
+    finally:
+        await fetcher.close()
+
+    latencies = np.array(limiter.latencies or [0.0]) * 1000
+    best = min(elapsed)
+    metrics = {
+        'fetch.pass_s': best,
+        'fetch.codes_per_s': len(stock_list) / best,
+        'fetch.latency_p50_ms': float(np.percentile(latencies, 50)),
+        'fetch.latency_p99_ms': float(np.percentile(latencies, 99)),
+        'fetch.success_ratio': result.success_ratio,
+    }
+    return metrics, fetcher
+
+
+def bench_snapshot(fetcher: AsyncStockFetcher, settings: dict, repeat: int) -> tuple:
+    """Time save_data and loading the saved snapshot, returns the metrics and the loaded frame."""
+    with tempfile.TemporaryDirectory() as save_dir:
+        save = _best_of(repeat, lambda: fetcher.save_data(save_dir))
+        # saving every repetition within the same minute overwrites one snapshot
+        path = fetcher.save_data(save_dir)
+        load = _best_of(repeat, lambda: load_snapshot(path))
+        df = load_snapshot(path)
+    return {'save.ms': save * 1000, 'load.ms': load * 1000}, df
+
+
+def bench_database(df: pd.DataFrame, thresholds: dict, settings: dict, repeat: int, show_codes: int) -> dict:
+    """Time filter_stocks with the configured thresholds and show_stock_info on a page of codes."""
+    db = StockDatabase(df, index_columns=settings.get('index', {}).get('columns'))
+    codes = df['stockCode'].tolist()[:show_codes]
+
+    def show():
+        # the table is rendered completely but not printed
+        with contextlib.redirect_stdout(io.StringIO()):
+            db.show_stock_info(codes)
+
+    return {
+        'filter.ms': _best_of(repeat, lambda: db.filter_stocks(thresholds)) * 1000,
+        'show.ms': _best_of(repeat, show) * 1000,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Compare the metrics of two runs.
+
+    Returns:
+        list: The names of the metrics which got worse by more than tolerance (a fraction).
+    """
+    regressions = []
+    print(f"{'metric':>22} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, value in results['metrics'].items():
+        before = baseline.get('metrics', {}).get(name)
+        if before is None:
+            print(f'{name:>22} {"-":>12} {value:12.3f}')
+            continue
+        change = (value - before) / before if before else 0.0
+        worse = -change if name in _higher_is_better else change
+        flag = ' REGRESSION' if worse > tolerance else ''
+        if flag:
+            regressions.append(name)
+        print(f'{name:>22} {before:12.3f} {value:12.3f} {change * 100:8.1f}%{flag}')
+    return regressions
+
+
+async def run(args) -> int:
+    stock_list = pd.read_csv(os.path.join(_root_dir, 'stock_code.csv'), header=None)[0].tolist()
+    if args.limit:
+        stock_list = stock_list[:args.limit]
+    interest_info_idxs, thresholds, urls, settings = JsonDataProcessor().split_json_to_dicts(
+        os.path.join(_root_dir, 'config.json'), 'CN')
+
+    server, port, stop = start_server_process(
+        base_latency=args.latency, capacity=args.capacity, firewall_threshold=args.firewall,
+        recording=args.recording, error_rate=args.error_rate, firewall_rate=args.firewall_rate, seed=0)
+    urls = MockQuoteServer(port=port).request_urls(urls)
+    urls['batchRequest']['valid'] = args.batch
+    try:
+        fetch_metrics, fetcher = await bench_fetch(stock_list, urls, interest_info_idxs, settings, args.passes)
+    finally:
+        stop.set()
+        server.join(timeout=5)
+
+    # the snapshot and database benchmarks only need a full frame, they do not depend on the server
+    snapshot_metrics, df = bench_snapshot(fetcher, settings, args.repeat)
+    database_metrics = bench_database(df, thresholds, settings, args.repeat, args.show)
+
+    results = {
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'environment': {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'cpus': os.cpu_count(),
+            'snapshot': get_backend(settings.get('snapshot')).name,
+        },
+        'options': vars(args),
+        'metrics': {**fetch_metrics, **snapshot_metrics, **database_metrics},
+    }
+
+    output = args.output or os.path.join(_root_dir, 'benchmark', 'results',
+                                         f"suite_{datetime.now().strftime('%Y_%m_%d_%H_%M_%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2)
+
+    print(f'{len(stock_list)} codes, server latency {args.latency * 1000:.0f} ms, error rate {args.error_rate}, '
+          f'firewall rate {args.firewall_rate}, results written to {output}')
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+        differing = sorted(name for name, value in results['options'].items()
+                           if name not in ('output', 'baseline', 'tolerance') and baseline.get('options', {}).get(name) != value)
+        if differing:
+            print(f"Note: the baseline ran with different options ({', '.join(differing)}).")
+        regressions = compare(results, baseline, args.tolerance)
+        return 1 if regressions else 0
+    for name, value in results['metrics'].items():
+        print(f'{name:>22} {value:12.3f}')
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the end-to-end benchmark suite against a local mock server.')
+    parser.add_argument('--limit', type=int, default=0, help='only fetch the first N codes (0 = all)')
+    parser.add_argument('--passes', type=int, default=2, help='fetch passes, the fastest one is reported')
+    parser.add_argument('--repeat', type=int, default=5, help='repetitions of the other benchmarks, the best one is reported')
+    parser.add_argument('--show', type=int, default=100, help='codes rendered by show_stock_info')
+    parser.add_argument('--batch', action='store_true', help='fetch through the batch endpoint')
+    parser.add_argument('--recording', default=None, help='replay a recording written by mock_server.py record')
+    parser.add_argument('--latency', type=float, default=0.02, help='mock server latency in seconds')
+    parser.add_argument('--capacity', type=int, default=32, help='requests the mock server serves without slowing down')
+    parser.add_argument('--firewall', type=int, default=64, help='in-flight count that triggers the firewall page')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests answered with HTTP 500')
+    parser.add_argument('--firewall-rate', type=float, default=0.0, help='share of requests answered with the firewall page')
+    parser.add_argument('--output', default=None, help='results file, benchmark/results/suite_<time>.json by default')
+    parser.add_argument('--baseline', default=None, help='results of an earlier run to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='change counted as a regression, as a fraction')
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+# END OF FILE
+#---------------------------------------------------------------------------------
@@ -0,0 +1,113 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: bench_table.py
+# Description: rendering the whole market as a console table, row-wise printing vs the column-wise renderer
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+import unicodedata
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from utils.component import JsonDataProcessor
+from utils.table import TableRenderer
+from benchmark.mock_server import build_snapshot
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+_root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _get_display_width(text: str) -> int:
+    width = 0
+    for char in text:
+        width += 2 if unicodedata.east_asian_width(char) in ('F', 'W') else 1
+    return width
+
+
+def print_table(filtered_data: pd.DataFrame):
+    """The show_stock_info implementation before the table renderer, kept as the baseline."""
+    columns = filtered_data.columns.tolist()
+    data = filtered_data.values.tolist()
+    col_widths = [max(_get_display_width(str(val)) for val in [col] + list(filtered_data[col])) for col in columns]
+    border = '+' + '+'.join(['-' * (w + 2) for w in col_widths]) + '+'
+
+    def format_row(row):
+        return '|' + '|'.join([f" {' ' * (w - _get_display_width(str(val))) + str(val)} " for val, w in zip(row, col_widths)]) + '|'
+
+    print(border)
+    print(format_row(columns))
+    print(border)
+    for row in data:
+        print(format_row(row))
+    print(border)
+
+
+def _best_of(repeat: int, func) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(args):
+    stock_list = pd.read_csv(os.path.join(_root_dir, 'stock_code.csv'), header=None)[0].tolist()
+    interest_info_idxs, _, _, _ = JsonDataProcessor().split_json_to_dicts(os.path.join(_root_dir, 'config.json'), 'CN')
+    df = build_snapshot(stock_list, interest_info_idxs)
+    if args.names:
+        # the mock snapshot has ASCII names, real ones are Chinese and take the slow width path
+        df['stockName'] = [f'股票{i % 2000:04d}' for i in range(len(df))]
+
+    # the renderer must print exactly what the row-wise implementation printed
+    expected = io.StringIO()
+    with contextlib.redirect_stdout(expected):
+        print_table(df)
+    assert TableRenderer().render(df) == expected.getvalue()
+
+    def baseline():
+        with contextlib.redirect_stdout(io.StringIO()):
+            print_table(df)
+
+    # a warm renderer has already measured every name of the market once, like after the first refresh
+    warm = TableRenderer(stream=io.StringIO())
+    warm.show(df)
+    cases = {
+        'row-wise print': baseline,
+        'renderer (cold)': lambda: TableRenderer(stream=io.StringIO()).show(df),
+        'renderer (warm)': lambda: warm.show(df),
+        f'first page ({args.page_size})': lambda: TableRenderer(page_size=args.page_size, stream=io.StringIO()).show(df),
+    }
+    print(f"{len(df)} rows, {len(df.columns)} columns, {'Chinese' if args.names else 'ASCII'} names")
+    for name, func in cases.items():
+        print(f'{name:>18}: {_best_of(args.repeat, func) * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare row-wise table printing with the column-wise table renderer.')
+    parser.add_argument('--repeat', type=int, default=5, help='repetitions, the best one is reported')
+    parser.add_argument('--page-size', type=int, default=200, help='rows of the paginated case')
+    parser.add_argument('--names', action='store_true', help='replace the stock names with Chinese ones')
+    run(parser.parse_args())
+
+# END OF FILE
+#---------------------------------------------------------------------------------
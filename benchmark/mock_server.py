@@ -0,0 +1,454 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: mock_server.py
+# Description: a local stand-in for the gtimg mkline and batch quote endpoints, used by benchmarks.
+#              It serves synthetic or recorded payloads and can inject errors and firewall pages.
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import time
+
+from collections import deque
+
+import aiohttp
+from aiohttp import web
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# DEFINE GLOBAL VARIABLES HERE
+
+# same text as 'firewallWarning' in config.json
+FIREWALL_PAGE = '<script>window.location.href="https://waf.tencent.com/501page.html?u=http://127.0.0.1"</script>'
+
+# the number of fields in a 'qt' list returned by the real endpoint
+_qt_length = 88
+
+# END OF GLOBAL VARIABLES' DEFINITION
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# DEFINE FUNCTIONS HERE
+
+def build_payload(stock_code: str, seed=None) -> dict:
+    """
+    Build a fake mkline response for a stock code with the same layout as the real endpoint.
+
+    Args:
+        stock_code (str): Stock code with market prefix, e.g. 'sz000001'.
+        seed: Optional seed so repeated calls return the same quote.
+
+    Returns:
+        dict: The decoded JSON payload.
+    """
+    rng = random.Random(seed if seed is not None else stock_code)
+    prev_closed = round(rng.uniform(2, 200), 2)
+    curr = round(prev_closed * rng.uniform(0.9, 1.1), 2)
+    highest = round(max(curr, prev_closed) * rng.uniform(1.0, 1.03), 2)
+    lowest = round(min(curr, prev_closed) * rng.uniform(0.97, 1.0), 2)
+
+    qt = ['0.00'] * _qt_length
+    qt[0] = '51'
+    qt[1] = f'测试{stock_code[-4:]}'
+    qt[2] = stock_code[2:]
+    qt[3] = f'{curr:.2f}'
+    qt[4] = f'{prev_closed:.2f}'
+    qt[5] = f'{prev_closed * rng.uniform(0.97, 1.03):.2f}'
+    qt[32] = f'{(curr - prev_closed) / prev_closed * 100:.2f}'
+    qt[33] = f'{highest:.2f}'
+    qt[34] = f'{lowest:.2f}'
+    # volume in lots of 100 shares and amount in units of 10,000
+    volume = rng.uniform(1e3, 1e6)
+    qt[36] = f'{volume:.0f}'
+    qt[37] = f'{volume * 100 * (highest + lowest) / 2 / 1e4:.4f}'
+    qt[38] = f'{rng.uniform(0.1, 15):.2f}'
+    qt[43] = f'{(highest - lowest) / prev_closed * 100:.2f}'
+    qt[44] = f'{rng.uniform(10, 2000):.2f}'
+
+    # m1 bars as [time, open, close, high, low, volume, {}, turnover rate], like the real endpoint
+    bars = []
+    price = prev_closed
+    for minute in range(10):
+        open_, price = price, round(price * rng.uniform(0.995, 1.005), 2)
+        bars.append([f'2024100414{50 + minute:02d}', f'{open_:.2f}', f'{price:.2f}', f'{max(open_, price):.2f}',
+                     f'{min(open_, price):.2f}', f'{rng.uniform(100, 10000):.2f}', {}, '0.0000'])
+
+    return {
+        'code': 0,
+        'msg': '',
+        'data': {
+            stock_code: {
+                'm1': bars,
+                'qt': {stock_code: qt, 'market': ['2024-10-04 15:00:00|HK_close|SH_close|SZ_close']},
+            }
+        }
+    }
+
+def build_batch_line(stock_code: str, seed=None) -> str:
+    """
+    Build one line of a fake batch quote response, e.g. 'v_sz000001="51~name~000001~...";'.
+
+    The fields are the same 'qt' list build_payload returns, joined by '~'.
+    """
+    qt = build_payload(stock_code, seed)['data'][stock_code]['qt'][stock_code]
+    return f'v_{stock_code}="{"~".join(qt)}";'
+
+def build_snapshot(stock_codes: list, interest_info_idxs: dict):
+    """
+    Build the DataFrame a fetch pass over the mock server would produce, without any HTTP.
+
+    Args:
+        stock_codes (list): Stock codes with market prefix.
+        interest_info_idxs (dict): The 'infoIdxs' dictionary loaded from config.json.
+
+    Returns:
+        pd.DataFrame: One row per stock code with the configured columns.
+    """
+    import pandas as pd
+
+    rows = []
+    for stock_code in stock_codes:
+        qt = build_payload(stock_code)['data'][stock_code]['qt'][stock_code]
+        row = [qt[idx['index']] for idx in interest_info_idxs.values()]
+        row[1] = stock_code
+        row[2:] = [float(item) for item in row[2:]]
+        rows.append(row)
+    return pd.DataFrame(rows, columns=list(interest_info_idxs.keys()))
+
+async def record_payloads(stock_codes: list, path: str, urls=None, concurrency=8) -> int:
+    """
+    Write one mkline payload per stock code to a recording the mock server can replay.
+
+    The recording holds one JSON object per line, {"code": stock code, "body": response text}.
+
+    Args:
+        stock_codes (list): Stock codes with market prefix.
+        path (str): The file to write.
+        urls (dict): The 'urls' dictionary of config.json. With it the payloads are fetched from
+                     the live endpoint, without it they are synthesized with build_payload.
+        concurrency (int): Requests in flight while recording from the live endpoint.
+
+    Returns:
+        int: The number of payloads written.
+    """
+    bodies = {}
+    if urls is None:
+        for stock_code in stock_codes:
+            bodies[stock_code] = json.dumps(build_payload(stock_code), ensure_ascii=False)
+    else:
+        semaphore = asyncio.Semaphore(concurrency)
+        firewall_text = urls['firewallWarning']['text']
+
+        async def fetch(session, stock_code):
+            url = f"{urls['request']['prefix']}{stock_code}{urls['request']['suffix']}"
+            async with semaphore:
+                try:
+                    async with session.get(url, headers=urls['request']['headers'], allow_redirects=False) as response:
+                        text = await response.text()
+                        if response.status == 200 and firewall_text not in text:
+                            bodies[stock_code] = text
+                            return
+                        print(f'Skipping {stock_code}: status {response.status}')
+                except aiohttp.ClientError as e:
+                    print(f'Skipping {stock_code}: {e}')
+
+        async with aiohttp.ClientSession() as session:
+            await asyncio.gather(*(fetch(session, stock_code) for stock_code in stock_codes))
+
+    with open(path, 'w', encoding='utf-8') as file:
+        for stock_code in stock_codes:
+            if stock_code in bodies:
+                file.write(json.dumps({'code': stock_code, 'body': bodies[stock_code]}, ensure_ascii=False) + '\n')
+    return len(bodies)
+
+def load_recording(path: str) -> dict:
+    """
+    Load a recording written by record_payloads.
+
+    Returns:
+        dict: Stock code -> response body as UTF-8 bytes.
+    """
+    payloads = {}
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                entry = json.loads(line)
+                payloads[entry['code']] = entry['body'].encode('utf-8')
+    return payloads
+
+def _serve_in_child(options: dict, ports, stop):
+    async def serve():
+        server = MockQuoteServer(**options)
+        await server.start()
+        ports.put(server.port)
+        while not stop.is_set():
+            await asyncio.sleep(0.1)
+        await server.stop()
+
+    asyncio.run(serve())
+
+def start_server_process(**options) -> tuple:
+    """
+    Run a MockQuoteServer in a child process, so building its responses does not load the event
+    loop of the process being measured.
+
+    Args:
+        **options: Keyword arguments of MockQuoteServer.
+
+    Returns:
+        tuple: (the process, the port it listens on, an event which stops it when set)
+    """
+    ports, stop = multiprocessing.Queue(), multiprocessing.Event()
+    process = multiprocessing.Process(target=_serve_in_child, args=(options, ports, stop), daemon=True)
+    process.start()
+    return process, ports.get(timeout=30), stop
+
+# END OF FUNCTION DEFINITION
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# DEFINE CLASS HERE
+
+class MockQuoteServer:
+    """
+    MockQuoteServer serves fake mkline payloads and batch quotes on localhost so the fetcher can
+    be exercised without touching the live endpoints.
+
+    The server models a backend with limited capacity: every request takes 'base_latency'
+    seconds while at most 'capacity' requests are in flight, and gets proportionally slower
+    beyond that. Once more than 'firewall_threshold' requests are in flight at the same time,
+    the server answers with the WAF page instead of data, like the real endpoint does when
+    it is hammered. A batch request costs 'base_latency' plus 'per_code_latency' for every code
+    it carries.
+
+    Payloads are replayed from a recording (see record_payloads) where one is given, codes
+    missing from it get a synthetic payload. On top of the overload behaviour, a share of the
+    requests can be answered with an HTTP 500 or the firewall page at random. Like a WAF, the
+    server can also block the client for 'block_time' seconds once it sends more than
+    'rate_threshold' requests within one second, every request gets the firewall page meanwhile.
+
+    Attributes:
+        base_latency (float): Service time of a single request in seconds.
+        per_code_latency (float): Extra service time per code of a batch request in seconds.
+        capacity (int): The number of requests the server handles without slowing down.
+        firewall_threshold (int): In-flight count above which the firewall page is returned.
+        error_rate (float): Share of requests answered with an HTTP 500.
+        firewall_rate (float): Share of requests answered with the firewall page.
+        rate_threshold (int): Requests per second above which the client is blocked, None for no limit.
+        block_time (float): Seconds a block lasts.
+        request_count (int): The number of requests served so far.
+        error_count (int): The number of HTTP 500 answers so far.
+        firewall_count (int): The number of firewall pages served so far.
+        max_in_flight (int): The highest concurrency observed.
+
+    Methods:
+        start(): Start listening on a free local port.
+        stop(): Shut the server down.
+        request_urls(urls): Return a copy of the 'urls' config pointing at this server.
+    """
+    def __init__(self, base_latency=0.02, capacity=32, firewall_threshold=64, host='127.0.0.1', port=0,
+                 per_code_latency=0.0002, recording=None, error_rate=0.0, firewall_rate=0.0, seed=None,
+                 rate_threshold=None, block_time=10.0) -> None:
+        self.base_latency = base_latency
+        self.per_code_latency = per_code_latency
+        self.capacity = capacity
+        self.firewall_threshold = firewall_threshold
+        self.error_rate = error_rate
+        self.firewall_rate = firewall_rate
+        self.rate_threshold = rate_threshold
+        self.block_time = block_time
+        self.host = host
+        self.port = port
+
+        self.request_count = 0
+        self.error_count = 0
+        self.firewall_count = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._runner = None
+        self._rng = random.Random(seed)
+        # arrival times of the requests within the last second, and the end of the current block
+        self._arrivals = deque()
+        self._blocked_until = 0.0
+        # stock code -> encoded body, a recording is a path or an already loaded dictionary
+        if isinstance(recording, str):
+            recording = load_recording(recording)
+        self._payloads = dict(recording or {})
+        self._batch_lines = {}
+
+    def _payload(self, stock_code: str) -> bytes:
+        body = self._payloads.get(stock_code)
+        if body is None:
+            # synthetic payloads are deterministic per code, so they are built once
+            body = self._payloads[stock_code] = json.dumps(build_payload(stock_code), ensure_ascii=False).encode('utf-8')
+        return body
+
+    def _batch_line(self, stock_code: str) -> str:
+        line = self._batch_lines.get(stock_code)
+        if line is None:
+            qt = json.loads(self._payload(stock_code))['data'][stock_code]['qt'][stock_code]
+            line = self._batch_lines[stock_code] = f'v_{stock_code}="{"~".join(qt)}";'
+        return line
+
+    def _arrive(self):
+        now = time.monotonic()
+        self._arrivals.append(now)
+        while self._arrivals[0] < now - 1.0:
+            self._arrivals.popleft()
+        if self.rate_threshold is not None and len(self._arrivals) > self.rate_threshold and now >= self._blocked_until:
+            self._blocked_until = now + self.block_time
+
+    def _fault(self):
+        # the response that replaces the data, None if the request is served normally
+        if (self._in_flight > self.firewall_threshold or time.monotonic() < self._blocked_until
+                or self._rng.random() < self.firewall_rate):
+            self.firewall_count += 1
+            return web.Response(text=FIREWALL_PAGE, content_type='text/html')
+        if self._rng.random() < self.error_rate:
+            self.error_count += 1
+            return web.Response(status=500, text='Internal Server Error')
+        return None
+
+    async def _handle_mkline(self, request: web.Request) -> web.Response:
+        stock_code = request.query.get('param', '').split(',')[0]
+        self._arrive()
+        self.request_count += 1
+        self._in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        try:
+            overload = max(1.0, self._in_flight / self.capacity)
+            await asyncio.sleep(self.base_latency * overload)
+            fault = self._fault()
+            if fault is not None:
+                return fault
+            return web.Response(body=self._payload(stock_code), content_type='application/json', charset='utf-8')
+        finally:
+            self._in_flight -= 1
+
+    async def _handle_batch(self, request: web.Request) -> web.Response:
+        query = request.match_info['query']
+        if not query.startswith('q='):
+            raise web.HTTPNotFound()
+        stock_codes = [code for code in query[len('q='):].split(',') if code]
+        self._arrive()
+        self.request_count += 1
+        self._in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        try:
+            overload = max(1.0, self._in_flight / self.capacity)
+            await asyncio.sleep((self.base_latency + self.per_code_latency * len(stock_codes)) * overload)
+            fault = self._fault()
+            if fault is not None:
+                return fault
+            # like the real endpoint, unknown codes are simply left out and the body is GBK encoded
+            body = '\n'.join(self._batch_line(code) for code in stock_codes)
+            return web.Response(body=body.encode('gbk'), content_type='text/plain', charset='gbk')
+        finally:
+            self._in_flight -= 1
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/appstock/app/kline/mkline', self._handle_mkline)
+        app.router.add_get('/{query}', self._handle_batch)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # resolve the real port when an ephemeral one was requested
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def request_urls(self, urls: dict) -> dict:
+        """
+        Return a copy of the 'urls' config whose request prefixes point at this server.
+
+        Args:
+            urls (dict): The 'urls' dictionary loaded from config.json.
+
+        Returns:
+            dict: A new dictionary with the prefix replaced.
+        """
+        mocked = json.loads(json.dumps(urls))
+        mocked['request']['prefix'] = f'http://{self.host}:{self.port}/appstock/app/kline/mkline?param='
+        if 'batchRequest' in mocked:
+            mocked['batchRequest']['prefix'] = f'http://{self.host}:{self.port}/q='
+        return mocked
+
+# END OF CLASS DEFINITION
+#---------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    import pandas as pd
+
+    from utils.component import JsonDataProcessor
+
+    _root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    async def _serve_forever(args):
+        server = MockQuoteServer(base_latency=args.latency, capacity=args.capacity, firewall_threshold=args.firewall,
+                                 port=args.port, recording=args.recording, error_rate=args.error_rate,
+                                 firewall_rate=args.firewall_rate, rate_threshold=args.rate_threshold,
+                                 block_time=args.block_time)
+        await server.start()
+        print(f'Mock quote server listening on http://{server.host}:{server.port}/appstock/app/kline/mkline '
+              f'and http://{server.host}:{server.port}/q=')
+        await asyncio.Event().wait()
+
+    async def _record(args):
+        stock_codes = pd.read_csv(os.path.join(_root_dir, 'stock_code.csv'), header=None)[0].tolist()
+        urls = None
+        if args.live:
+            _, _, urls, _ = JsonDataProcessor().split_json_to_dicts(os.path.join(_root_dir, 'config.json'), 'CN')
+        count = await record_payloads(stock_codes, args.output, urls=urls, concurrency=args.concurrency)
+        print(f'{count}/{len(stock_codes)} payloads written to {args.output}')
+
+    parser = argparse.ArgumentParser(description='Local stand-in for the quote endpoints.')
+    commands = parser.add_subparsers(dest='command')
+    serve = commands.add_parser('serve', help='serve quotes (the default)')
+    serve.add_argument('--port', type=int, default=8080)
+    serve.add_argument('--recording', default=None, help='replay the payloads of a recording')
+    serve.add_argument('--latency', type=float, default=0.02, help='latency of a request in seconds')
+    serve.add_argument('--capacity', type=int, default=32, help='requests served without slowing down')
+    serve.add_argument('--firewall', type=int, default=64, help='in-flight count that triggers the firewall page')
+    serve.add_argument('--error-rate', type=float, default=0.0, help='share of requests answered with HTTP 500')
+    serve.add_argument('--firewall-rate', type=float, default=0.0, help='share of requests answered with the firewall page')
+    serve.add_argument('--rate-threshold', type=int, default=None, help='requests per second that get the client blocked')
+    serve.add_argument('--block-time', type=float, default=10.0, help='seconds a block lasts')
+    record = commands.add_parser('record', help='write a recording for every code in stock_code.csv')
+    record.add_argument('output', help='the recording to write (JSON lines)')
+    record.add_argument('--live', action='store_true', help='record the live endpoint instead of synthetic payloads')
+    record.add_argument('--concurrency', type=int, default=8, help='requests in flight while recording live')
+
+    arguments = parser.parse_args(sys.argv[1:] or ['serve'])
+    if arguments.command == 'record':
+        asyncio.run(_record(arguments))
+    else:
+        asyncio.run(_serve_forever(arguments))
+
+# END OF FILE
+#---------------------------------------------------------------------------------
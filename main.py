@@ -15,13 +15,21 @@ import os
 import sys
 import asyncio
 import time
-import pandas as pd
 
 from datetime import datetime
 
 import utils.functions as funcs
 import utils.component as comps
-import utils.stock as stock
+import utils.catalog as catalog
+import utils.startup as startup
+
+# modules built on pandas, numpy and aiohttp, imported in the background while the first prompt
+# waits for an answer, see startup.preload()
+HEAVY_MODULES = ['utils.stock', 'utils.snapshot', 'utils.history', 'utils.bars', 'utils.indicators',
+                 'utils.scheduler', 'utils.screen', 'utils.metrics', 'utils.alerts', 'utils.server']
+
+# 'python main.py --serve' answers queries over HTTP without the command prompt, see utils/server.py
+SERVE_ONLY = '--serve' in sys.argv[1:]
 
 
 async def main():
@@ -33,44 +41,115 @@ async def main():
     comps.Const.REGION_CODE = 'CN'
 
 
-    stock_code_list, interest_info_idxs, thresholds, urls = funcs.initial_program(
+    # the stock codes and the filtered config are cached until either file changes
+    stock_code_list, interest_info_idxs, thresholds, urls, settings = funcs.initial_program(
         stock_code_file=comps.Const.STOCKCODE_FILE,
         config_file=comps.Const.CONFIG_FILE,
-        region_code=comps.Const.REGION_CODE
+        region_code=comps.Const.REGION_CODE,
+        cache_file=os.path.join(comps.Const.RAW_DATA_DIR, 'startup.cache')
     )
 
+    if not os.path.exists(comps.Const.RAW_DATA_DIR):
+        os.makedirs(comps.Const.RAW_DATA_DIR)
+
+    # only saved snapshots count as previous data, not the checkpoint of an unfinished pass,
+    # the manifest of raw_data/ knows the latest one without listing the directory
+    snapshot_catalog = catalog.SnapshotCatalog.open(comps.Const.RAW_DATA_DIR)
+    latest_entry = snapshot_catalog.latest()
+    if latest_entry is not None and not os.path.exists(snapshot_catalog.snapshot_path(latest_entry)):
+        print("Snapshot manifest is out of date, rebuilding it...")
+        snapshot_catalog.rebuild()
+        latest_entry = snapshot_catalog.latest()
+
+    # asked before anything heavy is needed, the heavy modules are imported while the user answers
+    user_input = None
+    if latest_entry is not None and SERVE_ONLY:
+        user_input = 'y'
+    elif latest_entry is not None:
+        startup.preload(HEAVY_MODULES)
+        user_input = funcs.read_line(f"Previous data detected. Load data from latest file {latest_entry['name']}? (y/n): ").lower().strip()
+
+    import utils.stock as stock
+    import utils.snapshot as snapshot
+    import utils.history as history
+    import utils.bars as bars
+    import utils.indicators as indicators
+    import utils.scheduler as scheduler
+    import utils.screen as screen
+    import utils.metrics as metrics
+    import utils.alerts as alerts
+    import utils.server as server
+
+    # rows of an unfinished pass are streamed here, so a restart only fetches the missing tail
+    checkpoint = None
+    if 'checkpoint' in settings:
+        checkpoint = stock.FetchCheckpoint(
+            path=os.path.join(comps.Const.RAW_DATA_DIR, settings['checkpoint']['fileName']),
+            freshness=settings['checkpoint'].get('freshness', 300)
+        )
+
+    # minute bars delivered with every mkline response, collected into an intraday minute history
+    bar_store = None
+    if 'bars' in settings:
+        bar_store = bars.MinuteBarStore.from_config(settings['bars'])
+
+    # timing spans and counters of the hot paths, published as JSON lines and/or a Prometheus endpoint
+    registry, exporter = None, None
+    if 'metrics' in settings:
+        registry = metrics.MetricsRegistry.from_config(settings['metrics'])
+        exporter = metrics.MetricsExporter.from_config(registry, settings['metrics'], comps.Const.RAW_DATA_DIR)
+        await exporter.start()
+
     fetcher = stock.AsyncStockFetcher(
         stock_list=stock_code_list,
         urls=urls,
         interest_info_idxs=interest_info_idxs,
-        progress_callback=funcs.progress_callback
+        progress_callback=funcs.progress_callback,
+        concurrency=settings.get('concurrency'),
+        retry_limit=settings.get('fetch', {}).get('retryLimit', 3),
+        checkpoint=checkpoint,
+        snapshot_backend=snapshot.get_backend(settings.get('snapshot')),
+        bar_store=bar_store,
+        parse=settings.get('parse'),
+        metrics=registry,
+        session=settings.get('session'),
+        rate_limit=settings.get('rateLimit')
     )
+    # None if the quotes are batched with 'withBars', the batch endpoint carries no bars
+    bar_store = fetcher.bar_store
 
-    raw_data = None
+    # named screen profiles, compiled once and evaluated together by the 'profiles' command
+    profiles = comps.JsonDataProcessor().load_section(comps.Const.CONFIG_FILE, comps.Const.REGION_CODE, 'profiles')
+    profile_batch = screen.ScreenBatch.from_profiles(profiles)
 
-    if not os.path.exists(comps.Const.RAW_DATA_DIR):
-        os.makedirs(comps.Const.RAW_DATA_DIR)
+    # share of stock codes that must be fetched for a pass to count as successful
+    success_ratio = settings.get('fetch', {}).get('successRatio', 1.0)
+
+    raw_data = None
+    raw_data_time = None
 
-    if len(os.listdir(comps.Const.RAW_DATA_DIR)) == 0:
+    if latest_entry is None:
         print("No previous data detected. Start fetching new data by default...")
         time.sleep(0.5)
-        status = await funcs.async_fetch_raw_data(fetcher, comps.Const.RAW_DATA_DIR)
+        status = await funcs.async_fetch_raw_data(fetcher, comps.Const.RAW_DATA_DIR, success_ratio=success_ratio)
         if status == 1:
             print("Can not fetch data. Existing program...")
             time.sleep(0.5)
             sys.exit()
         raw_data = fetcher.df
     else:
-        latest_file_name = os.listdir(comps.Const.RAW_DATA_DIR)[-1]
-        user_input = input(f"Previous data detected. Load data from latest file {latest_file_name}? (y/n): ").lower().strip()
+        latest_file_name = latest_entry['name']
         if user_input == 'y':
             print(f'Data loaded from {latest_file_name}.')
             latest_file_path = os.path.join(comps.Const.RAW_DATA_DIR, latest_file_name)
-            raw_data = pd.read_csv(latest_file_path)
+            raw_data = snapshot.load_snapshot(latest_file_path)
+            raw_data_time = latest_entry['time']
+            # partial (tiered) passes build on the loaded rows
+            fetcher.seed(raw_data)
             pass
         elif user_input == 'n':
             print('Start to fetch new data...')
-            status = await funcs.async_fetch_raw_data(fetcher, comps.Const.RAW_DATA_DIR)
+            status = await funcs.async_fetch_raw_data(fetcher, comps.Const.RAW_DATA_DIR, success_ratio=success_ratio)
             if status == 1:
                 print("Can not fetch data. Existing program...")
                 time.sleep(0.5)
@@ -78,38 +157,208 @@ async def main():
             raw_data = fetcher.df
         else:
             print("Invalid input, fetching new data by default...")
-            status = await funcs.async_fetch_raw_data(fetcher, comps.Const.RAW_DATA_DIR)
+            status = await funcs.async_fetch_raw_data(fetcher, comps.Const.RAW_DATA_DIR, success_ratio=success_ratio)
             if status == 1:
                 print("Can not fetch data. Existing program...")
                 time.sleep(0.5)
                 sys.exit()
             raw_data = fetcher.df
 
-    db = stock.StockDatabase(raw_data=raw_data)
-
-    while True:
-        user_input = input("Waiting for command: ").lower().strip()
-        if user_input == 'exit':
-            print("Exiting...")
-            break
-        elif user_input.startswith('show'):
-            search_code_list = user_input.split(' ')[1:]
-            db.show_stock_info(search_code_list)
-        elif user_input.startswith('update'):
-            status = await funcs.async_fetch_raw_data(fetcher, comps.Const.RAW_DATA_DIR)
-            if status == 1:
-                print("Failed to update stock information. Try later...")
-            else:
-                print("Update stock information successuflly.")
-                db.update(new_data=fetcher.df)
-        elif user_input.startswith('filter'):
-            print(f"Filtering stock with default thresholds...")
-            print(f"Filtering results:")
-            interest_stocks = db.filter_stocks(thresholds=thresholds)
-            db.show_stock_info(interest_stocks)
+    if raw_data_time is None:
+        raw_data_time = fetcher.fetched_at
+
+    # every snapshot of the session is kept, so the intraday evolution of a stock can be queried
+    snapshot_history = None
+    if 'history' in settings:
+        snapshot_history = history.SnapshotHistory.from_config(settings['history'])
+
+    # indicators are updated with every snapshot and can be used in screens like any column
+    indicator_engine = None
+    if 'indicators' in settings:
+        indicator_engine = indicators.IndicatorEngine.from_config(settings['indicators'])
+
+    # alert rules persist across refreshes and are evaluated on the rows every refresh changed
+    alert_engine = None
+    if 'alerts' in settings:
+        alert_engine = alerts.AlertEngine.from_config(settings['alerts'], comps.Const.RAW_DATA_DIR)
+
+    db = stock.StockDatabase(raw_data=raw_data, history=snapshot_history, timestamp=raw_data_time,
+                             index_columns=settings.get('index', {}).get('columns'), indicators=indicator_engine,
+                             metrics=registry, page_size=settings.get('display', {}).get('pageSize'),
+                             alerts=alert_engine)
+
+    # read-only queries of the snapshot over HTTP, answered on this loop so they see every refresh
+    query_server = None
+    if 'server' in settings or SERVE_ONLY:
+        query_server = server.QueryServer.from_config(db, settings.get('server', {}), thresholds=thresholds)
+        await query_server.start()
+        print(f"Serving queries on {query_server.url}.")
+
+    async def refresh(ratio=success_ratio, retry_failed=False, verbose=True, stock_codes=None, save=True):
+        status = await funcs.async_fetch_raw_data(fetcher, comps.Const.RAW_DATA_DIR, success_ratio=ratio,
+                                                  retry_failed=retry_failed, verbose=verbose,
+                                                  stock_codes=stock_codes, save=save)
+        if status == 1:
+            return status, None
+        # indicators take one sample per round over the market: a full pass, or the tiered pass
+        # which completes the rotation of the slowest tier (the one that saves a snapshot)
+        sample = save if stock_codes is not None else not retry_failed
+        return status, db.update(new_data=fetcher.df, timestamp=fetcher.fetched_at, sample=sample)
+
+    # watchlist and recent filter hits are refreshed far more often than the rest of the market,
+    # every tick fetches the codes due in one pass, a snapshot is saved once per round of the market
+    plan = None
+    if 'tiers' in settings:
+        plan = scheduler.RefreshPlan.from_config(settings['tiers'], stock_code_list)
+
+    async def background_refresh():
+        if plan is None:
+            status, delta = await refresh(verbose=False)
         else:
-            pass
+            status, delta = await refresh(verbose=False, stock_codes=plan.due(), save=plan.rotation_complete())
+        if status == 0 and len(delta):
+            print(f"Background refresh done, changes since last update: {delta.summary()}.")
+
+    # poll the market in the background during trading sessions, commands always see the latest snapshot
+    poller = None
+    if settings.get('schedule', {}).get('valid', False):
+        poller = scheduler.PollingScheduler.from_config(background_refresh, settings['schedule'])
+        if plan is not None:
+            poller.interval = plan.tick
+        # data fetched just now does not need another poll right away, a loaded snapshot does
+        poller.start(delay=poller.interval if raw_data_time == fetcher.fetched_at else 0.0)
+        print(poller.status())
+
+    async def shutdown():
+        if poller is not None:
+            await poller.stop()
+        if query_server is not None:
+            await query_server.stop()
+        await fetcher.close()
+        if exporter is not None:
+            await exporter.stop()
+        if alert_engine is not None:
+            alert_engine.close()
+
+    try:
+        if SERVE_ONLY:
+            # no command prompt, the background polling keeps the snapshot current until Ctrl+C
+            await asyncio.Event().wait()
+
+        while True:
+            try:
+                user_input = (await funcs.async_input("Waiting for command: ")).lower().strip()
+            except EOFError:
+                user_input = 'exit'
+            if user_input == 'exit':
+                break
+            elif user_input.startswith('show'):
+                search_code_list = user_input.split(' ')[1:]
+                db.show_stock_info(search_code_list)
+            elif user_input.startswith('more'):
+                db.show_more()
+            elif user_input.startswith('update') or user_input.startswith('retry'):
+                # an optional argument overrides the configured success ratio, e.g. 'update 0.95'
+                args = user_input.split(' ')[1:]
+                try:
+                    ratio = float(args[0]) if args else success_ratio
+                except ValueError:
+                    print(f"Invalid success ratio {args[0]}, using {success_ratio} instead.")
+                    ratio = success_ratio
+                retry_failed = user_input.startswith('retry')
+                if poller is not None:
+                    # wait for a running background refresh instead of fetching twice at the same time
+                    status, delta = await poller.run_exclusive(refresh, ratio, retry_failed)
+                else:
+                    status, delta = await refresh(ratio, retry_failed)
+                if status == 1:
+                    print("Failed to update stock information. Try later...")
+                else:
+                    print("Update stock information successuflly.")
+                    print(f"Changes since last update: {delta.summary()}.")
+            elif user_input.startswith('auto'):
+                args = user_input.split(' ')[1:]
+                if poller is None:
+                    print("Background polling is disabled in config.json.")
+                elif args == ['on']:
+                    poller.resume()
+                    print(poller.status())
+                elif args == ['off']:
+                    poller.pause()
+                    print(poller.status())
+                else:
+                    print("Usage: auto [on|off]")
+            elif user_input.startswith('status'):
+                print(poller.status() if poller is not None else "Background polling is disabled in config.json.")
+                if fetcher.rate_limiter is not None:
+                    print(f"Rate limit: {fetcher.rate_limiter.status()}")
+            elif user_input.startswith('alerts'):
+                print(alert_engine.summary() if alert_engine is not None else "Alerts are disabled in config.json.")
+            elif user_input.startswith('metrics'):
+                print(registry.summary() if registry is not None else "Metrics are disabled in config.json.")
+            elif user_input.startswith('server'):
+                print(query_server.status() if query_server is not None else "The query server is disabled in config.json.")
+            elif user_input.startswith('unwatch') or user_input.startswith('watch'):
+                args = user_input.split(' ')[1:]
+                if plan is None:
+                    print("Refresh tiers are disabled in config.json.")
+                elif user_input.startswith('unwatch'):
+                    plan.unwatch(args)
+                elif args:
+                    plan.watch(args)
+                else:
+                    for name, codes in plan.members().items():
+                        preview = f" ({', '.join(codes)})" if len(codes) <= 10 else ''
+                        print(f"  {name}: {len(codes)} stocks{preview}")
+            elif user_input.startswith('history'):
+                args = user_input.split(' ')[1:]
+                if len(args) != 2:
+                    print("Usage: history [stock_code] [column]")
+                else:
+                    db.show_history(args[0], args[1])
+            elif user_input.startswith('bars'):
+                args = user_input.split(' ')[1:]
+                if len(args) != 1:
+                    print("Usage: bars [stock_code]")
+                elif bar_store is None:
+                    print("Minute bars are off, see 'bars' and 'batchRequest' in config.json.")
+                elif args[0] not in bar_store.stock_codes:
+                    print(f"No minute bars collected for {args[0]}.")
+                else:
+                    print(bar_store.bars(args[0]).to_string())
+            elif user_input.startswith('profiles'):
+                print(f"Filtering stock with {len(profile_batch.names)} profiles: {', '.join(profile_batch.names)}")
+                try:
+                    matches = db.filter_profiles(profile_batch)
+                except ValueError as e:
+                    print(f"Invalid profile in config.json: {e}")
+                    continue
+                if plan is not None:
+                    plan.mark_hits(matches.keys())
+                for stock_code, matched in matches.items():
+                    print(f"  {stock_code}: {', '.join(matched)}")
+                db.show_stock_info(list(matches.keys()))
+            elif user_input.startswith('filter'):
+                print(f"Filtering stock with default thresholds...")
+                print(f"Filtering results:")
+                try:
+                    interest_stocks = db.filter_stocks(thresholds=thresholds)
+                except ValueError as e:
+                    print(f"Invalid thresholds in config.json: {e}")
+                    continue
+                if plan is not None:
+                    plan.mark_hits(interest_stocks)
+                db.show_stock_info(interest_stocks)
+            else:
+                pass
+    finally:
+        # also reached when Ctrl+C cancels this task, so connections and servers are always closed
+        print("Exiting...")
+        await shutdown()
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
\ No newline at end of file
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
\ No newline at end of file
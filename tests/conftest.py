@@ -0,0 +1,38 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: conftest.py
+# Description: shared fixtures of the regression tests, run with 'python -m pytest tests'
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from utils.component import JsonDataProcessor
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='session')
+def config():
+    """(interest_info_idxs, thresholds, urls, settings) of the shipped config.json."""
+    return JsonDataProcessor().split_json_to_dicts(os.path.join(ROOT_DIR, 'config.json'), 'CN')
+
+# END OF FILE
+#---------------------------------------------------------------------------------
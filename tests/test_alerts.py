@@ -0,0 +1,99 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: test_alerts.py
+# Description: regression tests of the alert rules evaluated by StockDatabase.update
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import pandas as pd
+
+from utils.alerts import AlertEngine
+from utils.indicators import IndicatorEngine
+from utils.stock import StockDatabase
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+RULES = {'increaseAbove5': {'kind': 'cross', 'column': 'increase', 'threshold': 5, 'direction': 'up'}}
+
+
+class ListSink:
+    def __init__(self) -> None:
+        self.alerts = []
+
+    def deliver(self, alerts: list):
+        self.alerts.extend(alerts)
+
+    def close(self):
+        pass
+
+
+class BrokenSink:
+    def deliver(self, alerts: list):
+        raise OSError('disk full')
+
+    def close(self):
+        pass
+
+
+def _frame(increase: list) -> pd.DataFrame:
+    return pd.DataFrame({'stockCode': ['sh600000', 'sh600004', 'sz000001'],
+                         'curr': [7.0, 9.0, 11.0], 'increase': increase})
+
+
+def test_only_rows_of_the_delta_fire():
+    sink = ListSink()
+    db = StockDatabase(_frame([1.0, 6.0, 2.0]), alerts=AlertEngine(RULES, [sink]), timestamp=0.0)
+
+    delta = db.update(_frame([5.5, 6.0, 2.0]), timestamp=60.0)
+    assert delta.changed == ['sh600000']
+    # sh600004 was above 5 in the first snapshot already, only the crossing row fires
+    assert [alert.stock_code for alert in sink.alerts] == ['sh600000']
+
+    db.update(_frame([5.5, 6.0, 2.0]), timestamp=120.0)
+    assert len(sink.alerts) == 1
+
+    # a row falling back and crossing again fires again
+    db.update(_frame([4.0, 6.0, 2.0]), timestamp=180.0)
+    db.update(_frame([5.1, 6.0, 2.0]), timestamp=240.0)
+    assert [alert.stock_code for alert in sink.alerts] == ['sh600000', 'sh600000']
+
+
+def test_failing_sink_does_not_abort_the_update():
+    sink = ListSink()
+    db = StockDatabase(_frame([1.0, 1.0, 1.0]), alerts=AlertEngine(RULES, [BrokenSink(), sink]), timestamp=0.0)
+    delta = db.update(_frame([6.0, 1.0, 1.0]), timestamp=60.0)
+    assert delta.changed == ['sh600000']
+    assert db.version == 1
+    assert db.raw_data['increase'].tolist() == [6.0, 1.0, 1.0]
+    assert [alert.stock_code for alert in sink.alerts] == ['sh600000']
+
+
+
+def test_indicator_rules_see_rows_without_a_quote_change():
+    sink = ListSink()
+    rules = dict(RULES, ma2Above11={'kind': 'cross', 'column': 'ma2', 'threshold': 11.5, 'direction': 'up'})
+    frame = _frame([1.0, 1.0, 1.0])
+    db = StockDatabase(frame, indicators=IndicatorEngine({'ma2': {'kind': 'ma', 'column': 'curr', 'period': 2}}),
+                       alerts=AlertEngine(rules, [sink]), timestamp=0.0)
+
+    frame = frame.assign(curr=[12.0, 9.0, 11.0])
+    db.update(frame, timestamp=60.0)
+    assert sink.alerts == []
+
+    # the quote stays, but the moving average catches up with it and crosses the level
+    delta = db.update(frame, timestamp=120.0)
+    assert delta.changed == []
+    assert [(alert.rule, alert.stock_code) for alert in sink.alerts] == [('ma2Above11', 'sh600000')]
+
+# END OF FILE
+#---------------------------------------------------------------------------------
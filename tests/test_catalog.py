@@ -0,0 +1,53 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: test_catalog.py
+# Description: regression tests of the snapshot manifest
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.catalog import SnapshotCatalog
+from utils.snapshot import CsvSnapshotBackend, NpySnapshotBackend
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+
+def test_entries_locate_every_column(tmp_path):
+    df = pd.DataFrame({'stockCode': ['sh600000', 'sz000001'], 'curr': [7.01, 10.5], 'increase': [1.5, -0.25]})
+    catalog = SnapshotCatalog(str(tmp_path))
+    entry = catalog.add(NpySnapshotBackend().save(df, str(tmp_path), '2024_10_04_21_59'), df)
+
+    files = {name: (offset, size, data_offset) for name, offset, size, data_offset in entry['files']}
+    assert sorted(files) == ['curr.npy', 'increase.npy', 'schema.json', 'stockCode.npy']
+    assert sum(size for _, size, _ in files.values()) == entry['bytes']
+    # the files follow each other in checksum order
+    offsets = sorted(files.values())
+    assert all(a[0] + a[1] == b[0] for a, b in zip(offsets, offsets[1:]))
+    # a column is mapped straight from its data offset, without parsing the .npy header
+    _, size, data_offset = files['curr.npy']
+    column = np.memmap(os.path.join(catalog.snapshot_path(entry), 'curr.npy'), dtype='<f8', mode='r',
+                       offset=data_offset, shape=(entry['rows'],))
+    assert column.tolist() == df['curr'].tolist()
+    assert data_offset + 8 * entry['rows'] == size
+
+    # a CSV snapshot is a single file starting at 0
+    entry = catalog.add(CsvSnapshotBackend().save(df, str(tmp_path), '2024_10_04_22_00'), df)
+    assert entry['files'] == [[entry['name'], 0, entry['bytes'], 0]]
+    assert catalog.verify() == {'missing': [], 'modified': [], 'uncataloged': []}
+
+# END OF FILE
+#---------------------------------------------------------------------------------
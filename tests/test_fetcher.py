@@ -0,0 +1,63 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: test_fetcher.py
+# Description: regression tests of AsyncStockFetcher against the local mock quote server
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import asyncio
+
+from benchmark.mock_server import MockQuoteServer
+from utils.bars import MinuteBarStore
+from utils.stock import AsyncStockFetcher
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+STOCK_CODES = ['sh600000', 'sh600004', 'sz000001', 'sz000002', 'sz300750']
+
+
+def _fetch(urls: dict, interest_info_idxs: dict, bar_store) -> tuple:
+    async def run():
+        server = MockQuoteServer(base_latency=0.001)
+        await server.start()
+        fetcher = AsyncStockFetcher(stock_list=STOCK_CODES, urls=server.request_urls(urls),
+                                    interest_info_idxs=interest_info_idxs, bar_store=bar_store)
+        try:
+            result = await fetcher.fetch_data()
+        finally:
+            await fetcher.close()
+            await server.stop()
+        return fetcher, result, server.request_count
+    return asyncio.run(run())
+
+
+def test_bars_are_stored_with_batching_on(config):
+    interest_info_idxs, _, urls, _ = config
+    assert urls['batchRequest']['valid']
+    fetcher, result, requests = _fetch(urls, interest_info_idxs, MinuteBarStore())
+    assert result.success_ratio == 1.0
+    # the batch endpoint carries no bars, so every code went through its own mkline request
+    assert requests == len(STOCK_CODES)
+    assert sorted(fetcher.bar_store.stock_codes) == sorted(STOCK_CODES)
+
+
+def test_batching_with_bars_drops_the_store(config):
+    interest_info_idxs, _, urls, _ = config
+    urls = dict(urls, batchRequest=dict(urls['batchRequest'], withBars=True))
+    fetcher, result, requests = _fetch(urls, interest_info_idxs, MinuteBarStore())
+    assert result.success_ratio == 1.0
+    assert requests == 1
+    assert fetcher.bar_store is None
+
+# END OF FILE
+#---------------------------------------------------------------------------------
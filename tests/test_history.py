@@ -0,0 +1,56 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: test_history.py
+# Description: regression tests of the intraday snapshot history
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import pandas as pd
+import pytest
+
+from utils.history import SnapshotHistory
+from utils.stock import StockDatabase
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+
+def _frame(curr: list) -> pd.DataFrame:
+    return pd.DataFrame({'stockCode': ['sh600000', 'sh600004', 'sz000001'], 'curr': curr})
+
+
+def test_only_changed_rows_are_recorded():
+    history = SnapshotHistory(columns=['curr'])
+    db = StockDatabase(_frame([7.0, 9.0, 11.0]), history=history, timestamp=0.0)
+    db.update(_frame([7.1, 9.0, 11.0]), timestamp=60.0)
+    db.update(_frame([7.1, 9.0, 11.0]), timestamp=120.0)
+    db.update(_frame([7.1, 9.2, 11.0]), timestamp=180.0)
+
+    # an unchanged row is no new observation, it does not show up as a tick of its own
+    assert history.series('sh600000', 'curr').tolist() == [7.0, 7.1]
+    assert history.series('sh600004', 'curr').tolist() == [9.0, 9.2]
+    assert history.series('sz000001', 'curr').tolist() == [11.0]
+    assert history.timestamps().tolist() == [0.0, 60.0, 180.0]
+
+    # the market at a time holds the latest observation of every stock
+    assert history.at(120.0)['curr'].tolist() == [7.1, 9.0, 11.0]
+    assert history.at()['curr'].tolist() == [7.1, 9.2, 11.0]
+
+
+def test_snapshots_must_arrive_in_order():
+    history = SnapshotHistory(columns=['curr'])
+    history.append(_frame([7.0, 9.0, 11.0]), 60.0)
+    with pytest.raises(ValueError):
+        history.append(_frame([7.0, 9.0, 11.0]), 0.0)
+
+# END OF FILE
+#---------------------------------------------------------------------------------
@@ -0,0 +1,69 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: test_scheduler.py
+# Description: regression tests of the tiered refresh plan
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+from collections import Counter
+
+from utils.scheduler import RefreshPlan, RefreshTier
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+UNIVERSE = [f'sh{600000 + i}' for i in range(100)]
+
+
+def _plan() -> RefreshPlan:
+    return RefreshPlan([RefreshTier('hot', 5, codes=['sh600000'], hits=True),
+                        RefreshTier('market', 20, rest=True)], UNIVERSE, hit_ttl=300)
+
+
+def _rotation(plan: RefreshPlan, now: float, changes=None) -> list:
+    """The due() lists of one rotation over the slowest tier, changes[tick](plan) runs before that tick."""
+    ticks = []
+    for tick in range(plan._slices(plan.tiers[-1])):
+        if changes and tick in changes:
+            changes[tick](plan)
+        ticks.append(plan.due(now + tick * plan.tick))
+    assert plan.rotation_complete()
+    return ticks
+
+
+def test_rotation_covers_the_market_once():
+    plan = _plan()
+    ticks = _rotation(plan, 0.0)
+    assert all(tick[0] == 'sh600000' for tick in ticks)
+    market = Counter(code for tick in ticks for code in tick if code != 'sh600000')
+    assert sorted(market) == UNIVERSE[1:] and set(market.values()) == {1}
+
+
+def test_rotation_keeps_its_members_when_tiers_change():
+    plan = _plan()
+    # filter hits join the hot tier and a watch is dropped in the middle of the rotation
+    changes = {1: lambda plan: plan.mark_hits(UNIVERSE[10:20], now=5.0),
+               2: lambda plan: plan.unwatch(['sh600000'])}
+    ticks = _rotation(plan, 0.0, changes)
+    # no code is fetched twice within a tick, every code at least once per rotation
+    assert all(len(tick) == len(set(tick)) for tick in ticks)
+    fetched = Counter(code for tick in ticks for code in tick)
+    assert set(fetched) == set(UNIVERSE)
+    # the slow tier still hands out the slices it froze at the start of the rotation
+    market = [code for tick in ticks for code in tick if code not in UNIVERSE[10:20] and code != 'sh600000']
+    assert len(market) == len(set(market))
+    # the next rotation picks up the new membership
+    ticks = _rotation(plan, 20.0)
+    assert Counter(code for tick in ticks for code in tick)['sh600000'] == 1
+
+# END OF FILE
+#---------------------------------------------------------------------------------
@@ -0,0 +1,79 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: test_screen.py
+# Description: regression tests of compiled screens and StockDatabase.filter_stocks
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.screen import Screen, ScreenBatch
+from utils.stock import StockDatabase
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+
+@pytest.fixture
+def db():
+    return StockDatabase(pd.DataFrame({
+        'stockCode': ['sh600000', 'sh600004', 'sz000001'],
+        'stockName': ['浦发银行', '白云机场', '平安银行'],
+        'increase': [1.0, 4.0, 6.0],
+        'turnOver': [2.0, 7.0, 12.0],
+    }), index_columns=['increase'], timestamp=0.0)
+
+
+def test_screen_matches_by_columns(db):
+    assert db.filter_stocks('increase > 3 and turnOver < 10') == ['sh600004']
+    assert db.filter_stocks({'increase': {'lower': 3, 'valid': True}}) == ['sh600004', 'sz000001']
+    # an empty screen matches everything
+    assert db.filter_stocks({}) == ['sh600000', 'sh600004', 'sz000001']
+
+
+@pytest.mark.parametrize('expression, expected', [
+    ('1 > 2', []),
+    ('2 > 1', ['sh600000', 'sh600004', 'sz000001']),
+    ('not 2 > 1', []),
+])
+def test_constant_screens(db, expression, expected):
+    assert db.filter_stocks(expression) == expected
+    assert db.filter_stocks(expression, cache=False) == expected
+    mask = Screen(expression).mask({'increase': np.zeros(4)})
+    assert mask.shape == (4,) and mask.tolist() == [bool(expected)] * 4
+
+
+def test_constant_profile(db):
+    masks = ScreenBatch({'never': '1 > 2', 'rising': 'increase > 3'}).masks(db.raw_data)
+    assert masks['never'].tolist() == [False, False, False]
+    assert masks['rising'].tolist() == [False, True, True]
+
+
+
+@pytest.mark.parametrize('expression', ['stockName + 1 > 2', 'stockCode * 2 > 1', '-stockName < 0'])
+def test_invalid_operands_raise_value_error(db, expression):
+    with pytest.raises(ValueError, match='Invalid operands'):
+        Screen(expression).mask(db.raw_data)
+    with pytest.raises(ValueError, match='Invalid operands'):
+        db.filter_stocks(expression, cache=False)
+    with pytest.raises(ValueError, match='Invalid operands'):
+        ScreenBatch({'broken': expression, 'rising': 'increase > 3'}).masks(db.raw_data)
+
+
+def test_unknown_column_raises_value_error(db):
+    with pytest.raises(ValueError, match='Unknown column'):
+        db.filter_stocks('volume > 3', cache=False)
+
+# END OF FILE
+#---------------------------------------------------------------------------------
@@ -0,0 +1,66 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: test_server.py
+# Description: regression tests of the query server
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import asyncio
+import socket
+
+import aiohttp
+import pandas as pd
+
+from utils.screen import _screen_cache
+from utils.server import QueryServer
+from utils.stock import StockDatabase
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _get(server: QueryServer, paths: list) -> list:
+    async def run():
+        await server.start()
+        try:
+            async with aiohttp.ClientSession() as session:
+                answers = []
+                for path in paths:
+                    async with session.get(server.url + path) as response:
+                        answers.append((response.status, await response.json()))
+                return answers
+        finally:
+            await server.stop()
+    return asyncio.run(run())
+
+
+def test_filter_errors_are_bad_requests():
+    db = StockDatabase(pd.DataFrame({'stockCode': ['sh600000', 'sz000001'], 'stockName': ['浦发银行', '平安银行'],
+                                     'increase': [1.0, 4.0]}), timestamp=0.0)
+    server = QueryServer(db, thresholds={'increase': {'lower': 3, 'valid': True}}, port=_free_port())
+    cached = len(_screen_cache)
+    answers = _get(server, ['/filter', '/filter?expr=increase < 3', '/filter?expr=stockName %2B 1 > 2',
+                            '/filter?expr=volume > 1', '/filter?expr=increase >'])
+    assert answers[0] == (200, ['sz000001'])
+    assert answers[1] == (200, ['sh600000'])
+    assert [status for status, _ in answers[2:]] == [400, 400, 400]
+    # only the configured screen is kept in the screen cache, not the ad-hoc expressions
+    assert len(_screen_cache) <= cached + 1
+
+# END OF FILE
+#---------------------------------------------------------------------------------
@@ -0,0 +1,97 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: test_snapshot.py
+# Description: regression tests of the snapshot backends
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import json
+import mmap
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.snapshot import NpySnapshotBackend, load_snapshot
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        'stockCode': ['sh600000', 'sz000001', 'bj830799'],
+        'stockName': ['浦发银行', '平安银行', 'ST艾融'],
+        'curr': [7.01, 10.5, np.nan],
+        'increase': [1.5, -0.25, 0.0],
+    })
+
+
+def _root(array):
+    while getattr(array, 'base', None) is not None:
+        array = array.base
+    return array
+
+
+def test_npy_round_trip(frame, tmp_path):
+    backend = NpySnapshotBackend()
+    path = backend.save(frame, str(tmp_path), '2024_10_04_21_59')
+    pd.testing.assert_frame_equal(load_snapshot(path), frame, check_dtype=False)
+    assert load_snapshot(path)['stockName'].tolist() == frame['stockName'].tolist()
+
+    # every column is mapped, text as fixed-width unicode
+    columns = backend.load_columns(path)
+    assert all(isinstance(array, np.memmap) for array in columns.values())
+    assert columns['stockCode'].dtype.kind == 'U'
+    # the numeric columns of the frame are views of the files
+    loaded = backend.load(path)
+    assert isinstance(_root(loaded['curr'].to_numpy()), mmap.mmap)
+
+
+def _write_legacy(frame: pd.DataFrame, path: str, text):
+    """A snapshot directory in an earlier format, text columns written by text(path, name, values)."""
+    os.makedirs(path)
+    schema = {'columns': [], 'rows': len(frame)}
+    for column in frame.columns:
+        if pd.api.types.is_numeric_dtype(frame[column]):
+            array = frame[column].to_numpy(dtype='float64')
+            np.save(os.path.join(path, f'{column}.npy'), array)
+            schema['columns'].append({'name': column, 'dtype': array.dtype.str})
+        else:
+            schema['columns'].append({'name': column, 'dtype': text(path, column, frame[column].tolist())})
+    with open(os.path.join(path, 'schema.json'), 'w', encoding='utf-8') as f:
+        json.dump(schema, f)
+
+
+def test_npy_loads_legacy_bytes(frame, tmp_path):
+    def text(path, column, values):
+        array = np.array([value.encode('utf-8') for value in values])
+        np.save(os.path.join(path, f'{column}.npy'), array)
+        return array.dtype.str
+    path = str(tmp_path / '2024_10_04_21_59_raw.columns')
+    _write_legacy(frame, path, text)
+    pd.testing.assert_frame_equal(load_snapshot(path), frame, check_dtype=False)
+
+
+def test_npy_loads_legacy_json(frame, tmp_path):
+    def text(path, column, values):
+        with open(os.path.join(path, f'{column}.json'), 'w', encoding='utf-8') as f:
+            json.dump(values, f, ensure_ascii=False)
+        return 'str'
+    path = str(tmp_path / '2024_10_04_21_59_raw.columns')
+    _write_legacy(frame, path, text)
+    pd.testing.assert_frame_equal(load_snapshot(path), frame, check_dtype=False)
+
+# END OF FILE
+#---------------------------------------------------------------------------------
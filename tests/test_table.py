@@ -0,0 +1,34 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: test_table.py
+# Description: regression tests of the console tables
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import pandas as pd
+
+from utils.table import TableRenderer
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+
+def test_border_follows_display_width():
+    renderer = TableRenderer()
+    df = pd.DataFrame({'股票名称': ['浦发银行', 'ST艾融'], 'curr': [7.01, 10.5]})
+    lines = renderer.render(df).splitlines()
+    # every line, border or row, takes the same number of console columns
+    assert len({renderer.display_width(line) for line in lines}) == 1
+    assert lines[0] == '+----------+------+'
+
+# END OF FILE
+#---------------------------------------------------------------------------------
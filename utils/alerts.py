@@ -0,0 +1,366 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: alerts.py
+# Description: alert rules evaluated on the rows that changed with every refresh, delivered to
+#              the console, a JSON-lines file or a local webhook
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import json
+import os
+import time
+import urllib.request
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from .component import JsonDataProcessor
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# DEFINE CLASS HERE
+
+class Alert:
+    """One firing of a rule for one stock."""
+    __slots__ = ('rule', 'stock_code', 'value', 'reference', 'timestamp', 'message')
+
+    def __init__(self, rule: str, stock_code: str, value: float, reference: float, timestamp: float, message: str) -> None:
+        self.rule = rule
+        self.stock_code = stock_code
+        self.value = value
+        self.reference = reference
+        self.timestamp = timestamp
+        self.message = message
+
+    def __str__(self) -> str:
+        return f"[{datetime.fromtimestamp(self.timestamp).strftime('%H:%M:%S')}] {self.rule}: {self.stock_code} {self.message}"
+
+    def to_dict(self) -> dict:
+        return {
+            'rule': self.rule,
+            'stockCode': self.stock_code,
+            'value': self.value,
+            'reference': self.reference,
+            'time': datetime.fromtimestamp(self.timestamp).isoformat(timespec='seconds'),
+            'message': self.message,
+        }
+
+
+class AlertRule:
+    """
+    AlertRule is a condition on the rows of a snapshot which fires when it becomes true.
+
+    Supported kinds:
+        cross (column, threshold, direction): The value reaches the threshold, from below for
+            direction 'up' (value >= threshold), from above for 'down' (value <= threshold).
+        ratio (column, factor): The value grew by factor against the previous snapshot, e.g.
+            factor 2 for 'turnOver doubled' (the previous value must be positive).
+        breakout (column, level, direction): The value moved beyond the level column of the
+            previous snapshot, e.g. column 'curr' and level 'highest' for a new day high.
+
+    A rule fires once per transition: after firing for a stock it stays quiet until the condition
+    was false for that stock again. On top of that, a stock is not reported again by the same
+    rule within 'debounce' seconds, so a value flickering around a threshold does not flood the
+    sinks.
+
+    Attributes:
+        name (str): The rule name, as in config.json.
+        spec (dict): The rule spec.
+        debounce (float): Seconds between two alerts of the rule for the same stock.
+    """
+    KINDS = ('cross', 'ratio', 'breakout')
+
+    def __init__(self, name: str, spec: dict, debounce=0.0) -> None:
+        spec = dict(spec)
+        if spec.get('kind') not in self.KINDS:
+            raise ValueError(f"Unknown alert kind {spec.get('kind')} for {name}, expected one of {self.KINDS}")
+        if 'column' not in spec:
+            raise ValueError(f"Alert rule {name} needs a 'column'")
+        if spec['kind'] == 'cross' and 'threshold' not in spec:
+            raise ValueError(f"Alert rule {name} needs a 'threshold'")
+        if spec['kind'] == 'breakout' and 'level' not in spec:
+            raise ValueError(f"Alert rule {name} needs a 'level' column")
+        spec.setdefault('direction', 'up')
+        spec.setdefault('factor', 2.0)
+        if spec['direction'] not in ('up', 'down'):
+            raise ValueError(f"Alert rule {name} has direction {spec['direction']}, expected 'up' or 'down'")
+        self.name = name
+        self.spec = spec
+        self.debounce = spec.get('debounce', debounce)
+        # stocks the condition held for at their latest evaluation, and the time of their latest alert
+        self._active = set()
+        self._fired_at = {}
+
+    @property
+    def columns(self) -> tuple:
+        return (self.spec['column'], self.spec['level']) if self.spec['kind'] == 'breakout' else (self.spec['column'],)
+
+    def condition(self, current: dict, previous: dict) -> tuple:
+        """
+        Evaluate the condition on a set of rows.
+
+        Args:
+            current (dict): Column -> values of the rows in the new snapshot.
+            previous (dict): Column -> values of the same rows in the previous snapshot, NaN for new stocks.
+
+        Returns:
+            tuple: (boolean mask of the rows the condition holds for, the reference values)
+        """
+        spec = self.spec
+        value = current[spec['column']]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if spec['kind'] == 'cross':
+                reference = np.full(value.shape, float(spec['threshold']))
+                held = value >= reference if spec['direction'] == 'up' else value <= reference
+            elif spec['kind'] == 'ratio':
+                reference = previous[spec['column']]
+                held = (reference > 0) & (value >= reference * spec['factor'])
+            else:
+                reference = previous[spec['level']]
+                held = value > reference if spec['direction'] == 'up' else value < reference
+        # comparisons with NaN are False, a stock without a previous value never fires
+        return held, reference
+
+    def describe(self) -> str:
+        spec = self.spec
+        if spec['kind'] == 'cross':
+            return f"{spec['column']} crosses {spec['threshold']} ({spec['direction']})"
+        if spec['kind'] == 'ratio':
+            return f"{spec['column']} grows {spec['factor']}x against the previous snapshot"
+        return f"{spec['column']} breaks the previous {spec['level']} ({spec['direction']})"
+
+    def _message(self, value: float, reference: float) -> str:
+        spec = self.spec
+        if spec['kind'] == 'cross':
+            return f"{spec['column']} {value:g} crossed {reference:g}"
+        if spec['kind'] == 'ratio':
+            return f"{spec['column']} {reference:g} -> {value:g} ({value / reference:.2f}x)"
+        return f"{spec['column']} {value:g} broke {spec['level']} {reference:g}"
+
+    def prime(self, codes: np.ndarray, held: np.ndarray):
+        """Take over the state of a first snapshot without firing, a stock already beyond a threshold is no transition."""
+        self._active = set(codes[held].tolist())
+
+    def transitions(self, codes: np.ndarray, current: dict, previous: dict, timestamp: float) -> list:
+        """
+        Evaluate the rule on changed rows and update its state.
+
+        Args:
+            codes (np.ndarray): Stock codes of the rows.
+            current (dict), previous (dict): See condition().
+            timestamp (float): Unix time of the new snapshot.
+
+        Returns:
+            list: The alerts of stocks for which the condition became true.
+        """
+        held, reference = self.condition(current, previous)
+        value = current[self.spec['column']]
+        self._active.difference_update(codes[~held].tolist())
+        alerts = []
+        for pos in np.flatnonzero(held).tolist():
+            code = codes[pos]
+            if code in self._active:
+                continue
+            self._active.add(code)
+            if timestamp - self._fired_at.get(code, float('-inf')) < self.debounce:
+                continue
+            self._fired_at[code] = timestamp
+            alerts.append(Alert(self.name, code, float(value[pos]), float(reference[pos]), timestamp,
+                                self._message(float(value[pos]), float(reference[pos]))))
+        return alerts
+
+
+class ConsoleSink:
+    """Print every alert."""
+    def deliver(self, alerts: list):
+        for alert in alerts:
+            print(f"ALERT {alert}")
+
+    def close(self):
+        pass
+
+
+class FileSink:
+    """Append every alert to a JSON-lines file."""
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def deliver(self, alerts: list):
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write(''.join(json.dumps(alert.to_dict(), ensure_ascii=False) + '\n' for alert in alerts))
+
+    def close(self):
+        pass
+
+
+class WebhookSink:
+    """
+    POST the alerts of a refresh as one JSON array to a (local) URL.
+
+    The requests are sent from a single worker thread in the order the refreshes happened, so a
+    slow or unreachable endpoint never holds up the refresh itself.
+    """
+    def __init__(self, url: str, timeout=2.0) -> None:
+        self.url = url
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='webhook')
+
+    def _post(self, body: bytes):
+        request = urllib.request.Request(self.url, data=body, headers={'Content-Type': 'application/json'}, method='POST')
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+        except OSError as e:
+            print(f"Alert webhook {self.url} failed: {e}")
+
+    def deliver(self, alerts: list):
+        body = json.dumps([alert.to_dict() for alert in alerts], ensure_ascii=False).encode('utf-8')
+        self._executor.submit(self._post, body)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+class AlertEngine:
+    """
+    AlertEngine evaluates persistent alert rules against every new snapshot of a StockDatabase.
+
+    Only the rows a refresh changed (SnapshotDelta.positions) are evaluated, together with
+    their values from the previous snapshot (gathered by StockDatabase.update), so the cost of
+    a refresh is changed rows x rules instead of universe x rules. A row that did not change
+    keeps the state of its latest evaluation. Rules reading an indicator are evaluated on the
+    rows whose indicators moved as well, an indicator can cross a level without a new quote.
+
+    Attributes:
+        rules (dict): Rule name -> AlertRule.
+        sinks (list): Objects with deliver(alerts) and close(), every alert goes to all of them.
+        recent (deque): The latest alerts, for the 'alerts' command.
+
+    Methods:
+        prime(columns, codes): Take over the state of the first snapshot without firing.
+        evaluate(current, previous, codes, timestamp, rows): Evaluate the changed rows and deliver the alerts.
+        rules_reading(columns): The names of the rules reading any of the columns.
+        close(): Flush and close the sinks.
+    """
+    def __init__(self, rules: dict, sinks=None, debounce=0.0, keep=50) -> None:
+        self.rules = {name: AlertRule(name, spec, debounce=debounce) for name, spec in rules.items()}
+        self.sinks = list(sinks or [])
+        self.recent = deque(maxlen=keep)
+        self.fired = 0
+
+    @classmethod
+    def from_config(cls, config: dict, base_dir='.'):
+        """
+        Build an alert engine from the 'alerts' entry of config.json.
+
+        Args:
+            config (dict): A dictionary with 'rules' (rule name -> spec with a 'kind' key), 'sinks'
+                           ('console', 'file' with 'fileName', 'webhook' with 'url' and 'timeout')
+                           and an optional default 'debounce' in seconds. Rules and sinks need a
+                           'valid' flag like every other entry.
+            base_dir (str): Directory of the alert file.
+
+        Returns:
+            AlertEngine: The configured engine.
+        """
+        rules = {name: {key: value for key, value in spec.items() if key != 'valid'}
+                 for name, spec in JsonDataProcessor.filter_valid(config.get('rules', {})).items()}
+        sinks = []
+        for name, spec in JsonDataProcessor.filter_valid(config.get('sinks', {})).items():
+            if name == 'console':
+                sinks.append(ConsoleSink())
+            elif name == 'file':
+                sinks.append(FileSink(os.path.join(base_dir, spec.get('fileName', 'alerts.jsonl'))))
+            elif name == 'webhook':
+                sinks.append(WebhookSink(spec['url'], timeout=spec.get('timeout', 2.0)))
+            else:
+                raise ValueError(f"Unknown alert sink {name}, expected console, file or webhook")
+        return cls(rules, sinks, debounce=config.get('debounce', 0.0))
+
+    @property
+    def columns(self) -> list:
+        """The columns read by any rule."""
+        return list(dict.fromkeys(column for rule in self.rules.values() for column in rule.columns))
+
+    def rules_reading(self, columns) -> list:
+        columns = set(columns)
+        return [name for name, rule in self.rules.items() if columns.intersection(rule.columns)]
+
+    def prime(self, columns: dict, codes: np.ndarray):
+        """
+        Take over the state of the first snapshot without firing.
+
+        Args:
+            columns (dict): Column -> values of all rows.
+            codes (np.ndarray): Stock codes of all rows.
+        """
+        nothing = {column: np.full(len(codes), np.nan) for column in self.columns}
+        for rule in self.rules.values():
+            rule.prime(codes, rule.condition(columns, nothing)[0])
+
+    def evaluate(self, current: dict, previous: dict, codes: np.ndarray, timestamp=None, rows=None) -> list:
+        """
+        Evaluate all rules on the changed rows of a refresh and deliver the alerts.
+
+        Args:
+            current (dict): Column -> values of the changed rows in the new snapshot.
+            previous (dict): Column -> values of the same rows in the previous snapshot.
+            codes (np.ndarray): Stock codes of the changed rows.
+            timestamp (float): Unix time of the new snapshot, defaults to now.
+            rows (dict): Rule name -> boolean mask of the rows that rule is evaluated on, every
+                         row for a rule without a mask.
+
+        Returns:
+            list: The alerts fired by this refresh.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        rows = rows or {}
+        alerts = []
+        if len(codes):
+            for name, rule in self.rules.items():
+                mask = rows.get(name)
+                if mask is None:
+                    alerts.extend(rule.transitions(codes, current, previous, timestamp))
+                elif mask.any():
+                    alerts.extend(rule.transitions(codes[mask], {column: values[mask] for column, values in current.items()},
+                                                   {column: values[mask] for column, values in previous.items()}, timestamp))
+        if alerts:
+            self.fired += len(alerts)
+            self.recent.extend(alerts)
+            for sink in self.sinks:
+                # a failing sink must neither keep the alerts from the others nor abort the refresh
+                try:
+                    sink.deliver(alerts)
+                except Exception as e:
+                    print(f"Alert sink {type(sink).__name__} failed: {e}")
+        return alerts
+
+    def summary(self) -> str:
+        lines = [f"{len(self.rules)} alert rules, {self.fired} alerts fired:"]
+        lines += [f"  {name}: {rule.describe()}" for name, rule in self.rules.items()]
+        lines += [f"  {alert}" for alert in self.recent]
+        return '\n'.join(lines)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+# END OF CLASS DEFINITION
+#---------------------------------------------------------------------------------
+
+# END OF FILE
+#---------------------------------------------------------------------------------
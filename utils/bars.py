@@ -0,0 +1,235 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: bars.py
+# Description: per-code store of the m1 kline bars returned by the mkline endpoint
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import numpy as np
+import pandas as pd
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# DEFINE CLASS HERE
+
+class _BarSeries:
+    """
+    The minute bars of one stock: an int64 array of bar times (YYYYmmddHHMM) and a 2-D
+    (bar x OHLCV) float array, both sorted by bar time and grown by doubling.
+    """
+    def __init__(self, capacity=16) -> None:
+        self.size = 0
+        self.times = np.empty(capacity, dtype=np.int64)
+        self.values = np.empty((capacity, len(MinuteBarStore.FIELDS)), dtype=np.float64)
+
+    def _reserve(self, rows: int):
+        capacity = self.times.shape[0]
+        if rows <= capacity:
+            return
+        while capacity < rows:
+            capacity *= 2
+        times = np.empty(capacity, dtype=np.int64)
+        times[:self.size] = self.times[:self.size]
+        values = np.empty((capacity, self.values.shape[1]), dtype=np.float64)
+        values[:self.size] = self.values[:self.size]
+        self.times, self.values = times, values
+
+    def merge(self, times: np.ndarray, values: np.ndarray) -> int:
+        """
+        Merge sorted bars into the series. A bar already stored is overwritten, since the bar of
+        the current minute keeps changing until the minute is over.
+
+        Returns:
+            int: The number of bars that were not stored before.
+        """
+        stored = self.times[:self.size]
+        slots = np.searchsorted(stored, times, side='left')
+        known = slots < self.size
+        known[known] = stored[slots[known]] == times[known]
+        self.values[slots[known]] = values[known]
+
+        fresh = ~known
+        n_fresh = int(fresh.sum())
+        if n_fresh == 0:
+            return 0
+
+        if slots[fresh].min() == self.size:
+            # the usual case: new bars only ever follow the stored ones
+            self._reserve(self.size + n_fresh)
+            self.times[self.size:self.size + n_fresh] = times[fresh]
+            self.values[self.size:self.size + n_fresh] = values[fresh]
+        else:
+            merged_times = np.concatenate([stored, times[fresh]])
+            merged_values = np.concatenate([self.values[:self.size], values[fresh]])
+            order = np.argsort(merged_times, kind='stable')
+            self._reserve(self.size + n_fresh)
+            self.times[:self.size + n_fresh] = merged_times[order]
+            self.values[:self.size + n_fresh] = merged_values[order]
+        self.size += n_fresh
+        return n_fresh
+
+    def drop_first(self, count: int):
+        if count <= 0:
+            return
+        keep = self.size - count
+        self.times[:keep] = self.times[count:self.size]
+        self.values[:keep] = self.values[count:self.size]
+        self.size = keep
+
+
+class MinuteBarStore:
+    """
+    MinuteBarStore collects the m1 kline bars that come with every mkline response.
+
+    The mkline endpoint returns the latest few minute bars of a stock together with its quote,
+    so polling the market repeatedly builds an intraday minute history at no extra cost. Bars
+    overlap from one poll to the next; they are de-duplicated by bar time, and the newest values
+    of a bar win because the bar of the running minute is still moving.
+
+    Every stock gets its own series: a sorted int64 array of bar times plus a (bar x OHLCV)
+    float array, so reading the bars of a stock or the bars within a time range is a slice.
+
+    Attributes:
+        max_bars (int): Maximum number of bars kept per stock, the oldest are dropped first.
+
+    Methods:
+        add(stock_code, bars): Merge the bars of one mkline response.
+        merge(stock_code, times, values): Merge bars which were already parsed.
+        bars(stock_code, start, end): The bars of one stock as a DataFrame.
+        latest(stock_code): The most recent bar of one stock.
+    """
+    FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, max_bars=480) -> None:
+        self.max_bars = max_bars
+        self._series = {}
+
+    @classmethod
+    def from_config(cls, config: dict):
+        """
+        Build a bar store from the 'bars' entry of config.json.
+
+        Args:
+            config (dict): A dictionary with a 'maxBars' key.
+
+        Returns:
+            MinuteBarStore: The configured bar store.
+        """
+        return cls(max_bars=config.get('maxBars', 480))
+
+    def __len__(self) -> int:
+        return sum(series.size for series in self._series.values())
+
+    @property
+    def stock_codes(self) -> list:
+        return list(self._series.keys())
+
+    @staticmethod
+    def parse(bars: list) -> tuple:
+        """
+        Parse the 'm1' list of an mkline response.
+
+        A bar is either a list like ['202410041450', open, close, high, low, volume, ...] or the
+        same fields in one space-separated string. Fields beyond volume are ignored.
+
+        Returns:
+            tuple: (bar times as int64 YYYYmmddHHMM, (bar x OHLCV) float array), sorted by time.
+        """
+        times = np.empty(len(bars), dtype=np.int64)
+        values = np.empty((len(bars), len(MinuteBarStore.FIELDS)), dtype=np.float64)
+        for idx, bar in enumerate(bars):
+            if isinstance(bar, str):
+                bar = bar.split()
+            times[idx] = int(bar[0])
+            # the endpoint orders a bar as open, close, high, low
+            values[idx] = (float(bar[1]), float(bar[3]), float(bar[4]), float(bar[2]), float(bar[5]))
+        if times.shape[0] > 1 and np.any(times[1:] < times[:-1]):
+            order = np.argsort(times, kind='stable')
+            times, values = times[order], values[order]
+        return times, values
+
+    def add(self, stock_code: str, bars: list) -> int:
+        """
+        Merge the bars of one mkline response into the series of a stock.
+
+        Args:
+            stock_code (str): Stock code with market prefix.
+            bars (list): The 'm1' list of the response.
+
+        Returns:
+            int: The number of bars that were not stored before.
+        """
+        if not bars:
+            return 0
+        times, values = self.parse(bars)
+        return self.merge(stock_code, times, values)
+
+    def merge(self, stock_code: str, times: np.ndarray, values: np.ndarray) -> int:
+        """
+        Merge bars which were already parsed, e.g. by a worker of the parse stage.
+
+        Args:
+            stock_code (str): Stock code with market prefix.
+            times (np.ndarray): Sorted bar times as returned by parse.
+            values (np.ndarray): The matching (bar x OHLCV) float array.
+
+        Returns:
+            int: The number of bars that were not stored before.
+        """
+        series = self._series.get(stock_code)
+        if series is None:
+            series = self._series[stock_code] = _BarSeries()
+        added = series.merge(times, values)
+        series.drop_first(series.size - self.max_bars)
+        return added
+
+    def bars(self, stock_code: str, start=None, end=None) -> pd.DataFrame:
+        """
+        Return the bars of one stock, optionally restricted to bar times within [start, end].
+
+        Args:
+            stock_code (str): Stock code with market prefix.
+            start (int): First bar time as YYYYmmddHHMM. Defaults to the oldest bar.
+            end (int): Last bar time as YYYYmmddHHMM. Defaults to the newest bar.
+
+        Returns:
+            pd.DataFrame: One row per bar, indexed by bar time, with OHLCV columns.
+        """
+        series = self._series.get(stock_code)
+        if series is None:
+            return pd.DataFrame(columns=list(self.FIELDS), index=pd.DatetimeIndex([], name='time'))
+        times = series.times[:series.size]
+        lo = 0 if start is None else int(np.searchsorted(times, start, side='left'))
+        hi = series.size if end is None else int(np.searchsorted(times, end, side='right'))
+        index = pd.to_datetime(times[lo:hi].astype(str), format='%Y%m%d%H%M')
+        return pd.DataFrame(series.values[lo:hi].copy(), columns=list(self.FIELDS),
+                            index=pd.DatetimeIndex(index, name='time'))
+
+    def latest(self, stock_code: str):
+        """
+        Return the most recent bar of one stock.
+
+        Returns:
+            tuple: (bar time as YYYYmmddHHMM, OHLCV array), None if no bar was stored.
+        """
+        series = self._series.get(stock_code)
+        if series is None or series.size == 0:
+            return None
+        return int(series.times[series.size - 1]), series.values[series.size - 1].copy()
+
+# END OF CLASS DEFINITION
+#---------------------------------------------------------------------------------
+
+# END OF FILE
+#---------------------------------------------------------------------------------
@@ -0,0 +1,290 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: catalog.py
+# Description: manifest of the snapshots saved under raw_data/, so finding the latest snapshot or
+#              the snapshots of a time range does not scan the directory
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import argparse
+import hashlib
+import json
+import os
+import struct
+
+from bisect import bisect_left, bisect_right
+from typing import TYPE_CHECKING
+
+# only adding and cataloging snapshots needs utils.snapshot (and with it pandas and numpy), reading
+# the manifest for the start prompt does not
+if TYPE_CHECKING:
+    import pandas as pd
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# DEFINE CLASS HERE
+
+class SnapshotCatalog:
+    """
+    SnapshotCatalog keeps a manifest of the snapshots in a directory, ordered by fetch time.
+
+    Every entry records the file name, the fetch time, the backend format, the row count, the
+    schema (column name and dtype), the size in bytes and a SHA-1 checksum of the snapshot. Its
+    'files' list holds [file, offset, bytes, data offset] for every file of the snapshot (one per
+    column for the npy format): offset is the position of the file within the checksummed bytes,
+    data offset where the array data of a .npy file starts inside it (0 for other files), so a
+    single column can be mapped with np.memmap(..., offset=data offset) without reading its header. The
+    manifest is read once, after that the latest snapshot is the last entry and a time range is
+    found with two binary searches. Every change rewrites 'manifest.json' through a temporary
+    file and os.replace, so a crash leaves either the old or the new manifest, never half of one.
+
+    Only save_data() adds entries. Snapshots copied into the directory by hand, or a lost or
+    damaged manifest, are picked up by rebuild(), also available from the command line:
+
+        python -m utils.catalog raw_data            # rebuild the manifest
+        python -m utils.catalog raw_data --verify   # only compare it with the files
+
+    Attributes:
+        directory (str): The snapshot directory.
+        entries (list): Manifest entries (dictionaries), ascending by time.
+
+    Methods:
+        open(directory): Load the manifest of a directory, rebuilding it if there is none.
+        add(path, df): Record a snapshot that was just saved.
+        latest(): The entry of the most recent snapshot.
+        between(start, end): The entries fetched within [start, end].
+        rebuild(): Recreate the manifest from the snapshot files.
+        verify(): Compare the manifest with the snapshot files.
+    """
+    file_name = 'manifest.json'
+    version = 2
+    # absolute directory -> catalog, see open()
+    _opened = {}
+
+    def __init__(self, directory: str, entries=None) -> None:
+        self.directory = directory
+        self.entries = sorted(entries or [], key=lambda entry: (entry['time'], entry['name']))
+        self._times = [entry['time'] for entry in self.entries]
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, self.file_name)
+
+    @classmethod
+    def open(cls, directory: str, reload=False):
+        """
+        Load the manifest of a directory. The catalog is kept per directory, so every caller
+        of the process shares one instance and the manifest is read only once.
+
+        A directory without a manifest (snapshots saved before there was one) is cataloged once,
+        so is a directory whose manifest cannot be parsed.
+
+        Args:
+            directory (str): The snapshot directory.
+            reload (bool): Read the manifest again even if the directory was opened before.
+
+        Returns:
+            SnapshotCatalog: The catalog of the directory.
+        """
+        key = os.path.abspath(directory)
+        if key in cls._opened and not reload:
+            return cls._opened[key]
+        catalog = cls(directory)
+        try:
+            with open(catalog.path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version') == cls.version:
+                catalog = cls(directory, manifest['entries'])
+            else:
+                catalog.rebuild()
+        except FileNotFoundError:
+            if os.path.isdir(directory):
+                catalog.rebuild()
+        except ValueError:
+            print(f"Damaged snapshot manifest {catalog.path}, rebuilding it...")
+            catalog.rebuild()
+        cls._opened[key] = catalog
+        return catalog
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def snapshot_path(self, entry: dict) -> str:
+        return os.path.join(self.directory, entry['name'])
+
+    def _write(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.version, 'entries': self.entries}, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _insert(self, entry: dict):
+        # a snapshot saved again within the same minute replaces the earlier entry
+        self.entries = [existing for existing in self.entries if existing['name'] != entry['name']]
+        self._times = [existing['time'] for existing in self.entries]
+        position = bisect_right(self._times, entry['time'])
+        self.entries.insert(position, entry)
+        self._times.insert(position, entry['time'])
+
+    def _entry(self, name: str, df: 'pd.DataFrame') -> dict:
+        from .snapshot import SNAPSHOT_BACKENDS, snapshot_time
+
+        path = os.path.join(self.directory, name)
+        size, checksum, files = _checksum(path)
+        time = snapshot_time(name)
+        return {
+            'name': name,
+            'time': time if time is not None else os.path.getmtime(path),
+            'format': next((backend.name for backend in SNAPSHOT_BACKENDS.values() if name.endswith(backend.suffix)), None),
+            'rows': len(df),
+            'columns': [[str(column), str(dtype)] for column, dtype in df.dtypes.items()],
+            'bytes': size,
+            'checksum': checksum,
+            'files': files,
+        }
+
+    def add(self, path: str, df: 'pd.DataFrame') -> dict:
+        """
+        Record a snapshot that was just saved into the directory.
+
+        Args:
+            path (str): The path save_data returned.
+            df (pd.DataFrame): The saved frame, its row count and schema are recorded.
+
+        Returns:
+            dict: The new manifest entry.
+        """
+        entry = self._entry(os.path.basename(path.rstrip(os.sep)), df)
+        self._insert(entry)
+        self._write()
+        return entry
+
+    def latest(self):
+        """The entry of the most recent snapshot, None if there is none."""
+        return self.entries[-1] if self.entries else None
+
+    def between(self, start=float('-inf'), end=float('inf')) -> list:
+        """The entries whose fetch time (unix time) lies within [start, end], ascending."""
+        return self.entries[bisect_left(self._times, start):bisect_right(self._times, end)]
+
+    def rebuild(self) -> int:
+        """
+        Recreate the manifest from the snapshot files of the directory. Every snapshot is
+        loaded once to read its row count and schema.
+
+        Returns:
+            int: The number of cataloged snapshots.
+        """
+        from .snapshot import is_snapshot, load_snapshot
+
+        entries = []
+        for name in os.listdir(self.directory):
+            if not is_snapshot(name):
+                continue
+            try:
+                df = load_snapshot(os.path.join(self.directory, name))
+            except Exception as e:
+                print(f"Skipping unreadable snapshot {name}: {e}")
+                continue
+            entries.append(self._entry(name, df))
+        self.entries = sorted(entries, key=lambda entry: (entry['time'], entry['name']))
+        self._times = [entry['time'] for entry in self.entries]
+        self._write()
+        return len(self.entries)
+
+    def verify(self) -> dict:
+        """
+        Compare the manifest with the snapshot files of the directory.
+
+        Returns:
+            dict: 'missing' (cataloged, but gone), 'modified' (checksum differs) and
+                  'uncataloged' (snapshot files without an entry), each a list of file names.
+        """
+        from .snapshot import is_snapshot
+
+        report = {'missing': [], 'modified': [], 'uncataloged': []}
+        for entry in self.entries:
+            path = self.snapshot_path(entry)
+            if not os.path.exists(path):
+                report['missing'].append(entry['name'])
+            elif _checksum(path)[1] != entry['checksum']:
+                report['modified'].append(entry['name'])
+        names = {entry['name'] for entry in self.entries}
+        report['uncataloged'] = sorted(name for name in os.listdir(self.directory) if is_snapshot(name) and name not in names)
+        return report
+
+# END OF CLASS DEFINITION
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# DEFINE FUNCTIONS HERE
+
+def _checksum(path: str) -> tuple:
+    """
+    Return (size in bytes, SHA-1 hex digest, files) of a snapshot file or of all files of a snapshot
+    directory, files being [file, offset, bytes, data offset] per file in checksum order.
+    """
+    names = [os.path.basename(path)] if os.path.isfile(path) else sorted(os.listdir(path))
+    digest = hashlib.sha1()
+    size = 0
+    files = []
+    for name in names:
+        offset = size
+        with open(path if os.path.isfile(path) else os.path.join(path, name), 'rb') as f:
+            data_offset = 0
+            for block in iter(lambda: f.read(1 << 20), b''):
+                if size == offset:
+                    data_offset = _npy_data_offset(block)
+                digest.update(block)
+                size += len(block)
+        files.append([name, offset, size - offset, data_offset])
+    return size, digest.hexdigest(), files
+
+
+def _npy_data_offset(head: bytes) -> int:
+    """Where the array data of a .npy file starts, from the first bytes of the file; 0 for other files."""
+    # magic string, format version, then the header length as little-endian uint16 (1.0) or uint32 (2.0, 3.0)
+    if not head.startswith(b'\x93NUMPY') or len(head) < 12:
+        return 0
+    if head[6] == 1:
+        return 10 + struct.unpack('<H', head[8:10])[0]
+    return 12 + struct.unpack('<I', head[8:12])[0]
+
+# END OF FUNCTION DEFINITION
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# REPAIR TOOL
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rebuild or verify the snapshot manifest of a directory.')
+    parser.add_argument('directory', nargs='?', default='raw_data', help='the snapshot directory')
+    parser.add_argument('--verify', action='store_true', help='only report differences between the manifest and the files')
+    args = parser.parse_args()
+
+    if args.verify:
+        report = SnapshotCatalog.open(args.directory).verify()
+        for problem, names in report.items():
+            print(f"{problem}: {', '.join(names) if names else '-'}")
+    else:
+        catalog = SnapshotCatalog(args.directory)
+        print(f"Cataloged {catalog.rebuild()} snapshots in {catalog.path}.")
+
+# END OF REPAIR TOOL
+#---------------------------------------------------------------------------------
+
+# END OF FILE
+#---------------------------------------------------------------------------------
@@ -14,7 +14,11 @@
 #---------------------------------------------------------------------------------
 # IMPORT REQUIRED PACKAGES HERE
 
+import asyncio
 import json
+import time
+
+from collections import deque
 
 # END OF PACKAGE IMPORT
 #---------------------------------------------------------------------------------
@@ -67,6 +71,7 @@ class JsonDataProcessor:
         filter_valid(nested_dict): Filters a dictionary to include only items where the 'valid' key is True.
         split_json_to_dicts(json_file_path, region_code): Loads a JSON file and extracts specific dictionaries
                                                          based on the region code, returning only valid items.
+        load_section(json_file_path, region_code, section): Loads a single named section of a region.
     """
 
     @staticmethod
@@ -91,8 +96,9 @@ class JsonDataProcessor:
             region_code (str): The region code used to select data from the JSON file.
 
         Returns:
-            tuple: A tuple containing three dictionaries: interest_info_idxs, thresholds, and urls,
-                   each filtered to include only valid items.
+            tuple: A tuple containing four dictionaries: interest_info_idxs, thresholds, urls and settings,
+                   each filtered to include only valid items. settings is empty if the region has no
+                   'settings' section.
         """
         with open(json_file_path, 'r') as json_file:
             data = json.load(json_file).get(region_code, {})
@@ -109,7 +115,235 @@ class JsonDataProcessor:
         interest_info_idxs = self.filter_valid(dicts_list[0])
         thresholds = self.filter_valid(dicts_list[1])
         urls = self.filter_valid(dicts_list[2])
+        settings = self.filter_valid(data.get('settings', {}))
 
-        return interest_info_idxs, thresholds, urls
-    
+        return interest_info_idxs, thresholds, urls, settings
+
+    def load_section(self, json_file_path: str, region_code: str, section: str) -> dict:
+        """
+        Load a single named section of a region, e.g. 'profiles', keeping only valid items.
+
+        Args:
+            json_file_path (str): The file path to the JSON file.
+            region_code (str): The region code used to select data from the JSON file.
+            section (str): The name of the section.
+
+        Returns:
+            dict: The valid items of the section, empty if the section does not exist.
+        """
+        with open(json_file_path, 'r') as json_file:
+            data = json.load(json_file).get(region_code, {})
+        return self.filter_valid(data.get(section, {}))
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    An AIMD (additive increase / multiplicative decrease) concurrency limiter for asyncio tasks.
+
+    The limiter behaves like an asyncio.Semaphore whose capacity moves between a floor and a
+    ceiling. Every healthy response that comes back within the target latency grows the limit
+    by roughly one slot per window of completed requests, while a congestion signal (firewall
+    page, redirect, 403, client error or a slow response) cuts the limit by a constant factor.
+    Cuts are applied at most once per target latency interval, so a burst of failures from
+    requests that were already in flight does not collapse the limit to the floor at once.
+
+    Attributes:
+        floor (int): The minimum number of concurrent requests.
+        ceiling (int): The maximum number of concurrent requests.
+        target_latency (float): Response time in seconds above which the server is considered busy.
+        limit (float): The current (fractional) concurrency limit.
+
+    Methods:
+        acquire(): Wait until a slot is available and take it.
+        release(latency, healthy): Return a slot and feed the outcome of the request to the controller.
+    """
+    def __init__(self, floor=5, ceiling=5, target_latency=0.5, initial=None, decrease_factor=0.5) -> None:
+        if floor < 1 or ceiling < floor:
+            raise ValueError(f"Invalid concurrency bounds: floor={floor}, ceiling={ceiling}")
+
+        self.floor = floor
+        self.ceiling = ceiling
+        self.target_latency = target_latency
+        self.decrease_factor = decrease_factor
+        self.limit = float(min(max(initial if initial is not None else floor, floor), ceiling))
+
+        self._in_flight = 0
+        self._waiters = deque()
+        self._last_decrease = 0.0
+
+    @classmethod
+    def from_config(cls, config: dict):
+        """
+        Build a limiter from the 'concurrency' entry of config.json.
+
+        Args:
+            config (dict): A dictionary with 'floor', 'ceiling', 'targetLatency' and optional 'initial' keys.
+
+        Returns:
+            AdaptiveConcurrencyLimiter: The configured limiter.
+        """
+        return cls(
+            floor=config.get('floor', 5),
+            ceiling=config.get('ceiling', 5),
+            target_latency=config.get('targetLatency', 0.5),
+            initial=config.get('initial'),
+            decrease_factor=config.get('decreaseFactor', 0.5)
+        )
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def acquire(self):
+        if self._in_flight < int(self.limit) and not self._waiters:
+            self._in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # the slot may have been handed over right before the cancellation
+            if waiter.done() and not waiter.cancelled():
+                self._in_flight -= 1
+                self._wake_waiters()
+            raise
+
+    def release(self, latency: float, healthy: bool):
+        self._in_flight -= 1
+
+        if healthy and latency <= self.target_latency:
+            # additive increase: about one extra slot per window of successful requests
+            self.limit = min(self.ceiling, self.limit + 1 / self.limit)
+        else:
+            # multiplicative decrease, at most once per target latency interval
+            now = time.monotonic()
+            if now - self._last_decrease >= self.target_latency:
+                self.limit = max(self.floor, self.limit * self.decrease_factor)
+                self._last_decrease = now
+
+        self._wake_waiters()
+
+    def _wake_waiters(self):
+        while self._waiters and self._in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_flight += 1
+                waiter.set_result(None)
+
+
+class TokenBucketLimiter:
+    """
+    A token-bucket request rate limiter shared by all fetch tasks, with a global cooldown.
+
+    Tokens are refilled at 'rate' per second up to 'burst', and every request takes one token
+    before it is sent, so the request rate never exceeds the rate for longer than a burst. Waiting
+    tasks are served one after the other in arrival order.
+
+    When a response shows that the server is blocking us (firewall page or 403), penalize() starts
+    a cooldown during which no task gets a token at all, and cuts the rate by 'decrease_factor'.
+    After the cooldown the rate recovers linearly by 'recovery' requests per second every second
+    until it is back at the configured rate. Tasks waiting for a token re-check the cooldown after
+    every sleep, so a cooldown started by one task is respected by all others immediately.
+
+    Attributes:
+        max_rate (float): The configured requests per second.
+        burst (int): The number of tokens the bucket holds at most.
+        cooldown (float): Seconds without any request after a block was detected.
+        min_rate (float): The rate is never cut below this value.
+        rate (float): The current requests per second.
+
+    Methods:
+        acquire(): Wait until a token is available and take it.
+        penalize(): Start a cooldown and cut the rate.
+        status(): A one-line description of the current state.
+    """
+    def __init__(self, rate=50.0, burst=20, cooldown=30.0, decrease_factor=0.5, min_rate=1.0, recovery=1.0) -> None:
+        if rate <= 0 or burst < 1:
+            raise ValueError(f"Invalid rate limit: rate={rate}, burst={burst}")
+
+        self.max_rate = float(rate)
+        self.burst = burst
+        self.cooldown = cooldown
+        self.decrease_factor = decrease_factor
+        self.min_rate = min(min_rate, self.max_rate)
+        self.recovery = recovery
+
+        self._tokens = float(burst)
+        self._refilled = time.monotonic()
+        self._cooldown_until = 0.0
+        # rate right after the latest cut, None while the full rate applies
+        self._cut_rate = None
+        self._lock = asyncio.Lock()
+        self.penalties = 0
+
+    @classmethod
+    def from_config(cls, config: dict):
+        """
+        Build a limiter from the 'rateLimit' entry of config.json.
+
+        Args:
+            config (dict): A dictionary with 'rate', 'burst', 'cooldown' and optional 'decreaseFactor',
+                           'minRate' and 'recovery' keys.
+
+        Returns:
+            TokenBucketLimiter: The configured limiter.
+        """
+        return cls(
+            rate=config.get('rate', 50.0),
+            burst=config.get('burst', 20),
+            cooldown=config.get('cooldown', 30.0),
+            decrease_factor=config.get('decreaseFactor', 0.5),
+            min_rate=config.get('minRate', 1.0),
+            recovery=config.get('recovery', 1.0)
+        )
+
+    @property
+    def rate(self) -> float:
+        return self._rate(time.monotonic())
+
+    def _rate(self, now: float) -> float:
+        if self._cut_rate is None:
+            return self.max_rate
+        rate = self._cut_rate + self.recovery * max(0.0, now - self._cooldown_until)
+        if rate >= self.max_rate:
+            self._cut_rate = None
+            return self.max_rate
+        return rate
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self._rate(now))
+        self._refilled = now
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._cooldown_until:
+                    await asyncio.sleep(self._cooldown_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self._rate(now))
+
+    def penalize(self):
+        now = time.monotonic()
+        if now < self._cooldown_until:
+            # responses of requests sent before the cooldown started do not count again
+            return
+        self._refill(now)
+        self.penalties += 1
+        self._cut_rate = max(self.min_rate, self._rate(now) * self.decrease_factor)
+        self._cooldown_until = now + self.cooldown
+        # the cooldown is a clean start, no saved-up burst right after it
+        self._tokens = 0.0
+        self._refilled = self._cooldown_until
 
+    def status(self) -> str:
+        now = time.monotonic()
+        if now < self._cooldown_until:
+            return f"cooling down for {self._cooldown_until - now:.0f}s, then {self._rate(now):.1f} req/s"
+        return f"{self._rate(now):.1f} of {self.max_rate:.1f} req/s, {self.penalties} blocks so far"
@@ -14,17 +14,22 @@
 #---------------------------------------------------------------------------------
 # IMPORT REQUIRED PACKAGES HERE
 
+import asyncio
 import warnings
 import os
 import sys
 import platform
-
-import pandas as pd
+import threading
 
 from datetime import datetime
+from typing import TYPE_CHECKING
 
 from .component import JsonDataProcessor
-from .stock import AsyncStockFetcher
+from .startup import StartupCache, read_stock_codes
+
+# pandas and aiohttp come with utils.stock, importing it here would put them on the path to the menu
+if TYPE_CHECKING:
+    from .stock import AsyncStockFetcher
 
 # END OF PACKAGE IMPORT
 #---------------------------------------------------------------------------------
@@ -37,6 +42,9 @@ warnings.simplefilter(action=r'ignore', category=FutureWarning)
 # default output directory name
 _output_dir_name = 'interest_stock'
 
+# unbuffered reader of stdin, opened by the first read_line()
+_stdin = None
+
 # END OF GLOBAL VARIABLES' DEFINITION
 #---------------------------------------------------------------------------------
 
@@ -96,65 +104,186 @@ def show_start_menu():
     print(f'#')
     print(f'# --------------------------- COMMAND LIST ------------------------------- #')
     print(f'#')
-    print(f'#   update:               Start to fetch all stock information ')
+    print(f'#   update [ratio]:       Start to fetch all stock information ')
+    print(f'#   retry [ratio]:        Re-fetch only the stocks which failed last time ')
     print(f'#   show [stock_code]:    Displaying information about a specified stock ')
+    print(f'#   more:                 Show the next page of the latest table ')
     print(f'#   filter:               Filter stocks according to default thresholds ')
+    print(f'#   history [code] [col]: Show how a column of a stock evolved today ')
+    print(f'#   profiles:             Filter stocks with all screen profiles at once ')
+    print(f'#   bars [stock_code]:    Show the minute bars collected for a stock today ')
+    print(f'#   auto [on|off]:        Pause or resume background polling ')
+    print(f'#   status:               Show the background polling and rate limit state ')
+    print(f'#   alerts:               Show the alert rules and the latest alerts ')
+    print(f'#   metrics:              Show timing spans and counters of fetching and screening ')
+    print(f'#   server:               Show the address and cache hits of the query server ')
+    print(f'#   watch [stock_code]:   Refresh stocks with the fastest tier, no code lists the tiers ')
+    print(f'#   unwatch [stock_code]: Move stocks back to their default refresh tier ')
     print(f'#')
     print(f'# ------------------------------------------------------------------------ #')
     print(f"\n")
 
 
-def initial_program(stock_code_file: str, config_file: str, region_code: str) -> AsyncStockFetcher:
+def initial_program(stock_code_file: str, config_file: str, region_code: str, cache_file=None) -> tuple:
     """
-    Initializes the stock fetching program by reading stock codes from a CSV file,
-    processing the configuration JSON, and creating an AsyncStockFetcher instance.
+    Initializes the stock fetching program by reading stock codes from a CSV file
+    and processing the configuration JSON.
+
+    Both are parsed once and kept in cache_file, later starts load the cache as long as
+    neither file changed.
 
     Args:
         stock_code_file (str): Path to the CSV file containing stock codes.
         config_file (str): Path to the JSON configuration file.
         region_code (str): The region code to filter relevant configuration data.
+        cache_file (str): Path of the startup cache, None to parse both files every time.
 
     Returns:
-        AsyncStockFetcher: Initialized asynchronous stock fetcher ready to fetch data.
+        tuple: (stock_code_list, interest_info_idxs, thresholds, urls, settings)
     """
     show_start_menu()
     try:
+        if cache_file is not None:
+            return StartupCache(cache_file).load(stock_code_file, config_file, region_code)
+
         # Read stock codes from the CSV file
-        df = pd.read_csv(stock_code_file, header=None)
-        stock_code_list = df[df.columns[0]].values.tolist()
+        stock_code_list = read_stock_codes(stock_code_file)
 
         # Process the configuration JSON
         processor = JsonDataProcessor()
-        interest_info_idxs, thresholds, urls = processor.split_json_to_dicts(config_file, region_code)
+        interest_info_idxs, thresholds, urls, settings = processor.split_json_to_dicts(config_file, region_code)
 
-        return stock_code_list, interest_info_idxs, thresholds, urls
+        return stock_code_list, interest_info_idxs, thresholds, urls, settings
     except Exception as e:
         print(f"An unexpected error occurred - {e}")
 
 
-async def async_fetch_raw_data(fetcher: AsyncStockFetcher, raw_data_save_dir: str) -> int:
+def read_line(prompt='') -> str:
+    """
+    Read a line from stdin, like input().
+
+    stdin is read through an unbuffered file object over its descriptor. A thread blocked on it
+    holds no lock, so the interpreter can exit while it waits for a line (a thread blocked in
+    sys.stdin.readline() aborts the shutdown), and no line read ahead is hidden in a buffer from
+    the next reader. Every prompt of the program goes through here for the latter reason.
+
+    Args:
+        prompt (str): The prompt to print.
+
+    Returns:
+        str: The line read, without the trailing newline.
+
+    Raises:
+        EOFError: If stdin is closed.
+    """
+    global _stdin
+    if _stdin is None:
+        _stdin = open(sys.stdin.fileno(), 'rb', buffering=0, closefd=False)
+    sys.stdout.write(prompt)
+    sys.stdout.flush()
+    line = _stdin.readline()
+    if not line:
+        raise EOFError
+    return line.decode(sys.stdin.encoding or 'utf-8', errors='replace').rstrip('\r\n')
+
+
+async def async_input(prompt='') -> str:
+    """
+    Read a line from stdin without blocking the event loop.
+
+    read_line() runs in a daemon thread of its own, so background tasks such as the polling
+    scheduler keep running while the program waits for a command. It is not a worker of the
+    default executor: asyncio.run joins those on exit, which after Ctrl+C would wait for a
+    line that is never typed.
+
+    Args:
+        prompt (str): The prompt to print.
+
+    Returns:
+        str: The line read, without the trailing newline.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def resolve(line, error):
+        # the waiting task may have been cancelled in the meantime
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(line)
+
+    def read():
+        try:
+            line, error = read_line(prompt), None
+        except (EOFError, OSError) as e:
+            line, error = None, e
+        try:
+            loop.call_soon_threadsafe(resolve, line, error)
+        except RuntimeError:
+            # the loop is already closed, nobody waits for the line
+            pass
+
+    threading.Thread(target=read, name='input', daemon=True).start()
+    return await future
+
+
+async def async_fetch_raw_data(fetcher: 'AsyncStockFetcher', raw_data_save_dir: str, success_ratio=1.0,
+                               retry_failed=False, verbose=True, stock_codes=None, save=True) -> int:
     """
     A coroutine to asynchronously fetch and process stock data, then save the results to a CSV file.
 
-    This routine reads a list of stock codes from a CSV file, processes a JSON configuration file 
-    to extract necessary parameters, fetches stock data asynchronously, filters the data based 
-    on specified thresholds, and saves the filtered data to a CSV file.
+    This routine fetches stock data asynchronously with the given fetcher and saves the fetched
+    data to a CSV file. Single stock codes may fail without aborting the pass, the pass only counts
+    as failed when the share of successfully fetched codes drops below success_ratio.
 
     Args:
         fetcher (AsyncStockFetcher): The instance of a AsyncStockFetcher class, used to fetch raw data
         raw_data_save_dir (str): The directory path to save the raw stock data as a CSV file.
+        success_ratio (float): Minimum share of stock codes which must be fetched, 1.0 means all of them.
+        retry_failed (bool): Only re-fetch the stock codes which failed in the previous pass.
+        verbose (bool): Print progress and every step. Background refreshes only print failures,
+                        so they do not get in the way of the command prompt.
+        stock_codes (list): Only fetch these stock codes, the other rows are kept from earlier passes.
+        save (bool): Save a snapshot. Without it the frame is only rebuilt in fetcher.df.
+
+    Returns:
+        int: 0 if enough stock codes were fetched and the data was saved, otherwise 1.
     """
     # Add time stamp
-    print(f"Start to fetch real-time data at time {datetime.now().strftime('%Y_%m_%d_%H_%M')} ...")
+    if verbose:
+        print(f"Start to fetch real-time data at time {datetime.now().strftime('%Y_%m_%d_%H_%M')} ...")
 
     # Asynchronously fetch the stock data
-    status = await fetcher.fetch_data()
-    if status == 1:
-        print("Fetching data filed.")
-    elif status == 0:
+    callback = fetcher.progress_callback
+    if not verbose:
+        fetcher.progress_callback = None
+    try:
+        if retry_failed:
+            result = await fetcher.refetch_failed()
+        else:
+            result = await fetcher.fetch_data(stock_codes)
+    finally:
+        fetcher.progress_callback = callback
+    if verbose:
+        print(f"\n{result.summary()}")
+
+    if result.success_ratio < success_ratio:
+        if not verbose:
+            print(f"\n{result.summary()}")
+        print(f"Fetching data failed, less than {success_ratio * 100:.2f}% of stocks were fetched.")
+        return 1
+
+    if not save:
+        fetcher.build_frame()
+        return 0
+
+    if verbose:
         print("Fetching complete. Start to save data...")
 
-        # Save the filtered data to a CSV file
-        fetcher.save_data(raw_data_save_dir)
+    # Save the filtered data to a CSV file
+    fetcher.save_data(raw_data_save_dir)
+    if verbose:
         print("Finished. Real-time data information updated sucessfully...")
-    return status
+    return 0
@@ -0,0 +1,450 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: history.py
+# Description: intraday history of the snapshots fetched during a session
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import time
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# DEFINE CLASS HERE
+
+class _ColumnBlock:
+    """
+    A growable block of snapshots: one timestamp array plus one 2-D (time x stock) float array
+    per column. A snapshot is a single contiguous row in every column array, and all rows are
+    kept sorted by timestamp so they can be searched with np.searchsorted.
+    """
+    def __init__(self, columns: list, n_stocks: int, capacity=64) -> None:
+        self.columns = columns
+        self.size = 0
+        self.timestamps = np.empty(capacity, dtype=np.float64)
+        self.values = {column: np.full((capacity, n_stocks), np.nan) for column in columns}
+
+    @property
+    def n_stocks(self) -> int:
+        return next(iter(self.values.values())).shape[1] if self.values else 0
+
+    def _reserve(self, rows: int, n_stocks: int):
+        capacity, width = self.timestamps.shape[0], self.n_stocks
+        if rows <= capacity and n_stocks <= width:
+            return
+        new_capacity = max(capacity, 1)
+        while new_capacity < rows:
+            new_capacity *= 2
+        new_width = max(width, n_stocks)
+
+        timestamps = np.empty(new_capacity, dtype=np.float64)
+        timestamps[:self.size] = self.timestamps[:self.size]
+        self.timestamps = timestamps
+        for column, old in self.values.items():
+            grown = np.full((new_capacity, new_width), np.nan)
+            grown[:self.size, :width] = old[:self.size]
+            self.values[column] = grown
+
+    def replace_last(self, timestamp: float, values: dict):
+        self.timestamps[self.size - 1] = timestamp
+        for column in self.columns:
+            self.values[column][self.size - 1, :values[column].shape[0]] = values[column]
+
+    def append_row(self, timestamp: float, values: dict, n_stocks: int):
+        self._reserve(self.size + 1, n_stocks)
+        self.timestamps[self.size] = timestamp
+        for column in self.columns:
+            self.values[column][self.size, :values[column].shape[0]] = values[column]
+        self.size += 1
+
+    def drop_first(self, count: int):
+        """Drop the oldest 'count' rows, keeping the remaining rows at the front of the arrays."""
+        if count <= 0:
+            return
+        keep = self.size - count
+        self.timestamps[:keep] = self.timestamps[count:self.size]
+        for array in self.values.values():
+            array[:keep] = array[count:self.size]
+            array[keep:self.size] = np.nan
+        self.size = keep
+
+    def row(self, idx: int, n_stocks: int) -> dict:
+        return {column: self._pad(self.values[column][idx], n_stocks) for column in self.columns}
+
+    @staticmethod
+    def _pad(values: np.ndarray, n_stocks: int) -> np.ndarray:
+        if values.shape[-1] >= n_stocks:
+            return values[..., :n_stocks]
+        padded = np.full(values.shape[:-1] + (n_stocks,), np.nan)
+        padded[..., :values.shape[-1]] = values
+        return padded
+
+    def window(self, start: float, end: float) -> tuple:
+        """Return the row range [lo, hi) of the snapshots taken between start and end (inclusive)."""
+        timestamps = self.timestamps[:self.size]
+        return (int(np.searchsorted(timestamps, start, side='left')),
+                int(np.searchsorted(timestamps, end, side='right')))
+
+    def dense(self, column: str, lo: int, hi: int, n_stocks: int) -> np.ndarray:
+        return self._pad(self.values[column][lo:hi], n_stocks)
+
+    def stock(self, slot: int, column: str, lo: int, hi: int) -> tuple:
+        array = self.values[column]
+        return self.timestamps[lo:hi], (array[lo:hi, slot] if slot < array.shape[1] else np.full(hi - lo, np.nan))
+
+    def latest(self, hi: int, n_stocks: int) -> dict:
+        """The last value of every stock within the first hi rows, NaN if it has none."""
+        result = {}
+        for column in self.columns:
+            array = self.dense(column, 0, hi, n_stocks)
+            valid = ~np.isnan(array)
+            last = hi - 1 - np.argmax(valid[::-1], axis=0)
+            result[column] = np.where(valid.any(axis=0), array[last, np.arange(n_stocks)], np.nan)
+        return result
+
+
+class _TickLog:
+    """
+    Full-resolution ticks as a log of (stock slot, values) entries, sorted by timestamp. A tick
+    holds only the stocks it observed, so a partial refresh costs memory for the rows it fetched,
+    not for the whole universe. starts[i] is the first entry of tick i, starts[size] the end.
+    """
+    def __init__(self, columns: list, capacity=64, entry_capacity=4096) -> None:
+        self.columns = columns
+        self.size = 0
+        self.timestamps = np.empty(capacity, dtype=np.float64)
+        self.starts = np.zeros(capacity + 1, dtype=np.intp)
+        self.slots = np.empty(entry_capacity, dtype=np.intp)
+        self.values = {column: np.empty(entry_capacity, dtype=np.float64) for column in columns}
+
+    @property
+    def n_entries(self) -> int:
+        return int(self.starts[self.size])
+
+    def _reserve(self, ticks: int, entries: int):
+        if ticks > self.timestamps.shape[0]:
+            capacity = self.timestamps.shape[0]
+            while capacity < ticks:
+                capacity *= 2
+            timestamps = np.empty(capacity, dtype=np.float64)
+            timestamps[:self.size] = self.timestamps[:self.size]
+            starts = np.zeros(capacity + 1, dtype=np.intp)
+            starts[:self.size + 1] = self.starts[:self.size + 1]
+            self.timestamps, self.starts = timestamps, starts
+        if entries > self.slots.shape[0]:
+            capacity = self.slots.shape[0]
+            while capacity < entries:
+                capacity *= 2
+            n_entries = self.n_entries
+            slots = np.empty(capacity, dtype=np.intp)
+            slots[:n_entries] = self.slots[:n_entries]
+            self.slots = slots
+            for column, old in self.values.items():
+                grown = np.empty(capacity, dtype=np.float64)
+                grown[:n_entries] = old[:n_entries]
+                self.values[column] = grown
+
+    def append(self, timestamp: float, slots: np.ndarray, row_values: dict):
+        start = self.n_entries
+        end = start + slots.shape[0]
+        self._reserve(self.size + 1, end)
+        self.timestamps[self.size] = timestamp
+        self.slots[start:end] = slots
+        for column in self.columns:
+            self.values[column][start:end] = row_values[column]
+        self.size += 1
+        self.starts[self.size] = end
+
+    def drop_first(self, count: int):
+        """Drop the oldest 'count' ticks, keeping the remaining entries at the front of the arrays."""
+        if count <= 0:
+            return
+        keep = self.size - count
+        first, end = int(self.starts[count]), self.n_entries
+        self.timestamps[:keep] = self.timestamps[count:self.size]
+        self.starts[:keep + 1] = self.starts[count:self.size + 1] - first
+        self.slots[:end - first] = self.slots[first:end]
+        for array in self.values.values():
+            array[:end - first] = array[first:end]
+        self.size = keep
+
+    def window(self, start: float, end: float) -> tuple:
+        """Return the tick range [lo, hi) of the ticks taken between start and end (inclusive)."""
+        timestamps = self.timestamps[:self.size]
+        return (int(np.searchsorted(timestamps, start, side='left')),
+                int(np.searchsorted(timestamps, end, side='right')))
+
+    def row(self, idx: int, n_stocks: int) -> dict:
+        """Tick idx as one value per stock, NaN for the stocks it did not observe."""
+        start, end = self.starts[idx], self.starts[idx + 1]
+        row = {}
+        for column in self.columns:
+            values = np.full(n_stocks, np.nan)
+            values[self.slots[start:end]] = self.values[column][start:end]
+            row[column] = values
+        return row
+
+    def dense(self, column: str, lo: int, hi: int, n_stocks: int) -> np.ndarray:
+        start, end = self.starts[lo], self.starts[hi]
+        array = np.full((hi - lo, n_stocks), np.nan)
+        ticks = np.repeat(np.arange(hi - lo), np.diff(self.starts[lo:hi + 1]))
+        array[ticks, self.slots[start:end]] = self.values[column][start:end]
+        return array
+
+    def stock(self, slot: int, column: str, lo: int, hi: int) -> tuple:
+        start, end = self.starts[lo], self.starts[hi]
+        entries = start + np.flatnonzero(self.slots[start:end] == slot)
+        ticks = np.searchsorted(self.starts[:self.size + 1], entries, side='right') - 1
+        return self.timestamps[ticks], self.values[column][entries]
+
+    def latest(self, hi: int, n_stocks: int) -> dict:
+        """The values of the last tick within the first hi ticks that observed each stock."""
+        end = int(self.starts[hi])
+        # np.unique returns the first occurrence, so look for it in the reversed log
+        slots, first = np.unique(self.slots[:end][::-1], return_index=True)
+        entries = end - 1 - first
+        result = {}
+        for column in self.columns:
+            values = np.full(n_stocks, np.nan)
+            values[slots] = self.values[column][entries]
+            result[column] = values
+        return result
+
+
+class SnapshotHistory:
+    """
+    SnapshotHistory keeps the numeric columns of every snapshot fetched during a trading day.
+
+    Values are addressed by (stockCode, fetch timestamp). Each stock code gets a fixed slot.
+    Point-in-time and range queries go through np.searchsorted on the sorted timestamps.
+
+    Recent snapshots ('ticks') are kept at full resolution for 'tick_window' seconds. A tick
+    only records the rows it is given, StockDatabase passes the rows a refresh changed, so a
+    partial (tiered) refresh of a few stocks is a tick of a few stocks instead of stale copies
+    of the whole universe. Ticks are kept as a log of (slot, values) entries for that reason.
+
+    Older ticks are compacted into bars of 'bar_seconds', one 2-D (time x stock) array per
+    column: a bar holds the last value of every column observed within it, which for a quote
+    snapshot (cumulative turnover, day high/low, ...) is the state of the market at the end of
+    the bar. At most 'max_bars' bars are kept, so the memory stays bounded however often the
+    market is polled.
+
+    Attributes:
+        columns (list): The numeric columns being recorded.
+        tick_window (float): Seconds of full-resolution history to keep.
+        bar_seconds (float): Width of a compacted bar in seconds.
+        max_bars (int): Maximum number of bars to keep.
+
+    Methods:
+        append(df, timestamp): Record a snapshot, or the rows of the stocks a refresh observed.
+        at(timestamp): The latest value of every stock at or before a timestamp, as a DataFrame.
+        series(stock_code, column, start, end): The values of one column for one stock over time.
+        window(column, start, end): The values of one column for all stocks over time.
+    """
+    def __init__(self, columns=None, keyword=r'stockCode', tick_window=1800, bar_seconds=300, max_bars=288) -> None:
+        self.columns = list(columns) if columns is not None else None
+        self.tick_window = tick_window
+        self.bar_seconds = bar_seconds
+        self.max_bars = max_bars
+        self._keyword = keyword
+
+        # stock code -> slot (column position in every 2-D array)
+        self._codes = []
+        self._slots = {}
+        self._names = {}
+        self._ticks = None
+        self._bars = None
+
+    @classmethod
+    def from_config(cls, config: dict, keyword=r'stockCode'):
+        """
+        Build a history store from the 'history' entry of config.json.
+
+        Args:
+            config (dict): A dictionary with 'tickWindow', 'barSeconds' and 'maxBars' keys.
+
+        Returns:
+            SnapshotHistory: The configured history store.
+        """
+        return cls(keyword=keyword,
+                   tick_window=config.get('tickWindow', 1800),
+                   bar_seconds=config.get('barSeconds', 300),
+                   max_bars=config.get('maxBars', 288))
+
+    def __len__(self) -> int:
+        return (self._ticks.size if self._ticks else 0) + (self._bars.size if self._bars else 0)
+
+    @property
+    def stock_codes(self) -> list:
+        return list(self._codes)
+
+    def _assign_slots(self, codes: np.ndarray) -> np.ndarray:
+        for code in codes:
+            if code not in self._slots:
+                self._slots[code] = len(self._codes)
+                self._codes.append(code)
+        return np.fromiter((self._slots[code] for code in codes), dtype=np.intp, count=len(codes))
+
+    def append(self, df: pd.DataFrame, timestamp=None):
+        """
+        Record a snapshot.
+
+        Parameters:
+        df (pd.DataFrame): The snapshot, one row per stock with a stockCode column. Stocks
+                           missing from it have no observation at this timestamp.
+        timestamp (float): Unix time of the fetch. Defaults to now.
+        """
+        timestamp = time.time() if timestamp is None else float(timestamp)
+        if self.columns is None:
+            self.columns = [column for column in df.columns
+                            if column != self._keyword and pd.api.types.is_numeric_dtype(df[column])]
+        if self._ticks is None:
+            self._ticks = _TickLog(self.columns)
+            self._bars = _ColumnBlock(self.columns, 0)
+
+        codes = df[self._keyword].to_numpy()
+        slots = self._assign_slots(codes)
+        if 'stockName' in df.columns:
+            self._names.update(zip(codes, df['stockName']))
+
+        row_values = {column: df[column].to_numpy(dtype=np.float64) for column in self.columns}
+
+        # the tick block is kept sorted by time, so a snapshot older than the latest tick is rejected
+        if self._ticks.size and timestamp < self._ticks.timestamps[self._ticks.size - 1]:
+            raise ValueError("Snapshots must be appended in timestamp order.")
+        self._ticks.append(timestamp, slots, row_values)
+        self._compact(timestamp)
+
+    def _compact(self, now: float):
+        """Fold ticks older than tick_window into bars and drop bars beyond max_bars."""
+        ticks = self._ticks
+        cutoff = now - self.tick_window
+        n_old = int(np.searchsorted(ticks.timestamps[:ticks.size], cutoff, side='left'))
+        if n_old == 0:
+            return
+
+        n_stocks = len(self._codes)
+        for idx in range(n_old):
+            timestamp = ticks.timestamps[idx]
+            bar_end = (np.floor(timestamp / self.bar_seconds) + 1) * self.bar_seconds
+            values = ticks.row(idx, n_stocks)
+
+            bars = self._bars
+            if bars.size and bars.timestamps[bars.size - 1] == bar_end:
+                # same bar, newer values win but a stock missing from this tick keeps its last value
+                previous = bars.row(bars.size - 1, n_stocks)
+                merged = {column: np.where(np.isnan(values[column]), previous[column], values[column])
+                          for column in self.columns}
+                bars._reserve(bars.size, n_stocks)
+                bars.replace_last(bar_end, merged)
+            else:
+                bars.append_row(bar_end, values, n_stocks)
+
+        ticks.drop_first(n_old)
+        self._bars.drop_first(self._bars.size - self.max_bars)
+
+    def _blocks(self):
+        # bars are always older than ticks, so bars followed by ticks is in timestamp order
+        return [block for block in (self._bars, self._ticks) if block is not None and block.size]
+
+    def timestamps(self) -> np.ndarray:
+        return np.concatenate([block.timestamps[:block.size] for block in self._blocks()] or [np.empty(0)])
+
+    def at(self, timestamp=None) -> pd.DataFrame:
+        """
+        Return the state of the market at the given timestamp: the latest recorded values of
+        every stock observed at or before it.
+
+        Parameters:
+        timestamp (float): Unix time. Defaults to the latest snapshot.
+
+        Returns:
+        pd.DataFrame: The snapshot, empty if nothing was recorded before the timestamp.
+        """
+        n_stocks = len(self._codes)
+        values = None
+        # bars are older than ticks, so a stock observed in both takes its values from the ticks
+        for block in self._blocks():
+            hi = block.size if timestamp is None else int(np.searchsorted(block.timestamps[:block.size], timestamp, side='right'))
+            if hi == 0:
+                continue
+            latest = block.latest(hi, n_stocks)
+            values = latest if values is None else \
+                {column: np.where(np.isnan(latest[column]), values[column], latest[column]) for column in self.columns}
+        if values is None:
+            return pd.DataFrame(columns=[self._keyword] + (self.columns or []))
+        data = {'stockName': [self._names.get(code, '') for code in self._codes], self._keyword: self._codes}
+        data.update(values)
+        return pd.DataFrame(data).dropna(how='all', subset=self.columns)
+
+    def window(self, column: str, start=float('-inf'), end=float('inf')) -> tuple:
+        """
+        Return the values of one column for all stocks between start and end.
+
+        Parameters:
+        column (str): The column to read.
+        start (float): Unix time, inclusive.
+        end (float): Unix time, inclusive.
+
+        Returns:
+        tuple: (timestamps, values) where values is a 2-D (time x stock) array whose columns
+               follow the order of stock_codes, NaN where a stock was not observed.
+        """
+        n_stocks = len(self._codes)
+        timestamps, values = [], []
+        for block in self._blocks():
+            lo, hi = block.window(start, end)
+            timestamps.append(block.timestamps[lo:hi])
+            values.append(block.dense(column, lo, hi, n_stocks))
+        if not timestamps:
+            return np.empty(0), np.empty((0, n_stocks))
+        return np.concatenate(timestamps), np.concatenate(values)
+
+    def series(self, stock_code: str, column: str, start=float('-inf'), end=float('inf')) -> pd.Series:
+        """
+        Return the values of one column for one stock between start and end.
+
+        Parameters:
+        stock_code (str): The stock code.
+        column (str): The column to read, e.g. 'turnOver'.
+        start (float): Unix time, inclusive.
+        end (float): Unix time, inclusive.
+
+        Returns:
+        pd.Series: The values indexed by fetch time, empty if the stock is unknown.
+        """
+        slot = self._slots.get(stock_code)
+        if slot is None:
+            return pd.Series(dtype=np.float64, name=column)
+
+        timestamps, values = [], []
+        for block in self._blocks():
+            lo, hi = block.window(start, end)
+            block_timestamps, block_values = block.stock(slot, column, lo, hi)
+            timestamps.append(block_timestamps)
+            values.append(block_values)
+        # local wall-clock time, the same clock the snapshot file names use
+        index = pd.DatetimeIndex([datetime.fromtimestamp(ts) for ts in np.concatenate(timestamps)] if timestamps else [])
+        series = pd.Series(np.concatenate(values) if values else np.empty(0), index=index, name=column)
+        return series.dropna()
+
+# END OF CLASS DEFINITION
+#---------------------------------------------------------------------------------
+
+# END OF FILE
+#---------------------------------------------------------------------------------
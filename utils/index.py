@@ -0,0 +1,103 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: index.py
+# Description: secondary indexes used by StockDatabase
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import numpy as np
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# DEFINE CLASS HERE
+
+class SortedColumnIndex:
+    """
+    SortedColumnIndex is a sorted secondary index over one numeric column of a DataFrame.
+
+    The index keeps the column values in ascending order together with the row position each
+    value came from, so a range condition 'lower <= value <= upper' is answered with two binary
+    searches instead of a scan. NaN values sort to the end and never match a range.
+
+    When only a few rows change, the index is patched in place: the old entries are removed
+    through the inverse permutation and the new values are inserted at their binary-searched
+    positions. A full re-sort only happens when a large share of the rows changed.
+
+    Attributes:
+        rebuild_ratio (float): Share of changed rows above which the index is rebuilt from scratch.
+
+    Methods:
+        build(values): (Re)build the index from a full column.
+        update(values, changed): Patch the index after the rows at 'changed' got new values.
+        range(lower, upper): Row positions whose value lies within [lower, upper].
+    """
+    def __init__(self, values: np.ndarray, rebuild_ratio=0.25) -> None:
+        self.rebuild_ratio = rebuild_ratio
+        self.build(values)
+
+    def __len__(self) -> int:
+        return self._sorted.shape[0]
+
+    def build(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        self._order = np.argsort(values, kind='stable')
+        self._sorted = values[self._order]
+        self._rank = np.empty_like(self._order)
+        self._rank[self._order] = np.arange(self._order.shape[0])
+
+    def update(self, values: np.ndarray, changed: np.ndarray):
+        """
+        Patch the index after some rows got new values or rows were appended.
+
+        Args:
+            values (np.ndarray): The full, updated column. It may be longer than before if rows
+                                 were appended at the end, but never shorter.
+            changed (np.ndarray): Row positions whose value changed. Appended rows are implied.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        n_old, n_new = len(self), values.shape[0]
+        changed = np.asarray(changed, dtype=np.intp)
+        changed = changed[changed < n_old]
+        if n_new < n_old or changed.shape[0] + n_new - n_old > self.rebuild_ratio * n_new:
+            self.build(values)
+            return
+        if changed.shape[0] == 0 and n_new == n_old:
+            return
+
+        # remove the stale entries of the changed rows
+        keep = np.ones(n_old, dtype=bool)
+        keep[self._rank[changed]] = False
+        sorted_values, order = self._sorted[keep], self._order[keep]
+
+        # insert the new values of changed and appended rows at their sorted positions
+        inserted = np.concatenate([changed, np.arange(n_old, n_new, dtype=np.intp)])
+        new_values = values[inserted]
+        arrange = np.argsort(new_values, kind='stable')
+        new_values, new_positions = new_values[arrange], inserted[arrange]
+        slots = np.searchsorted(sorted_values, new_values, side='right')
+        self._sorted = np.insert(sorted_values, slots, new_values)
+        self._order = np.insert(order, slots, new_positions)
+        self._rank = np.empty_like(self._order)
+        self._rank[self._order] = np.arange(n_new)
+
+    def range(self, lower=float('-inf'), upper=float('inf')) -> np.ndarray:
+        lo = np.searchsorted(self._sorted, lower, side='left')
+        hi = np.searchsorted(self._sorted, upper, side='right')
+        return self._order[lo:hi]
+
+# END OF CLASS DEFINITION
+#---------------------------------------------------------------------------------
+
+# END OF FILE
+#---------------------------------------------------------------------------------
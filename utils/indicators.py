@@ -0,0 +1,313 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: indicators.py
+# Description: technical indicators computed for all stocks at once from the snapshot stream
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import time
+
+import numpy as np
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# DEFINE CLASS HERE
+
+class _SnapshotRing:
+    """
+    The latest 'depth' snapshots of some columns: one 2-D (depth x stock) array per column used
+    as a ring buffer. recent(k) returns the last k rows in chronological order.
+    """
+    def __init__(self, columns: list, depth: int) -> None:
+        self.depth = max(depth, 1)
+        self.count = 0
+        self._head = 0
+        self.values = {column: np.full((self.depth, 0), np.nan) for column in columns}
+
+    def widen(self, n_stocks: int):
+        for column, array in self.values.items():
+            if array.shape[1] < n_stocks:
+                grown = np.full((self.depth, n_stocks), np.nan)
+                grown[:, :array.shape[1]] = array
+                self.values[column] = grown
+
+    def push(self, row: dict):
+        for column, array in self.values.items():
+            array[self._head] = row[column]
+        self._head = (self._head + 1) % self.depth
+        self.count = min(self.count + 1, self.depth)
+
+    def recent(self, column: str, k: int) -> np.ndarray:
+        k = min(k, self.count)
+        rows = (self._head - k + np.arange(k)) % self.depth
+        return self.values[column][rows]
+
+
+class _Wilder:
+    """
+    Wilder's smoothing of one (stock,) input per snapshot: a plain mean over the first 'period'
+    observations of every stock, then avg = (avg * (period - 1) + x) / period. NaN inputs leave
+    the state of that stock untouched.
+    """
+    def __init__(self, period: int) -> None:
+        self.period = period
+        self.avg = np.empty(0)
+        self.count = np.empty(0, dtype=np.int64)
+
+    def widen(self, n_stocks: int):
+        if self.avg.shape[0] < n_stocks:
+            extra = n_stocks - self.avg.shape[0]
+            self.avg = np.concatenate([self.avg, np.zeros(extra)])
+            self.count = np.concatenate([self.count, np.zeros(extra, dtype=np.int64)])
+
+    def update(self, x: np.ndarray):
+        valid = ~np.isnan(x)
+        count = self.count + valid
+        weight = np.minimum(count, self.period)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            updated = self.avg + (x - self.avg) / weight
+        self.avg = np.where(valid, updated, self.avg)
+        self.count = count
+
+
+class IndicatorEngine:
+    """
+    IndicatorEngine computes technical indicators for every stock at once from the stream of
+    quote snapshots, so they can be screened like any other column.
+
+    Each stock gets a fixed slot and every input column is held as a 2-D (time x stock) array of
+    the latest snapshots, so an indicator is a single NumPy reduction along the time axis instead
+    of a per-stock loop. Windowed indicators (moving average, z-score, rolling VWAP) only look at
+    the last 'period' snapshots; RSI and ATR keep Wilder-smoothed state and cost one vectorized
+    step per snapshot. Either way the work per snapshot does not grow with the length of the day.
+
+    Periods count snapshots, not minutes. StockDatabase only feeds snapshots of a full refresh of
+    the market: every pass without refresh tiers, and with tiers the pass completing a rotation
+    of the slowest tier. A period is thus one round over the market, e.g. 180 s with the default
+    'market' tier, and never a copy of a row the hot tier did not refresh. A stock missing from a
+    snapshot (suspended, failed fetch) simply contributes no observation.
+
+    Supported kinds:
+        ma (column, period): Mean of the last 'period' values.
+        zscore (column, period): (value - mean) / standard deviation over the last 'period' values.
+        vwap (period, amount, volume, scale): Volume-weighted average price. Without a period it is
+            the session VWAP amount / volume, with a period it uses the amount and volume traded
+            over the last 'period' snapshots. 'scale' converts the amount/volume units to a price.
+        rsi (column, period): Relative strength index of the snapshot-to-snapshot changes.
+        atr (period, close, high, low): Average true range between snapshots. A snapshot only has
+            the day high/low, so the range of an interval is the span of the two prices, widened
+            to the new day high/low if one was set within the interval.
+
+    Every kind accepts 'minPeriods', the number of observations needed before a value is
+    reported (NaN before that), by default the period.
+
+    Attributes:
+        specs (dict): Indicator name -> spec, as given in the 'indicators' entry of config.json.
+
+    Methods:
+        append(columns, timestamp): Feed a snapshot and update every indicator.
+        values(stock_codes): The latest indicator values, aligned to the given stock codes.
+    """
+    KINDS = ('ma', 'zscore', 'vwap', 'rsi', 'atr')
+
+    def __init__(self, specs: dict, keyword=r'stockCode') -> None:
+        self.specs = {}
+        for name, spec in specs.items():
+            spec = dict(spec)
+            if spec.get('kind') not in self.KINDS:
+                raise ValueError(f"Unknown indicator kind {spec.get('kind')} for {name}, expected one of {self.KINDS}")
+            if spec['kind'] == 'vwap':
+                spec.setdefault('amount', 'amount')
+                spec.setdefault('volume', 'volume')
+                spec.setdefault('scale', 1.0)
+            elif spec['kind'] == 'atr':
+                spec.setdefault('close', 'curr')
+                spec.setdefault('high', 'highest')
+                spec.setdefault('low', 'lowest')
+                spec.setdefault('period', 14)
+            else:
+                spec.setdefault('column', 'curr')
+                spec.setdefault('period', 14 if spec['kind'] == 'rsi' else 20)
+            spec.setdefault('minPeriods', spec.get('period') or 1)
+            self.specs[name] = spec
+        self._keyword = keyword
+        self.timestamp = None
+
+        inputs, depth = [], 2
+        for spec in self.specs.values():
+            for key in ('column', 'amount', 'volume', 'close', 'high', 'low'):
+                if key in spec and spec[key] not in inputs:
+                    inputs.append(spec[key])
+            if spec['kind'] in ('ma', 'zscore'):
+                depth = max(depth, spec['period'])
+            elif spec['kind'] == 'vwap' and spec.get('period'):
+                depth = max(depth, spec['period'] + 1)
+        self.inputs = inputs
+        self._ring = _SnapshotRing(inputs, depth)
+
+        # Wilder state: rsi -> (average gain, average loss), atr -> (average true range,)
+        self._smoothers = {name: tuple(_Wilder(spec['period']) for _ in range(2 if spec['kind'] == 'rsi' else 1))
+                           for name, spec in self.specs.items() if spec['kind'] in ('rsi', 'atr')}
+
+        # stock code -> slot, and the latest value of every indicator per slot
+        self._codes = []
+        self._slots = {}
+        self._values = {name: np.empty(0) for name in self.specs}
+
+    @classmethod
+    def from_config(cls, config: dict, keyword=r'stockCode'):
+        """
+        Build an indicator engine from the 'indicators' entry of config.json.
+
+        Args:
+            config (dict): Indicator name -> spec with a 'kind' key and an optional 'valid' flag.
+
+        Returns:
+            IndicatorEngine: The configured engine.
+        """
+        return cls({name: {key: value for key, value in spec.items() if key != 'valid'}
+                    for name, spec in config.items() if spec.get('valid', True)}, keyword=keyword)
+
+    @property
+    def names(self) -> list:
+        return list(self.specs.keys())
+
+    def _assign_slots(self, codes) -> np.ndarray:
+        for code in codes:
+            if code not in self._slots:
+                self._slots[code] = len(self._codes)
+                self._codes.append(code)
+        return np.fromiter((self._slots[code] for code in codes), dtype=np.intp, count=len(codes))
+
+    def append(self, columns, timestamp=None):
+        """
+        Feed a snapshot and update every indicator.
+
+        Args:
+            columns: A mapping of column name -> array with the keyword column and the input
+                     columns, e.g. the snapshot DataFrame.
+            timestamp (float): Unix time of the snapshot. Defaults to now.
+        """
+        self.timestamp = time.time() if timestamp is None else float(timestamp)
+        slots = self._assign_slots(np.asarray(columns[self._keyword]).tolist())
+        n_stocks = len(self._codes)
+
+        self._ring.widen(n_stocks)
+        row = {}
+        for column in self.inputs:
+            values = np.full(n_stocks, np.nan)
+            if column in columns:
+                # an input missing from the snapshot (e.g. an older snapshot file) stays NaN
+                values[slots] = np.asarray(columns[column], dtype=np.float64)
+            row[column] = values
+        previous = ({column: self._ring.recent(column, 1)[0] for column in self.inputs}
+                    if self._ring.count else None)
+        self._ring.push(row)
+
+        for name, spec in self.specs.items():
+            self._values[name] = getattr(self, f'_{spec["kind"]}')(name, spec, row, previous, n_stocks)
+
+    def values(self, stock_codes) -> dict:
+        """
+        Return the latest value of every indicator for the given stock codes.
+
+        Args:
+            stock_codes: Stock codes, e.g. the stockCode column of a snapshot.
+
+        Returns:
+            dict: Indicator name -> float array aligned to stock_codes, NaN for unknown stocks.
+        """
+        codes = np.asarray(stock_codes).tolist()
+        slots = np.fromiter((self._slots.get(code, -1) for code in codes), dtype=np.intp, count=len(codes))
+        known = slots >= 0
+        result = {}
+        for name, values in self._values.items():
+            gathered = np.full(len(codes), np.nan)
+            gathered[known] = values[slots[known]]
+            result[name] = gathered
+        return result
+
+    # ---------------------------------------------------------------------------------
+    # one method per indicator kind, each returning the new (stock,) values
+
+    def _window(self, spec: dict, column: str) -> tuple:
+        """The last 'period' values of a column with NaN-aware sums, shared by ma and zscore."""
+        window = self._ring.recent(column, spec['period'])
+        valid = ~np.isnan(window)
+        count = valid.sum(axis=0)
+        total = np.where(valid, window, 0.0).sum(axis=0)
+        return window, valid, count, total
+
+    def _ma(self, name: str, spec: dict, row: dict, previous, n_stocks: int) -> np.ndarray:
+        _, _, count, total = self._window(spec, spec['column'])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(count >= spec['minPeriods'], total / count, np.nan)
+
+    def _zscore(self, name: str, spec: dict, row: dict, previous, n_stocks: int) -> np.ndarray:
+        window, valid, count, total = self._window(spec, spec['column'])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+            deviation = np.where(valid, window - mean, 0.0)
+            std = np.sqrt((deviation ** 2).sum(axis=0) / count)
+            score = (row[spec['column']] - mean) / std
+        return np.where((count >= spec['minPeriods']) & (std > 0), score, np.nan)
+
+    def _vwap(self, name: str, spec: dict, row: dict, previous, n_stocks: int) -> np.ndarray:
+        amount, volume = row[spec['amount']], row[spec['volume']]
+        period = spec.get('period')
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if not period:
+                vwap = amount * spec['scale'] / volume
+                return np.where(volume > 0, vwap, np.nan)
+            # cumulative amount and volume, so the traded part of the window is newest - oldest
+            amounts = self._ring.recent(spec['amount'], period + 1)
+            volumes = self._ring.recent(spec['volume'], period + 1)
+            traded_amount = amount - amounts[0]
+            traded_volume = volume - volumes[0]
+            vwap = traded_amount * spec['scale'] / traded_volume
+        enough = self._ring.count > spec['minPeriods']
+        return np.where(enough & (traded_volume > 0), vwap, np.nan)
+
+    def _rsi(self, name: str, spec: dict, row: dict, previous, n_stocks: int) -> np.ndarray:
+        gains, losses = self._smoothers[name]
+        gains.widen(n_stocks)
+        losses.widen(n_stocks)
+        if previous is not None:
+            change = row[spec['column']] - previous[spec['column']]
+            gains.update(np.where(change > 0, change, np.where(np.isnan(change), np.nan, 0.0)))
+            losses.update(np.where(change < 0, -change, np.where(np.isnan(change), np.nan, 0.0)))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rsi = 100.0 - 100.0 / (1.0 + gains.avg / losses.avg)
+        # no losses at all: 100 if the price went up, 50 if it did not move
+        rsi = np.where(losses.avg == 0, np.where(gains.avg > 0, 100.0, 50.0), rsi)
+        return np.where(gains.count >= spec['minPeriods'], rsi, np.nan)
+
+    def _atr(self, name: str, spec: dict, row: dict, previous, n_stocks: int) -> np.ndarray:
+        (ranges,) = self._smoothers[name]
+        ranges.widen(n_stocks)
+        if previous is not None:
+            close, last_close = row[spec['close']], previous[spec['close']]
+            high = np.fmax(close, last_close)
+            low = np.fmin(close, last_close)
+            # a new day high (low) means the price got there within the interval
+            high = np.where(row[spec['high']] > previous[spec['high']], np.fmax(high, row[spec['high']]), high)
+            low = np.where(row[spec['low']] < previous[spec['low']], np.fmin(low, row[spec['low']]), low)
+            ranges.update(np.where(np.isnan(close) | np.isnan(last_close), np.nan, high - low))
+        return np.where(ranges.count >= spec['minPeriods'], ranges.avg, np.nan)
+
+# END OF CLASS DEFINITION
+#---------------------------------------------------------------------------------
+
+# END OF FILE
+#---------------------------------------------------------------------------------
@@ -0,0 +1,308 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: metrics.py
+# Description: timing spans, counters and histograms of the fetcher and the database, exported
+#              to a JSON-lines file or a Prometheus text endpoint
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import asyncio
+import json
+import os
+import time
+
+from bisect import bisect_left
+from datetime import datetime
+
+from aiohttp import web
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# DEFINE CLASS HERE
+
+class Histogram:
+    """
+    Histogram counts observations (seconds) in fixed buckets, like a Prometheus histogram.
+
+    The bucket bounds double from 10 us to about 84 s, so an observation costs one bisection
+    and the memory does not grow with the number of observations.
+
+    Attributes:
+        bounds (tuple): Upper bounds of the buckets, an overflow bucket follows the last one.
+        count (int): Number of observations.
+        sum (float): Sum of the observations.
+        max (float): Largest observation.
+    """
+    BOUNDS = tuple(1e-5 * 2 ** exponent for exponent in range(24))
+
+    def __init__(self, bounds=None) -> None:
+        self.bounds = tuple(bounds) if bounds is not None else self.BOUNDS
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile as the upper bound of the bucket it falls into."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else 0.0,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+            'max': self.max,
+        }
+
+
+class _Span:
+    __slots__ = ('_histogram', '_start')
+
+    def __init__(self, histogram: Histogram) -> None:
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._histogram.observe(time.perf_counter() - self._start)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+# handed out by a disabled registry, so an instrumented block costs one method call
+_null_span = _NullSpan()
+
+
+class MetricsRegistry:
+    """
+    MetricsRegistry collects timing spans and counters of the hot paths.
+
+    Instrumented code calls span(name) as a context manager, observe(name, seconds) for times it
+    measured itself and count(name). A disabled registry returns a shared no-op span and ignores
+    everything else, so the instrumentation stays in place at practically no cost.
+
+    Spans of the fetcher: fetch.pass, fetch.wait (waiting for a limiter slot), fetch.dns,
+    fetch.connect (new connections), fetch.request (request sent to body read), fetch.backoff,
+    fetch.decode, fetch.frame. Spans of the database: db.update, db.filter, db.alerts. Saving: save.write.
+    Counters: fetch.requests, fetch.retries, fetch.reused (kept-alive connections), fetch.blocks
+    (firewall pages and 403s) and fetch.failures.<reason> per pass.
+
+    Attributes:
+        enabled (bool): Whether anything is recorded.
+        histograms (dict): Span name -> Histogram.
+        counters (dict): Counter name -> value.
+
+    Methods:
+        span(name): Context manager timing a block into the histogram of name.
+        observe(name, seconds): Record a time measured by the caller.
+        count(name, value): Increase a counter.
+        snapshot(): All metrics as a JSON-serializable dictionary.
+        to_prometheus(): All metrics in the Prometheus text exposition format.
+    """
+    def __init__(self, enabled=True) -> None:
+        self.enabled = enabled
+        self.histograms = {}
+        self.counters = {}
+
+    @classmethod
+    def from_config(cls, config: dict):
+        """
+        Build a registry from the 'metrics' entry of config.json.
+
+        Args:
+            config (dict): A dictionary with an optional 'enabled' key, true by default.
+
+        Returns:
+            MetricsRegistry: The configured registry.
+        """
+        return cls(enabled=config.get('enabled', True))
+
+    def histogram(self, name: str) -> Histogram:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return histogram
+
+    def span(self, name: str):
+        if not self.enabled:
+            return _null_span
+        return _Span(self.histogram(name))
+
+    def observe(self, name: str, seconds: float):
+        if self.enabled:
+            self.histogram(name).observe(seconds)
+
+    def count(self, name: str, value=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def reset(self):
+        self.histograms.clear()
+        self.counters.clear()
+
+    def snapshot(self) -> dict:
+        return {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'counters': dict(self.counters),
+            'histograms': {name: histogram.summary() for name, histogram in self.histograms.items()},
+        }
+
+    def to_prometheus(self, prefix='stock') -> str:
+        """
+        Render all metrics in the Prometheus text format, a span 'fetch.wait' becomes the
+        histogram 'stock_fetch_wait_seconds' and a counter 'fetch.requests' 'stock_fetch_requests_total'.
+        """
+        lines = []
+        for name, value in sorted(self.counters.items()):
+            metric = f"{prefix}_{name.replace('.', '_')}_total"
+            lines.append(f'# TYPE {metric} counter')
+            lines.append(f'{metric} {value}')
+        for name, histogram in sorted(self.histograms.items()):
+            metric = f"{prefix}_{name.replace('.', '_')}_seconds"
+            lines.append(f'# TYPE {metric} histogram')
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, histogram.counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{le="{bound:.6g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {histogram.count}')
+            lines.append(f'{metric}_sum {histogram.sum:.9g}')
+            lines.append(f'{metric}_count {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> str:
+        """A table of all spans and counters for the console."""
+        rows = [f"{'span':<28}{'count':>8}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'total s':>10}"]
+        for name, histogram in sorted(self.histograms.items()):
+            stats = histogram.summary()
+            rows.append(f"{name:<28}{stats['count']:>8}{stats['mean'] * 1000:>10.2f}{stats['p50'] * 1000:>10.2f}"
+                        f"{stats['p99'] * 1000:>10.2f}{stats['max'] * 1000:>10.2f}{stats['sum']:>10.2f}")
+        for name, value in sorted(self.counters.items()):
+            rows.append(f'{name:<28}{value:>8}')
+        return '\n'.join(rows)
+
+
+class MetricsExporter:
+    """
+    MetricsExporter publishes a registry, as one JSON line per interval appended to a file
+    and/or as a Prometheus text endpoint served on localhost.
+
+    Attributes:
+        registry (MetricsRegistry): The metrics to publish.
+        path (str): The JSON-lines file, None for no file.
+        interval (float): Seconds between two lines of the file.
+        host (str), port (int): Address of the /metrics endpoint, no endpoint without a port.
+
+    Methods:
+        start(): Start the endpoint and the periodic writer.
+        stop(): Stop both, writing a last line.
+        write(): Append the current snapshot to the file.
+    """
+    def __init__(self, registry: MetricsRegistry, path=None, interval=60.0, host='127.0.0.1', port=None) -> None:
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self.host = host
+        self.port = port
+        self._task = None
+        self._runner = None
+
+    @classmethod
+    def from_config(cls, registry: MetricsRegistry, config: dict, base_dir='.'):
+        """
+        Build an exporter from the 'metrics' entry of config.json.
+
+        Args:
+            registry (MetricsRegistry): The metrics to publish.
+            config (dict): A dictionary with optional 'fileName', 'interval', 'host' and 'port' keys.
+            base_dir (str): Directory of the JSON-lines file.
+
+        Returns:
+            MetricsExporter: The configured exporter.
+        """
+        file_name = config.get('fileName')
+        return cls(registry, path=os.path.join(base_dir, file_name) if file_name else None,
+                   interval=config.get('interval', 60), host=config.get('host', '127.0.0.1'),
+                   port=config.get('port'))
+
+    def write(self):
+        if self.path is None:
+            return
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(self.registry.snapshot()) + '\n')
+
+    async def _handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.registry.to_prometheus(), content_type='text/plain', charset='utf-8')
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.write()
+
+    async def start(self):
+        if self.port is not None and self._runner is None:
+            app = web.Application()
+            app.router.add_get('/metrics', self._handle_metrics)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            await web.TCPSite(self._runner, self.host, self.port).start()
+        if self.path is not None and self._task is None:
+            self._task = asyncio.ensure_future(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self.write()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+# END OF CLASS DEFINITION
+#---------------------------------------------------------------------------------
+
+# END OF FILE
+#---------------------------------------------------------------------------------
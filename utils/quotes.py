@@ -0,0 +1,411 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: quotes.py
+# Description: decoding of quote payloads, optionally in a worker pool, and column-wise storage of the quotes
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import asyncio
+import json
+import re
+import sys
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from operator import itemgetter
+
+import numpy as np
+import pandas as pd
+
+# orjson decodes bytes straight into Python objects and is considerably faster than the
+# standard library, it is optional and json is used if it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .bars import MinuteBarStore
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# DEFINE GLOBAL VARIABLES HERE
+
+# the decoder used for all payloads, both raise a subclass of json.JSONDecodeError on bad input
+loads = orjson.loads if orjson is not None else json.loads
+
+# one quote per line in the answer of the batch endpoint: v_<code>="<fields separated by ~>";
+batch_line_pattern = re.compile(r'v_([a-z]{2}\d+)="([^"]*)"')
+
+# END OF GLOBAL VARIABLES' DEFINITION
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# DEFINE FUNCTIONS HERE
+
+def extract_quote(body: bytes, stock_code: str) -> list:
+    """
+    Decode only the 'qt' list of a stock from a raw mkline payload.
+
+    The quote is a flat list of strings, so it ends at the first ']' after its '['. Only that
+    slice is decoded and the kline block and the rest of the payload are skipped. If the slice
+    is not exactly the list (a ']' inside a string, an unexpected layout), decoding it fails and
+    the whole payload is decoded instead, so the result is always the same as a full decode.
+
+    Args:
+        body (bytes): The raw response body.
+        stock_code (str): Stock code with market prefix, e.g. 'sz000001'.
+
+    Returns:
+        list: The 'qt' list of the stock.
+
+    Raises:
+        KeyError, TypeError, json.JSONDecodeError: If the payload does not hold a quote for the stock.
+    """
+    key = f'"{stock_code}"'.encode()
+    qt = body.find(b'"qt"')
+    if qt >= 0:
+        pos = body.find(key, qt)
+        if pos >= 0:
+            pos += len(key)
+            start = body.find(b'[', pos)
+            # only a ':' and white space may stand between the key and the list
+            if start >= 0 and not body[pos:start].strip(b' \t\r\n:'):
+                end = body.find(b']', start)
+                try:
+                    quote = loads(body[start:end + 1])
+                    if isinstance(quote, list):
+                        return quote
+                except ValueError:
+                    pass
+    return loads(body)['data'][stock_code]['qt'][stock_code]
+
+
+def parse_quotes(items: list, indices: tuple, with_bars=False) -> tuple:
+    """
+    Decode a batch of raw mkline payloads, one job of the parse stage.
+
+    It runs in a worker of the pool, so failures are returned instead of raised, and the numeric
+    fields of the whole batch travel back to the event loop as one float array.
+
+    Args:
+        items (list): (stock code, raw body) pairs.
+        indices (tuple): Indexes of the fields of interest in the 'qt' list, name first.
+        with_bars (bool): Also parse the m1 bars of every payload.
+
+    Returns:
+        tuple: (names, (item x numeric column) float array, errors, bars). errors[i] is None or the
+               message of the failure of item i. bars[i] is None, the (times, values) returned by
+               MinuteBarStore.parse or the message of a broken bar list.
+    """
+    pick_fields = itemgetter(*indices)
+    names, errors, bars = [], [], []
+    numbers = np.full((len(items), len(indices) - 2), np.nan)
+    for row, (stock_code, body) in enumerate(items):
+        try:
+            if with_bars:
+                payload = loads(body)['data'][stock_code]
+                fields = pick_fields(payload['qt'][stock_code])
+            else:
+                fields = pick_fields(extract_quote(body, stock_code))
+            numbers[row] = fields[2:]
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            numbers[row] = np.nan
+            names.append(None)
+            errors.append(str(e))
+            bars.append(None)
+            continue
+        names.append(fields[0])
+        errors.append(None)
+
+        # a broken bar list does not spoil the quote
+        bar = None
+        if with_bars and payload.get('m1'):
+            try:
+                bar = MinuteBarStore.parse(payload['m1'])
+            except (IndexError, TypeError, ValueError) as e:
+                bar = str(e)
+        bars.append(bar)
+    return names, numbers, errors, bars
+
+
+def parse_batch_body(body: bytes, encoding: str, indices: tuple) -> tuple:
+    """
+    Decode the answer of the batch endpoint, e.g. 'v_sz000001="51~name~000001~...";' per code.
+
+    The '~'-separated fields use the same indexes as the 'qt' list of the single-code endpoint.
+    A line which cannot be converted is skipped and left to the single-code fallback.
+
+    Args:
+        body (bytes): The raw response body.
+        encoding (str): Encoding of the response.
+        indices (tuple): Indexes of the fields of interest, name first.
+
+    Returns:
+        tuple: (stock codes, names, (code x numeric column) float array) of the converted lines.
+    """
+    lines = batch_line_pattern.findall(body.decode(encoding, errors='replace'))
+    pick_fields = itemgetter(*indices)
+    codes, names = [], []
+    numbers = np.empty((len(lines), len(indices) - 2))
+    for stock_code, text in lines:
+        try:
+            fields = pick_fields(text.split('~'))
+            numbers[len(codes)] = fields[2:]
+        except (IndexError, ValueError):
+            continue
+        codes.append(stock_code)
+        names.append(fields[0])
+    return codes, names, numbers[:len(codes)]
+
+# END OF FUNCTION DEFINITION
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# DEFINE CLASS HERE
+
+class QuoteColumns:
+    """
+    QuoteColumns stores the latest quote row of every stock column-wise in preallocated arrays.
+
+    Every stock of the universe gets a fixed slot, the first column (name) is an object array
+    and all numeric columns share one 2-D (stock x column) float array. A quote is written into
+    its slot as it arrives, converting the text fields in a single NumPy assignment, so no
+    per-stock Python list is kept around and building the DataFrame is a masked copy of the
+    arrays. Rows come out in the order of the universe, whatever order the responses arrived in.
+
+    It behaves like the former stock code -> row dictionary: len(), 'in', iteration over the
+    stored codes, [] with rows [name, stockCode, value, ...] and clear().
+
+    Attributes:
+        columns (list): The column names, name first, stock code second, numeric columns after.
+
+    Methods:
+        put(stock_code, name, numbers): Write a quote into the slot of a stock.
+        frame(): The stored rows as a DataFrame.
+    """
+    def __init__(self, columns: list, stock_codes: list) -> None:
+        self.columns = list(columns)
+        n = len(stock_codes)
+        self._codes = np.empty(n, dtype=object)
+        self._codes[:] = list(stock_codes)
+        self._slots = {code: slot for slot, code in enumerate(stock_codes)}
+        self._names = np.empty(n, dtype=object)
+        self._numbers = np.full((n, len(self.columns) - 2), np.nan)
+        self._present = np.zeros(n, dtype=bool)
+        self._count = 0
+        # a failed conversion must not leave half a row behind, so values are converted here first
+        self._scratch = np.empty(len(self.columns) - 2)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, stock_code) -> bool:
+        slot = self._slots.get(stock_code)
+        return slot is not None and bool(self._present[slot])
+
+    def __iter__(self):
+        n = len(self._slots)
+        return iter(self._codes[:n][self._present[:n]].tolist())
+
+    def __getitem__(self, stock_code: str) -> list:
+        slot = self._slots.get(stock_code)
+        if slot is None or not self._present[slot]:
+            raise KeyError(stock_code)
+        return [self._names[slot], stock_code] + self._numbers[slot].tolist()
+
+    def __setitem__(self, stock_code: str, row: list):
+        self.put(stock_code, row[0], row[2:])
+
+    def _slot(self, stock_code: str) -> int:
+        slot = self._slots.get(stock_code)
+        if slot is not None:
+            return slot
+        # a code outside the universe, grow all arrays by doubling
+        slot = len(self._slots)
+        if slot >= self._codes.shape[0]:
+            capacity = max(2 * self._codes.shape[0], 16)
+            extra = capacity - self._codes.shape[0]
+            self._codes = np.concatenate([self._codes, np.empty(extra, dtype=object)])
+            self._names = np.concatenate([self._names, np.empty(extra, dtype=object)])
+            self._numbers = np.concatenate([self._numbers, np.full((extra, self._numbers.shape[1]), np.nan)])
+            self._present = np.concatenate([self._present, np.zeros(extra, dtype=bool)])
+        self._codes[slot] = stock_code
+        self._slots[stock_code] = slot
+        return slot
+
+    def put(self, stock_code: str, name: str, numbers):
+        """
+        Write a quote into the slot of a stock.
+
+        Args:
+            stock_code (str): Stock code with market prefix.
+            name (str): The stock name.
+            numbers: The numeric fields in column order, as strings or numbers.
+
+        Raises:
+            ValueError: If a field is not a number, the stored row is left untouched.
+        """
+        self._scratch[:] = numbers
+        slot = self._slot(stock_code)
+        self._numbers[slot] = self._scratch
+        self._names[slot] = name
+        if not self._present[slot]:
+            self._present[slot] = True
+            self._count += 1
+
+    def clear(self):
+        self._present[:] = False
+        self._count = 0
+
+    def frame(self) -> pd.DataFrame:
+        """Return the stored rows as a DataFrame, in the order of the universe."""
+        mask = self._present[:len(self._slots)]
+        df = pd.DataFrame(self._numbers[:len(self._slots)][mask], columns=self.columns[2:])
+        df.insert(0, self.columns[1], self._codes[:len(self._slots)][mask])
+        df.insert(0, self.columns[0], self._names[:len(self._slots)][mask])
+        return df
+
+
+class ParseStage:
+    """
+    ParseStage moves the decoding of mkline payloads off the event loop into a worker pool.
+
+    With many requests in flight, decoding and float conversion on the event loop thread cap the
+    throughput and delay the reads of other sockets. With a parse stage the fetch coroutines only
+    do I/O: they hand the raw bytes of a response to submit() and await the decoded quote.
+    Payloads submitted within one turn of the event loop (up to batch_size) go to the pool as one
+    job, so the round trip to a worker is paid per batch and not per stock. Jobs may finish in
+    any order, their results are still handed back in the order the payloads were submitted.
+
+    A process pool sidesteps the GIL. A thread pool only decodes in parallel on a free-threaded
+    build of Python, which is what mode 'auto' picks it for.
+
+    Attributes:
+        mode (str): 'process' or 'thread'.
+        workers (int): Number of workers of the pool.
+        batch_size (int): Maximum number of payloads per job.
+
+    Methods:
+        submit(stock_code, body): Queue one mkline payload, returns a future of the decoded quote.
+        run(func, *args): Run a function in the pool.
+        close(): Shut the pool down.
+    """
+    MODES = ('inline', 'thread', 'process', 'auto')
+
+    def __init__(self, indices: tuple, with_bars=False, mode='process', workers=2, batch_size=32) -> None:
+        if mode == 'auto':
+            mode = 'process' if getattr(sys, '_is_gil_enabled', lambda: True)() else 'thread'
+        if mode not in ('thread', 'process'):
+            raise ValueError(f"Unknown parse mode '{mode}', expected one of {', '.join(self.MODES)}.")
+        self.mode = mode
+        self.workers = workers
+        self.batch_size = batch_size
+        self._indices = tuple(indices)
+        self._with_bars = with_bars
+        self._pool = None
+        # (stock code, body, future) waiting for the next job
+        self._pending = []
+        self._flush_handle = None
+        # (job, items, futures) in submission order
+        self._jobs = deque()
+
+    @classmethod
+    def from_config(cls, config: dict, indices: tuple, with_bars=False):
+        """
+        Build a parse stage from the 'parse' entry of config.json.
+
+        Args:
+            config (dict): A dictionary with 'mode', 'workers' and 'batchSize' keys.
+            indices (tuple): Indexes of the fields of interest in the 'qt' list, name first.
+            with_bars (bool): Also parse the m1 bars of every payload.
+
+        Returns:
+            ParseStage: The configured stage, None for mode 'inline' (decoding on the event loop).
+        """
+        mode = config.get('mode', 'inline')
+        if mode == 'inline':
+            return None
+        return cls(indices, with_bars=with_bars, mode=mode, workers=config.get('workers', 2),
+                   batch_size=config.get('batchSize', 32))
+
+    def _executor(self):
+        if self._pool is None:
+            if self.mode == 'process':
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='parse')
+        return self._pool
+
+    def submit(self, stock_code: str, body: bytes) -> asyncio.Future:
+        """
+        Queue one mkline payload for decoding.
+
+        Returns:
+            asyncio.Future: Resolves to (name, numeric fields, error, bars) as described in parse_quotes.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((stock_code, body, future))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            # everything that arrives during this turn of the event loop joins the same job
+            self._flush_handle = loop.call_soon(self._flush)
+        return future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        items = [(stock_code, body) for stock_code, body, _ in pending]
+        job = asyncio.get_running_loop().run_in_executor(self._executor(), parse_quotes, items,
+                                                         self._indices, self._with_bars)
+        self._jobs.append((job, items, [future for _, _, future in pending]))
+        job.add_done_callback(self._deliver)
+
+    def _deliver(self, _):
+        # a finished job waits for the jobs submitted before it
+        while self._jobs and self._jobs[0][0].done():
+            job, items, futures = self._jobs.popleft()
+            if job.cancelled() or job.exception() is not None:
+                # a broken pool must not lose the responses, they are decoded right here instead
+                names, numbers, errors, bars = parse_quotes(items, self._indices, self._with_bars)
+            else:
+                names, numbers, errors, bars = job.result()
+            for idx, future in enumerate(futures):
+                if not future.done():
+                    future.set_result((names[idx], numbers[idx], errors[idx], bars[idx]))
+
+    async def run(self, func, *args):
+        """Run a function in the pool, it has to be picklable for a process pool."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor(), func, *args)
+
+    def close(self):
+        """Shut the pool down, a later submit starts a new one."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+# END OF CLASS DEFINITION
+#---------------------------------------------------------------------------------
+
+# END OF FILE
+#---------------------------------------------------------------------------------
@@ -0,0 +1,379 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: scheduler.py
+# Description: background polling of the market during trading sessions, in refresh tiers
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import asyncio
+import time
+
+from datetime import datetime, timedelta
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# DEFINE CLASS HERE
+
+class TradingCalendar:
+    """
+    TradingCalendar knows when the market is open: a list of daily sessions on trading weekdays,
+    minus holidays. Times are local wall-clock times, the same clock the snapshot names use.
+
+    Attributes:
+        sessions (list): (start, end) pairs of datetime.time, e.g. 09:30-11:30 and 13:00-15:00.
+        weekdays (set): Trading weekdays, Monday is 0.
+        holidays (set): Dates (datetime.date) on which the market stays closed.
+
+    Methods:
+        is_open(now): Check if the market is open at a given time.
+        next_open(now): The next time the market opens, now if it is open.
+    """
+    def __init__(self, sessions=(('09:30', '11:30'), ('13:00', '15:00')), weekdays=(0, 1, 2, 3, 4),
+                 holidays=()) -> None:
+        self.sessions = sorted((self._parse_time(start), self._parse_time(end)) for start, end in sessions)
+        self.weekdays = set(weekdays)
+        self.holidays = {datetime.strptime(day, '%Y-%m-%d').date() for day in holidays}
+
+    @classmethod
+    def from_config(cls, config: dict):
+        """
+        Build a calendar from the 'schedule' entry of config.json.
+
+        Args:
+            config (dict): A dictionary with optional 'sessions', 'weekdays' and 'holidays' keys.
+
+        Returns:
+            TradingCalendar: The configured calendar.
+        """
+        return cls(sessions=config.get('sessions', (('09:30', '11:30'), ('13:00', '15:00'))),
+                   weekdays=config.get('weekdays', (0, 1, 2, 3, 4)),
+                   holidays=config.get('holidays', ()))
+
+    @staticmethod
+    def _parse_time(text: str):
+        return datetime.strptime(text, '%H:%M').time()
+
+    def _is_trading_day(self, day) -> bool:
+        return day.weekday() in self.weekdays and day not in self.holidays
+
+    def is_open(self, now=None) -> bool:
+        now = now or datetime.now()
+        if not self._is_trading_day(now.date()):
+            return False
+        return any(start <= now.time() <= end for start, end in self.sessions)
+
+    def next_open(self, now=None):
+        """
+        Return the next time the market opens.
+
+        Args:
+            now (datetime): Reference time. Defaults to now.
+
+        Returns:
+            datetime: 'now' itself if the market is open, None if no session opens within two weeks.
+        """
+        now = now or datetime.now()
+        if self.is_open(now):
+            return now
+        for offset in range(15):
+            day = now.date() + timedelta(days=offset)
+            if not self._is_trading_day(day):
+                continue
+            for start, _ in self.sessions:
+                opening = datetime.combine(day, start)
+                if opening > now:
+                    return opening
+        return None
+
+
+class PollingScheduler:
+    """
+    PollingScheduler runs a refresh coroutine in the background at a fixed cadence while the
+    market is open, and sleeps until the next session while it is closed.
+
+    Polls are started on a fixed grid of 'interval' seconds. A refresh that takes longer than the
+    interval skips the missed slots instead of piling them up. Manual refreshes go through the
+    same lock (see run_exclusive), so a background and a manual refresh never overlap.
+
+    Attributes:
+        interval (float): Seconds between two polls during a session.
+        calendar (TradingCalendar): The trading sessions, polls outside of them are skipped.
+        last_run (float): Unix time at which the latest refresh finished, None before the first.
+        last_error (Exception): The exception raised by the latest refresh, None if it succeeded.
+        paused (bool): If True, scheduled polls are skipped until resume() is called.
+
+    Methods:
+        start(delay): Start polling in a background task, the first poll after 'delay' seconds.
+        stop(): Stop polling and wait for the background task to finish.
+        pause() / resume(): Temporarily stop and restart scheduled polls.
+        run_exclusive(coro_func): Run a refresh without overlapping the scheduled one.
+        status(): A one-line description of the scheduler state.
+    """
+    def __init__(self, refresh, interval=60, calendar=None, max_sleep=300) -> None:
+        self._refresh = refresh
+        self.interval = interval
+        self.calendar = calendar or TradingCalendar()
+        # sleeping while the market is closed is cut into slices of at most max_sleep seconds,
+        # so a changed system clock or a suspended machine does not skip the opening
+        self.max_sleep = max_sleep
+
+        self.last_run = None
+        self.last_error = None
+        self.paused = False
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    @classmethod
+    def from_config(cls, refresh, config: dict):
+        """
+        Build a scheduler from the 'schedule' entry of config.json.
+
+        Args:
+            refresh: A coroutine function called for every poll.
+            config (dict): A dictionary with 'interval' and the TradingCalendar keys.
+
+        Returns:
+            PollingScheduler: The configured scheduler.
+        """
+        return cls(refresh, interval=config.get('interval', 60), calendar=TradingCalendar.from_config(config),
+                   max_sleep=config.get('maxSleep', 300))
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, delay=0.0):
+        if not self.running:
+            self._task = asyncio.ensure_future(self._loop(delay))
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+
+    async def run_exclusive(self, coro_func, *args, **kwargs):
+        """Run coro_func(*args, **kwargs) while holding the refresh lock and return its result."""
+        async with self._lock:
+            return await coro_func(*args, **kwargs)
+
+    async def _poll(self):
+        try:
+            await self.run_exclusive(self._refresh)
+            self.last_error = None
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # a failing poll must not end the loop, the next slot simply tries again
+            self.last_error = e
+            print(f"Background refresh failed: {e}")
+        self.last_run = time.time()
+
+    async def _loop(self, delay: float):
+        loop = asyncio.get_running_loop()
+        await asyncio.sleep(delay)
+        next_slot = loop.time()
+        while True:
+            now = datetime.now()
+            if not self.calendar.is_open(now):
+                opening = self.calendar.next_open(now)
+                wait = self.max_sleep if opening is None else (opening - now).total_seconds()
+                await asyncio.sleep(min(max(wait, 0.0), self.max_sleep))
+                next_slot = loop.time()
+                continue
+
+            if not self.paused:
+                await self._poll()
+
+            # next slot on the fixed grid, skipping the slots a slow refresh ran over
+            next_slot += self.interval
+            behind = loop.time() - next_slot
+            if behind > 0:
+                next_slot += (behind // self.interval + 1) * self.interval
+            await asyncio.sleep(next_slot - loop.time())
+
+    def status(self) -> str:
+        if not self.running:
+            state = 'stopped'
+        elif self.paused:
+            state = 'paused'
+        elif self.calendar.is_open():
+            state = f'polling every {self.interval:g}s'
+        else:
+            opening = self.calendar.next_open()
+            state = 'market closed' + (f", next session at {opening.strftime('%Y-%m-%d %H:%M')}" if opening else '')
+        last = (f", last refresh at {datetime.fromtimestamp(self.last_run).strftime('%H:%M:%S')}"
+                if self.last_run else '')
+        error = f", last error: {self.last_error}" if self.last_error else ''
+        return f"Scheduler {state}{last}{error}"
+
+
+class RefreshTier:
+    """
+    A group of stock codes refreshed at the same cadence.
+
+    Attributes:
+        name (str): The tier name, e.g. 'hot'.
+        interval (float): Seconds within which every code of the tier is refreshed once.
+        codes (list): Stock codes pinned to this tier, e.g. a watchlist.
+        hits (bool): If True, recent filter hits belong to this tier as well.
+        rest (bool): If True, every code not claimed by a faster tier belongs to this tier.
+    """
+    def __init__(self, name: str, interval: float, codes=(), hits=False, rest=False) -> None:
+        self.name = name
+        self.interval = interval
+        self.codes = list(codes)
+        self.hits = hits
+        self.rest = rest
+
+
+class RefreshPlan:
+    """
+    RefreshPlan merges refresh tiers into a single stream of partial fetch passes.
+
+    The plan ticks at the interval of its fastest tier. A tier with a longer interval is cut into
+    interval / tick strided slices and contributes one slice per tick, so the slow tier is spread
+    evenly over its interval instead of arriving as one burst. Every code belongs to its fastest
+    tier only, so the codes of one tick are never fetched twice, and all of them go through one
+    fetch pass and thus one concurrency budget.
+
+    A slow tier works through the members it had when its rotation started. Slicing a list that
+    changes mid-rotation (a filter hit or a watch moving a code between tiers) would shift every
+    later code into another slice, skipping some codes and fetching others twice in one round.
+    A code that joins a faster tier mid-rotation is fetched there, one that leaves it is picked
+    up by the next rotation.
+
+    Filter hits are kept for 'hit_ttl' seconds, so the stocks a user is looking at right now are
+    refreshed at the pace of the tier that takes hits.
+
+    Attributes:
+        tiers (list): The RefreshTier objects, fastest first.
+        universe (list): All stock codes, in the order of stock_code.csv.
+        tick (float): Seconds between two ticks, the interval of the fastest tier.
+        hit_ttl (float): Seconds a filter hit stays in the hits tier.
+
+    Methods:
+        mark_hits(stock_codes): Put filter hits into the hits tier.
+        watch(stock_codes) / unwatch(stock_codes): Change the codes pinned to the fastest tier.
+        members(): Stock code list of every tier, by tier name.
+        due(): The stock codes to fetch at the next tick.
+        rotation_complete(): Check if the last due() finished a round over the slowest tier.
+    """
+    def __init__(self, tiers: list, universe: list, hit_ttl=300) -> None:
+        if not tiers:
+            raise ValueError("A refresh plan needs at least one tier.")
+        self.tiers = sorted(tiers, key=lambda tier: tier.interval)
+        self.universe = list(universe)
+        self.tick = self.tiers[0].interval
+        self.hit_ttl = hit_ttl
+        self._hits = {}
+        self._ticks = 0
+        # tier name -> members frozen at the start of the current rotation of that tier
+        self._rotation = {}
+
+    @classmethod
+    def from_config(cls, config: dict, universe: list):
+        """
+        Build a refresh plan from the 'tiers' entry of config.json.
+
+        Args:
+            config (dict): Tier name -> {'interval', 'codes', 'hits', 'rest', 'valid'} plus an
+                           optional 'hitTtl' entry.
+            universe (list): All stock codes.
+
+        Returns:
+            RefreshPlan: The configured plan.
+        """
+        tiers = [RefreshTier(name, tier['interval'], codes=tier.get('codes', ()), hits=tier.get('hits', False),
+                             rest=tier.get('rest', False))
+                 for name, tier in config.items() if isinstance(tier, dict) and tier.get('valid', True)]
+        return cls(tiers, universe, hit_ttl=config.get('hitTtl', 300))
+
+    def mark_hits(self, stock_codes, now=None):
+        now = time.time() if now is None else now
+        for code in stock_codes:
+            self._hits[code] = now
+
+    def watch(self, stock_codes):
+        for code in stock_codes:
+            if code not in self.tiers[0].codes:
+                self.tiers[0].codes.append(code)
+
+    def unwatch(self, stock_codes):
+        self.tiers[0].codes = [code for code in self.tiers[0].codes if code not in set(stock_codes)]
+
+    def members(self, now=None) -> dict:
+        """
+        Assign every stock code to its fastest tier.
+
+        Returns:
+            dict: Tier name -> list of stock codes.
+        """
+        now = time.time() if now is None else now
+        self._hits = {code: seen for code, seen in self._hits.items() if now - seen <= self.hit_ttl}
+
+        known = set(self.universe)
+        claimed = set()
+        members = {}
+        for tier in self.tiers:
+            codes = [code for code in tier.codes if code in known]
+            if tier.hits:
+                codes += [code for code in self._hits if code in known]
+            if tier.rest:
+                codes += self.universe
+            members[tier.name] = [code for code in dict.fromkeys(codes) if code not in claimed]
+            claimed.update(members[tier.name])
+        return members
+
+    def _slices(self, tier: RefreshTier) -> int:
+        return max(1, round(tier.interval / self.tick))
+
+    def due(self, now=None) -> list:
+        """
+        Return the stock codes to fetch at the next tick and advance the plan by one tick.
+
+        Returns:
+            list: Stock codes, the faster tiers first.
+        """
+        members = self.members(now)
+        codes = []
+        for tier in self.tiers:
+            slices = self._slices(tier)
+            phase = self._ticks % slices
+            if phase == 0 or tier.name not in self._rotation:
+                self._rotation[tier.name] = members[tier.name]
+            codes += self._rotation[tier.name][phase::slices]
+        self._ticks += 1
+        # a code promoted to a faster tier mid-rotation may still be in the slice of its old tier
+        return list(dict.fromkeys(codes))
+
+    def rotation_complete(self) -> bool:
+        """Check if the tick handed out by the last due() completed a round over the slowest tier."""
+        return self._ticks % self._slices(self.tiers[-1]) == 0
+
+# END OF CLASS DEFINITION
+#---------------------------------------------------------------------------------
+
+# END OF FILE
+#---------------------------------------------------------------------------------
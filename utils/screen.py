@@ -0,0 +1,558 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: screen.py
+# Description: a small screening language compiled into NumPy boolean masks
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import json
+import operator
+import re
+
+from collections import OrderedDict
+
+import numpy as np
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# DEFINE GLOBAL VARIABLES HERE
+
+# numbers, column names, `quoted column names` and operators
+_token_pattern = re.compile(r'''
+    \s*(?:
+        (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+      | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+      | `(?P<quoted>[^`]+)`
+      | (?P<op><=|>=|==|!=|<|>|\+|-|\*|/|\(|\)|&|\||~)
+    )''', re.VERBOSE)
+
+_comparisons = {
+    '<': operator.lt, '<=': operator.le, '>': operator.gt,
+    '>=': operator.ge, '==': operator.eq, '!=': operator.ne,
+}
+_arithmetic = {'+': operator.add, '-': operator.sub, '*': operator.mul, '/': operator.truediv}
+
+# the mirrored operator when the column is on the right hand side, e.g. '3 <= x' is 'x >= 3'
+_mirrored = {'<': '>', '<=': '>=', '>': '<', '>=': '<=', '==': '==', '!=': '!='}
+
+# END OF GLOBAL VARIABLES' DEFINITION
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# DEFINE CLASS HERE
+
+class ScreenSyntaxError(ValueError):
+    """Exception raised when a screen expression can not be parsed."""
+    pass
+
+
+class _Parser:
+    """
+    Recursive descent parser turning a screen expression into a tuple-based syntax tree.
+
+    The tree is made of nested tuples only, so equal sub-expressions compare and hash equal.
+    Chained comparisons are split into a conjunction of binary ones ('3 <= x <= 5' becomes
+    '3 <= x and x <= 5') and nested conjunctions/disjunctions are flattened.
+
+    Grammar, from the lowest to the highest precedence:
+        or     := and (('or' | '|') and)*
+        and    := not (('and' | '&') not)*
+        not    := ('not' | '~') not | compare
+        compare:= sum (('<' | '<=' | '>' | '>=' | '==' | '!=') sum)*    chained like Python
+        sum    := product (('+' | '-') product)*
+        product:= unary (('*' | '/') unary)*
+        unary  := '-' unary | atom
+        atom   := number | name | `quoted name` | '(' or ')'
+    """
+    def __init__(self, expression: str) -> None:
+        self.expression = expression
+        self.tokens = self._tokenize(expression)
+        self.pos = 0
+
+    def _tokenize(self, expression: str) -> list:
+        tokens, pos = [], 0
+        expression = expression.rstrip()
+        while pos < len(expression):
+            match = _token_pattern.match(expression, pos)
+            if match is None or match.end() == pos:
+                raise ScreenSyntaxError(f"Unexpected character at {pos} in screen: {expression}")
+            kind = match.lastgroup
+            value = match.group(kind)
+            if kind == 'name' and value.lower() in ('and', 'or', 'not'):
+                kind, value = 'op', value.lower()
+            elif kind == 'quoted':
+                kind = 'name'
+            tokens.append((kind, value))
+            pos = match.end()
+        return tokens
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def _accept(self, *ops) -> str:
+        kind, value = self._peek()
+        if kind == 'op' and value in ops:
+            self.pos += 1
+            return value
+        return None
+
+    def parse(self) -> tuple:
+        node = self._or()
+        if self.pos != len(self.tokens):
+            raise ScreenSyntaxError(f"Unexpected token '{self._peek()[1]}' in screen: {self.expression}")
+        return node
+
+    @staticmethod
+    def _flatten(kind: str, nodes: list):
+        flat = []
+        for node in nodes:
+            flat.extend(node[1] if node[0] == kind else (node,))
+        return flat[0] if len(flat) == 1 else (kind, tuple(flat))
+
+    def _or(self):
+        nodes = [self._and()]
+        while self._accept('or', '|'):
+            nodes.append(self._and())
+        return self._flatten('or', nodes)
+
+    def _and(self):
+        nodes = [self._not()]
+        while self._accept('and', '&'):
+            nodes.append(self._not())
+        return self._flatten('and', nodes)
+
+    def _not(self):
+        if self._accept('not', '~'):
+            return ('not', self._not())
+        return self._compare()
+
+    def _compare(self):
+        operands, ops = [self._sum()], []
+        while True:
+            op = self._accept(*_comparisons)
+            if op is None:
+                break
+            ops.append(op)
+            operands.append(self._sum())
+        if not ops:
+            return operands[0]
+        return self._flatten('and', [('cmp', op, left, right) for op, left, right in zip(ops, operands, operands[1:])])
+
+    def _sum(self):
+        node = self._product()
+        while True:
+            op = self._accept('+', '-')
+            if op is None:
+                return node
+            node = ('arith', op, node, self._product())
+
+    def _product(self):
+        node = self._unary()
+        while True:
+            op = self._accept('*', '/')
+            if op is None:
+                return node
+            node = ('arith', op, node, self._unary())
+
+    def _unary(self):
+        if self._accept('-'):
+            return ('neg', self._unary())
+        return self._atom()
+
+    def _atom(self):
+        kind, value = self._peek()
+        if kind == 'number':
+            self.pos += 1
+            return ('num', float(value))
+        if kind == 'name':
+            self.pos += 1
+            return ('col', value)
+        if self._accept('('):
+            node = self._or()
+            if not self._accept(')'):
+                raise ScreenSyntaxError(f"Missing ')' in screen: {self.expression}")
+            return node
+        raise ScreenSyntaxError(f"Unexpected end of screen: {self.expression}" if kind is None
+                                else f"Unexpected token '{value}' in screen: {self.expression}")
+
+
+class Screen:
+    """
+    Screen is a compiled screening expression, e.g. '3 <= increase <= 5 and curr > open'.
+
+    The expression is parsed once into a tree of small closures over NumPy operations. Evaluating
+    it takes a mapping of column name -> array and returns a boolean mask, so a screen costs a
+    handful of vectorized operations over the column arrays and never re-parses any text.
+    Unknown columns and operands of the wrong type (e.g. arithmetic on a text column) raise
+    ValueError when the screen is evaluated.
+
+    Supported are numbers, column names (`back-quoted` for names that are not identifiers),
+    + - * /, chained comparisons, and/or/not (or &, |, ~) and parentheses. As with
+    DataFrame.query, a comparison involving NaN is False.
+
+    Attributes:
+        expression (str): The source expression.
+        tree (tuple): The syntax tree, None for an empty screen.
+        columns (set): The columns referenced by the expression.
+        bounds (dict): Column -> (lower, upper) for range conditions every match must satisfy,
+                       usable to narrow down candidates through a sorted index.
+
+    Methods:
+        mask(columns): Evaluate the screen and return a boolean mask.
+        from_thresholds(thresholds): Build a screen from the 'thre' section of config.json.
+    """
+    def __init__(self, expression: str) -> None:
+        self.expression = expression.strip()
+        self.columns = set()
+        if self.expression:
+            self.tree = _Parser(self.expression).parse()
+            self._func = self._compile(self.tree)
+            self.bounds = self._bounds(self.tree)
+        else:
+            # an empty screen matches everything
+            self.tree = None
+            self._func = None
+            self.bounds = {}
+
+    def __repr__(self) -> str:
+        return f"Screen({self.expression!r})"
+
+    @classmethod
+    def from_thresholds(cls, thresholds: dict):
+        """
+        Build a screen from the 'thre' section of config.json, combining all entries with 'and'.
+
+        An entry is either a range {'lower': 3, 'upper': 5} on the column named by its key,
+        or an expression {'expr': 'curr > open'} whose key is just a label.
+
+        Args:
+            thresholds (dict): The (valid) threshold entries.
+
+        Returns:
+            Screen: The compiled screen.
+        """
+        return cls(' and '.join(f"({part})" for part in thresholds_to_expressions(thresholds)))
+
+    def _compile(self, node):
+        kind = node[0]
+        if kind == 'num':
+            value = node[1]
+            return lambda columns: value
+        if kind == 'col':
+            name = node[1]
+            self.columns.add(name)
+            return lambda columns: columns[name]
+        if kind == 'neg':
+            inner = self._compile(node[1])
+            return lambda columns: np.negative(inner(columns))
+        if kind == 'arith':
+            func, left, right = _arithmetic[node[1]], self._compile(node[2]), self._compile(node[3])
+            return lambda columns: func(left(columns), right(columns))
+        if kind == 'not':
+            inner = self._compile(node[1])
+            return lambda columns: np.logical_not(inner(columns))
+        if kind in ('and', 'or'):
+            func = np.logical_and if kind == 'and' else np.logical_or
+            parts = [self._compile(child) for child in node[1]]
+            first, rest = parts[0], parts[1:]
+
+            def combine(columns):
+                result = first(columns)
+                for part in rest:
+                    result = func(result, part(columns))
+                return result
+            return combine
+        if kind == 'cmp':
+            func, left, right = _comparisons[node[1]], self._compile(node[2]), self._compile(node[3])
+            return lambda columns: func(left(columns), right(columns))
+        raise ScreenSyntaxError(f"Unknown node {kind}")
+
+    @staticmethod
+    def _bounds(tree) -> dict:
+        """Collect 'column op number' conditions of the top-level conjunction as inclusive bounds."""
+        bounds = {}
+        conjuncts = tree[1] if tree[0] == 'and' else (tree,)
+        for node in conjuncts:
+            if node[0] != 'cmp':
+                continue
+            op, left, right = node[1:]
+            if left[0] == 'num' and right[0] == 'col':
+                op, left, right = _mirrored[op], right, left
+            if left[0] != 'col' or right[0] != 'num':
+                continue
+            lower, upper = bounds.get(left[1], (float('-inf'), float('inf')))
+            if op in ('>', '>=', '=='):
+                lower = max(lower, right[1])
+            if op in ('<', '<=', '=='):
+                upper = min(upper, right[1])
+            bounds[left[1]] = (lower, upper)
+        return bounds
+
+    def mask(self, columns) -> np.ndarray:
+        """
+        Evaluate the screen.
+
+        Args:
+            columns: A mapping of column name -> array, e.g. a dict of NumPy arrays or a DataFrame.
+
+        Returns:
+            np.ndarray: A boolean mask, True for the rows matching the screen.
+        """
+        if self._func is None:
+            return None
+        try:
+            result = self._func(columns)
+        except KeyError as e:
+            raise ValueError(f"Unknown column {e} in screen: {self.expression}") from None
+        except TypeError as e:
+            # e.g. arithmetic on a text column, the screen is wrong, not the data
+            raise ValueError(f"Invalid operands in screen: {self.expression} ({e})") from None
+        return _broadcast(result, columns)
+
+
+class ScreenBatch:
+    """
+    ScreenBatch evaluates many named screens (profiles) in a single sweep over the columns.
+
+    All screens are merged into one graph of unique sub-expressions. Since syntax trees are
+    tuples and chained comparisons are split into binary ones, a condition such as
+    'turnOver <= 10' that appears in several profiles is a single node and computed only once
+    per evaluation, as are shared column reads and arithmetic.
+
+    Attributes:
+        names (list): The profile names, in order.
+
+    Methods:
+        masks(columns): Evaluate every profile and return name -> boolean mask.
+        match(columns, keys): Return key -> matched profile names for matching rows only.
+        group(masks, keys): Same as match, for masks which were computed before.
+        from_profiles(profiles): Build a batch from the 'profiles' section of config.json.
+    """
+    def __init__(self, screens: dict) -> None:
+        self.names = list(screens.keys())
+        self.columns = set()
+
+        # unique nodes in evaluation order (children before parents)
+        self._nodes = []
+        self._node_ids = {}
+        self._roots = {}
+        for name, screen in screens.items():
+            screen = compile_screen(screen)
+            self.columns |= screen.columns
+            self._roots[name] = None if screen.tree is None else self._add(screen.tree)
+
+    @classmethod
+    def from_profiles(cls, profiles: dict):
+        """
+        Build a batch from the 'profiles' section of config.json.
+
+        Args:
+            profiles (dict): Profile name -> {'screens': {<thre-style entries>}, 'valid': ..}.
+                             Entries inside a profile are filtered by their own 'valid' flag.
+
+        Returns:
+            ScreenBatch: The compiled batch.
+        """
+        return cls({name: {metric: condition for metric, condition in profile.get('screens', {}).items()
+                           if condition.get('valid', True)}
+                    for name, profile in profiles.items()})
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def _add(self, node) -> int:
+        if node in self._node_ids:
+            return self._node_ids[node]
+
+        kind = node[0]
+        if kind in ('num', 'col'):
+            children = ()
+        elif kind in ('neg', 'not'):
+            children = (self._add(node[1]),)
+        elif kind in ('and', 'or'):
+            children = tuple(self._add(child) for child in node[1])
+        else:
+            # 'arith' and 'cmp' carry an operator followed by two operands
+            children = (self._add(node[2]), self._add(node[3]))
+
+        self._node_ids[node] = len(self._nodes)
+        self._nodes.append((kind, node[1], children))
+        return self._node_ids[node]
+
+    def masks(self, columns) -> dict:
+        """
+        Evaluate every profile.
+
+        Args:
+            columns: A mapping of column name -> array.
+
+        Returns:
+            dict: Profile name -> boolean mask, None for an empty profile (matches everything).
+        """
+        values = [None] * len(self._nodes)
+        try:
+            for idx, (kind, payload, children) in enumerate(self._nodes):
+                if kind == 'num':
+                    values[idx] = payload
+                elif kind == 'col':
+                    values[idx] = columns[payload]
+                elif kind == 'neg':
+                    values[idx] = np.negative(values[children[0]])
+                elif kind == 'not':
+                    values[idx] = np.logical_not(values[children[0]])
+                elif kind in ('and', 'or'):
+                    func = np.logical_and if kind == 'and' else np.logical_or
+                    result = values[children[0]]
+                    for child in children[1:]:
+                        result = func(result, values[child])
+                    values[idx] = result
+                elif kind == 'arith':
+                    values[idx] = _arithmetic[payload](values[children[0]], values[children[1]])
+                else:
+                    values[idx] = _comparisons[payload](values[children[0]], values[children[1]])
+        except KeyError as e:
+            raise ValueError(f"Unknown column {e} in screen profiles") from None
+        except TypeError as e:
+            raise ValueError(f"Invalid operands in screen profiles ({e})") from None
+
+        return {name: (None if root is None else _broadcast(values[root], columns))
+                for name, root in self._roots.items()}
+
+    def match(self, columns, keys) -> dict:
+        """
+        Evaluate every profile and group the matches by row.
+
+        Args:
+            columns: A mapping of column name -> array.
+            keys: An array with one key (usually the stock code) per row.
+
+        Returns:
+            dict: Key -> tuple of matched profile names, only for rows matching at least one profile.
+        """
+        return self.group(self.masks(columns), keys)
+
+    @staticmethod
+    def group(masks: dict, keys) -> dict:
+        """
+        Group precomputed profile masks by row.
+
+        Args:
+            masks (dict): Profile name -> boolean mask (None matches every row), as returned by masks().
+            keys: An array with one key (usually the stock code) per row.
+
+        Returns:
+            dict: Key -> tuple of matched profile names, only for rows matching at least one profile.
+        """
+        keys = np.asarray(keys)
+        if not masks:
+            return {}
+        names = list(masks.keys())
+        matrix = np.vstack([np.ones(keys.shape[0], dtype=bool) if mask is None else mask for mask in masks.values()])
+        rows = np.flatnonzero(matrix.any(axis=0))
+
+        # rows matching the same set of profiles share one bit pattern, so names are only
+        # looked up once per distinct pattern instead of once per row
+        if len(names) <= 64:
+            weights = np.left_shift(np.uint64(1), np.arange(len(names), dtype=np.uint64))
+            patterns = weights @ matrix[:, rows].astype(np.uint64)
+            unique, inverse = np.unique(patterns, return_inverse=True)
+            labels = [tuple(name for bit, name in enumerate(names) if int(pattern) >> bit & 1) for pattern in unique]
+        else:
+            patterns = np.packbits(matrix[:, rows], axis=0).T
+            unique, inverse = np.unique(patterns, axis=0, return_inverse=True)
+            labels = [tuple(names[i] for i in np.flatnonzero(np.unpackbits(pattern)[:len(names)])) for pattern in unique]
+        return dict(zip(keys[rows].tolist(), [labels[i] for i in inverse.ravel().tolist()]))
+
+# END OF CLASS DEFINITION
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# DEFINE FUNCTIONS HERE
+
+def _broadcast(result, columns) -> np.ndarray:
+    """The result of a screen as a boolean mask, a constant (e.g. '1 > 2') repeated for every row."""
+    result = np.asarray(result, dtype=bool)
+    if result.ndim == 0:
+        n_rows = len(columns[next(iter(columns))]) if len(columns) else 0
+        result = np.full(n_rows, bool(result))
+    return result
+
+
+def _quote(column: str) -> str:
+    return column if re.fullmatch(r'[A-Za-z_][A-Za-z0-9_]*', column) else f"`{column}`"
+
+
+def thresholds_to_expressions(thresholds: dict) -> list:
+    """
+    Turn threshold entries from config.json into screen expressions, one per entry.
+
+    Args:
+        thresholds (dict): Entries of the form {'lower': .., 'upper': ..} or {'expr': ..}.
+
+    Returns:
+        list: The expressions, entries without any condition are skipped.
+    """
+    expressions = []
+    for metric, condition in thresholds.items():
+        if 'expr' in condition:
+            expressions.append(condition['expr'])
+            continue
+        parts = []
+        if 'lower' in condition:
+            parts.append(f"{condition['lower']} <= ")
+        parts.append(_quote(metric))
+        if 'upper' in condition:
+            parts.append(f" <= {condition['upper']}")
+        if len(parts) > 1:
+            expressions.append(''.join(parts))
+    return expressions
+
+
+# expression or thresholds -> Screen, least recently used first
+_screen_cache = OrderedDict()
+_screen_cache_size = 256
+
+
+def compile_screen(screen, cache=True):
+    """
+    Return a compiled Screen for an expression string or a thresholds dict, compiling each only once.
+
+    Args:
+        screen: A Screen, an expression string or a thresholds dict from config.json.
+        cache (bool): Keep the compiled screen for the next call. Ad-hoc expressions (e.g. queries
+                      of the query server) are compiled without pushing the screens of config.json
+                      out of the cache.
+
+    Returns:
+        Screen: The compiled screen.
+    """
+    if isinstance(screen, Screen):
+        return screen
+    key = screen if isinstance(screen, str) else json.dumps(screen, sort_keys=True)
+    compiled = _screen_cache.get(key)
+    if compiled is not None:
+        _screen_cache.move_to_end(key)
+        return compiled
+    compiled = Screen(screen) if isinstance(screen, str) else Screen.from_thresholds(screen)
+    if cache:
+        _screen_cache[key] = compiled
+        if len(_screen_cache) > _screen_cache_size:
+            _screen_cache.popitem(last=False)
+    return compiled
+
+# END OF FUNCTION DEFINITION
+#---------------------------------------------------------------------------------
+
+# END OF FILE
+#---------------------------------------------------------------------------------
@@ -0,0 +1,235 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: server.py
+# Description: read-only HTTP query API over the in-memory StockDatabase, so other scripts share
+#              one fetcher instead of polling the quote endpoint themselves
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import gzip
+import hashlib
+import json
+import math
+
+from collections import OrderedDict
+from datetime import datetime
+
+from aiohttp import web
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# DEFINE CLASS HERE
+
+class QueryError(ValueError):
+    """Exception raised for a query that can not be answered, reported as HTTP 400."""
+    pass
+
+
+class QueryServer:
+    """
+    QueryServer answers read-only queries against one StockDatabase over HTTP, on the event loop
+    the fetcher runs on, so every consumer sees the latest refresh without fetching anything.
+
+    Endpoints (GET, JSON):
+        /status                              Version, update time and size of the snapshot.
+        /snapshot?codes=sh600000,sz000001    Rows of the given stocks, all rows without codes.
+        /filter?expr=increase > 3            Stock codes matching a screen expression, the
+                                             configured thresholds without expr.
+        /history/{code}/{column}?start=&end= One column of one stock over time (unix times).
+        /delta                               The stocks changed by the latest refresh.
+
+    Responses are cached per path and query until the next refresh (StockDatabase.version), so a
+    query asked by many consumers is computed and serialized once. Every response carries an
+    ETag, a request with a matching If-None-Match is answered with 304 and no body. Bodies larger
+    than min_compress bytes are gzip-compressed (once per cache entry) for clients accepting it.
+
+    Attributes:
+        db (StockDatabase): The database queried.
+        thresholds (dict): The screen of /filter without an expression.
+        host (str), port (int): The address served.
+        cache_size (int): Responses kept per snapshot version.
+        min_compress (int): Smallest body in bytes worth compressing.
+
+    Methods:
+        start(): Start serving.
+        stop(): Stop serving.
+    """
+    def __init__(self, db, thresholds=None, host='127.0.0.1', port=9120, cache_size=256, min_compress=1024) -> None:
+        self.db = db
+        self.thresholds = thresholds or {}
+        self.host = host
+        self.port = port
+        self.cache_size = cache_size
+        self.min_compress = min_compress
+        # (path, query) -> [etag, body, gzipped body or None], for the snapshot version _cache_version
+        self._cache = OrderedDict()
+        self._cache_version = None
+        self._runner = None
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, db, config: dict, thresholds=None):
+        """
+        Build a query server from the 'server' entry of config.json.
+
+        Args:
+            db (StockDatabase): The database queried.
+            config (dict): A dictionary with optional 'host', 'port', 'cacheSize' and 'minCompress' keys.
+            thresholds (dict): The screen of /filter without an expression.
+
+        Returns:
+            QueryServer: The configured server.
+        """
+        return cls(db, thresholds=thresholds, host=config.get('host', '127.0.0.1'), port=config.get('port', 9120),
+                   cache_size=config.get('cacheSize', 256), min_compress=config.get('minCompress', 1024))
+
+    @property
+    def url(self) -> str:
+        return f'http://{self.host}:{self.port}'
+
+    def status(self) -> str:
+        total = self.hits + self.misses
+        return (f"Query server on {self.url}, {len(self._cache)} cached responses, "
+                f"{self.hits}/{total} cache hits")
+
+    # QUERIES, each returns a JSON-serializable object
+
+    def _status(self, request: web.Request):
+        return {
+            'version': self.db.version,
+            'updatedAt': datetime.fromtimestamp(self.db.updated_at).isoformat(timespec='seconds'),
+            'stocks': len(self.db.raw_data),
+            'columns': self.db.raw_data.columns.tolist(),
+        }
+
+    def _snapshot(self, request: web.Request):
+        codes = request.query.get('codes')
+        df = self.db.raw_data if codes is None else self.db.lookup([code for code in codes.split(',') if code])
+        return _records(df)
+
+    def _filter(self, request: web.Request):
+        expression = request.query.get('expr')
+        try:
+            # any client can send any expression, only the configured screen is kept in the caches
+            if not expression:
+                return self.db.filter_stocks(self.thresholds)
+            return self.db.filter_stocks(expression, cache=False)
+        except ValueError as e:
+            # syntax errors, unknown columns and operands of the wrong type
+            raise QueryError(str(e))
+
+    def _history(self, request: web.Request):
+        if self.db.history is None:
+            raise QueryError("History is disabled in config.json")
+        try:
+            start = float(request.query.get('start', '-inf'))
+            end = float(request.query.get('end', 'inf'))
+        except ValueError:
+            raise QueryError("start and end must be unix times")
+        code, column = request.match_info['code'], request.match_info['column']
+        if column not in self.db.history.columns:
+            raise QueryError(f"Column {column} is not recorded")
+        series = self.db.history.series(code, column, start, end)
+        return {'stockCode': code, 'column': column,
+                'times': [timestamp.isoformat(timespec='seconds') for timestamp in series.index],
+                'values': [_value(value) for value in series.tolist()]}
+
+    def _delta(self, request: web.Request):
+        delta = self.db.last_delta
+        if delta is None:
+            return {'changed': [], 'appeared': [], 'vanished': []}
+        return {'changed': delta.changed, 'appeared': delta.appeared, 'vanished': delta.vanished}
+
+    # HTTP
+
+    def _cached(self, key: tuple, query, request: web.Request) -> list:
+        """The cached [etag, body, gzipped body] of a query, answered and serialized on a miss."""
+        if self._cache_version != self.db.version:
+            # a refresh makes every cached response stale
+            self._cache.clear()
+            self._cache_version = self.db.version
+        entry = self._cache.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return entry
+        self.misses += 1
+        body = json.dumps(query(request), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        # the snapshot version is part of the tag, so a tag is never reused for another snapshot
+        etag = f'"{self.db.version}-{hashlib.sha1(body).hexdigest()[:16]}"'
+        entry = self._cache[key] = [etag, body, None]
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return entry
+
+    def _handler(self, query):
+        async def handle(request: web.Request) -> web.Response:
+            key = (request.path, request.query_string)
+            try:
+                entry = self._cached(key, query, request)
+            except QueryError as e:
+                return web.json_response({'error': str(e)}, status=400)
+            etag, body, _ = entry
+            headers = {'ETag': etag, 'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+            if etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]:
+                return web.Response(status=304, headers=headers)
+            if len(body) >= self.min_compress and 'gzip' in request.headers.get('Accept-Encoding', ''):
+                if entry[2] is None:
+                    entry[2] = gzip.compress(body, compresslevel=5)
+                headers['Content-Encoding'] = 'gzip'
+                body = entry[2]
+            return web.Response(body=body, headers=headers, content_type='application/json', charset='utf-8')
+        return handle
+
+    async def start(self):
+        if self._runner is not None:
+            return
+        app = web.Application()
+        app.router.add_get('/status', self._handler(self._status))
+        app.router.add_get('/snapshot', self._handler(self._snapshot))
+        app.router.add_get('/filter', self._handler(self._filter))
+        app.router.add_get('/history/{code}/{column}', self._handler(self._history))
+        app.router.add_get('/delta', self._handler(self._delta))
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+# END OF CLASS DEFINITION
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# DEFINE FUNCTIONS HERE
+
+def _records(df) -> list:
+    """The rows of a DataFrame as a list of dictionaries, NaN as null."""
+    columns = df.columns.tolist()
+    return [{column: _value(value) for column, value in zip(columns, row)}
+            for row in df.itertuples(index=False, name=None)]
+
+
+def _value(value):
+    """A cell as a JSON value, NaN (a missing value) as null."""
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+# END OF FUNCTION DEFINITION
+#---------------------------------------------------------------------------------
+
+# END OF FILE
+#---------------------------------------------------------------------------------
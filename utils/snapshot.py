@@ -0,0 +1,226 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: snapshot.py
+# Description: storage backends for the raw data snapshots saved under raw_data/
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import json
+import os
+import shutil
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# DEFINE CLASS HERE
+
+class CsvSnapshotBackend:
+    """
+    CsvSnapshotBackend stores a snapshot as a single utf-8-sig CSV file, the original format.
+
+    Methods:
+        save(df, save_dir, stamp): Write a snapshot and return its path.
+        load(path): Read a snapshot back into a DataFrame.
+    """
+    name = 'csv'
+    suffix = '_raw.csv'
+
+    def save(self, df: pd.DataFrame, save_dir: str, stamp: str) -> str:
+        save_path = os.path.join(save_dir, f"{stamp}{self.suffix}")
+        df.to_csv(save_path, index=False, encoding='utf-8-sig')
+        return save_path
+
+    def load(self, path: str) -> pd.DataFrame:
+        return pd.read_csv(path)
+
+
+class NpySnapshotBackend:
+    """
+    NpySnapshotBackend stores a snapshot as a directory with one .npy file per column.
+
+    Numeric columns are stored as float64 (or float32, if configured), text columns such as
+    stockCode and stockName as fixed-width unicode ('U') arrays as wide as their longest value.
+    load_columns() opens every column with np.load(mmap_mode='r'), which maps the files into
+    memory instead of reading them, so it takes the same time for any number of rows.
+    load() hands the numeric maps to the DataFrame with copy=False and without consolidating
+    them, so the numeric columns of the frame are views of the files. Only the text columns
+    are turned into Python strings, by one numpy cast instead of a loop over the values.
+    A 'schema.json' file keeps the column order and dtypes, so the dtypes survive a round trip.
+    Snapshots of earlier versions stored text as fixed-width UTF-8 bytes or as JSON arrays,
+    those still load.
+
+    Attributes:
+        float_dtype (str): dtype of the numeric columns, 'float64' or 'float32'.
+
+    Methods:
+        save(df, save_dir, stamp): Write a snapshot and return its path.
+        load_columns(path): Open the columns as memory-mapped arrays.
+        load(path): Read a snapshot back into a DataFrame.
+    """
+    name = 'npy'
+    suffix = '_raw.columns'
+    schema_file = 'schema.json'
+    # schema dtype of the text columns an earlier version stored as JSON arrays
+    json_text_dtype = 'str'
+
+    def __init__(self, float_dtype='float64') -> None:
+        self.float_dtype = np.dtype(float_dtype)
+
+    def save(self, df: pd.DataFrame, save_dir: str, stamp: str) -> str:
+        save_path = os.path.join(save_dir, f"{stamp}{self.suffix}")
+        tmp_path = save_path + '.tmp'
+
+        # write into a temporary directory first so a crash never leaves half a snapshot behind
+        if os.path.exists(tmp_path):
+            shutil.rmtree(tmp_path)
+        os.makedirs(tmp_path)
+
+        schema = {'columns': [], 'rows': len(df)}
+        for column in df.columns:
+            if pd.api.types.is_numeric_dtype(df[column]):
+                array = df[column].to_numpy(dtype=self.float_dtype)
+            else:
+                # fixed-width unicode, so the column can be mapped like the numeric ones
+                array = df[column].astype(str).to_numpy(dtype=object).astype(str)
+            np.save(os.path.join(tmp_path, f"{column}.npy"), array, allow_pickle=False)
+            schema['columns'].append({'name': column, 'dtype': array.dtype.str})
+
+        with open(os.path.join(tmp_path, self.schema_file), 'w', encoding='utf-8') as f:
+            json.dump(schema, f, ensure_ascii=False)
+
+        if os.path.exists(save_path):
+            shutil.rmtree(save_path)
+        os.replace(tmp_path, save_path)
+        return save_path
+
+    def load_columns(self, path: str) -> dict:
+        """
+        Open the columns of a snapshot as read-only memory-mapped arrays.
+
+        Args:
+            path (str): The snapshot directory.
+
+        Returns:
+            dict: Column name -> np.memmap, float for numeric columns and fixed-width unicode
+                  for text columns, in the original column order.
+        """
+        with open(os.path.join(path, self.schema_file), 'r', encoding='utf-8') as f:
+            schema = json.load(f)
+        columns = {}
+        for column in schema['columns']:
+            name = column['name']
+            if column['dtype'] == self.json_text_dtype:
+                with open(os.path.join(path, f"{name}.json"), 'r', encoding='utf-8') as f:
+                    columns[name] = np.array(json.load(f), dtype=str)
+                continue
+            array = np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r', allow_pickle=False)
+            if array.dtype.kind == 'S':
+                # fixed-width UTF-8 bytes of a snapshot written by an earlier version
+                array = np.char.decode(array, 'utf-8')
+            columns[name] = array
+        return columns
+
+    def load(self, path: str) -> pd.DataFrame:
+        columns = self.load_columns(path)
+        for name, array in columns.items():
+            if array.dtype.kind == 'U':
+                # pandas keeps text as Python strings, created by one cast of the mapped array
+                columns[name] = array.astype(object)
+        # copy=False keeps the memory-mapped columns as views instead of consolidating them into a copy
+        return pd.DataFrame(columns, copy=False)
+
+# END OF CLASS DEFINITION
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# DEFINE GLOBAL VARIABLES HERE
+
+# all available backends, selected by 'settings.snapshot.format' in config.json
+SNAPSHOT_BACKENDS = {
+    CsvSnapshotBackend.name: CsvSnapshotBackend,
+    NpySnapshotBackend.name: NpySnapshotBackend,
+}
+
+# END OF GLOBAL VARIABLES' DEFINITION
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# DEFINE FUNCTIONS HERE
+
+def get_backend(config=None):
+    """
+    Create the snapshot backend described by the 'snapshot' entry of config.json.
+
+    Args:
+        config (dict): A dictionary with a 'format' key ('csv' or 'npy') and an optional 'floatDtype'.
+                       Defaults to the CSV backend.
+
+    Returns:
+        The snapshot backend instance.
+    """
+    config = config or {}
+    name = config.get('format', CsvSnapshotBackend.name)
+    if name not in SNAPSHOT_BACKENDS:
+        raise ValueError(f"Unknown snapshot format: {name}")
+    if name == NpySnapshotBackend.name:
+        return NpySnapshotBackend(float_dtype=config.get('floatDtype', 'float64'))
+    return SNAPSHOT_BACKENDS[name]()
+
+
+def is_snapshot(file_name: str) -> bool:
+    """Check if a file name in raw_data/ belongs to a snapshot of any backend."""
+    return any(file_name.endswith(backend.suffix) for backend in SNAPSHOT_BACKENDS.values())
+
+
+def snapshot_time(file_name: str):
+    """
+    Recover the fetch time of a snapshot from its file name, e.g. '2024_10_04_21_59_raw.csv'.
+
+    Args:
+        file_name (str): The file name (or path) of the snapshot.
+
+    Returns:
+        float: Unix time of the snapshot, None if the name does not carry a time stamp.
+    """
+    stamp = os.path.basename(file_name.rstrip(os.sep))[:len('YYYY_mm_dd_HH_MM')]
+    try:
+        return datetime.strptime(stamp, '%Y_%m_%d_%H_%M').timestamp()
+    except ValueError:
+        return None
+
+
+def load_snapshot(path: str) -> pd.DataFrame:
+    """
+    Load a snapshot with the backend matching its file name, so older CSV snapshots stay readable.
+
+    Args:
+        path (str): The path of the snapshot file or directory.
+
+    Returns:
+        pd.DataFrame: The snapshot.
+    """
+    for backend in SNAPSHOT_BACKENDS.values():
+        if path.rstrip(os.sep).endswith(backend.suffix):
+            return backend().load(path)
+    raise ValueError(f"Unknown snapshot file: {path}")
+
+# END OF FUNCTION DEFINITION
+#---------------------------------------------------------------------------------
+
+# END OF FILE
+#---------------------------------------------------------------------------------
@@ -0,0 +1,143 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: startup.py
+# Description: cold start helpers, a cache of the parsed stock universe and config and background
+#              imports of the heavy packages. Only the standard library is imported here.
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import csv
+import importlib
+import os
+import pickle
+import threading
+
+from .component import JsonDataProcessor
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# DEFINE CLASS HERE
+
+class StartupCache:
+    """
+    StartupCache keeps the parsed stock code list and config.json in one pickle file.
+
+    The cache is keyed by the path, modification time and size of both source files and the
+    region code, so editing stock_code.csv or config.json invalidates it on the next start.
+    Loading a valid cache is a single pickle.load, neither pandas nor the JSON filtering is needed.
+
+    Attributes:
+        path (str): The cache file.
+
+    Methods:
+        load(stock_code_file, config_file, region_code): The startup data, from the cache if it is valid.
+    """
+    version = 1
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    @staticmethod
+    def _stamp(*paths) -> tuple:
+        stamps = []
+        for path in paths:
+            stat = os.stat(path)
+            stamps.append((os.path.abspath(path), stat.st_mtime_ns, stat.st_size))
+        return tuple(stamps)
+
+    def _read(self, key: tuple):
+        try:
+            with open(self.path, 'rb') as f:
+                cached = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return None
+        if not isinstance(cached, dict) or cached.get('key') != key:
+            return None
+        return cached['data']
+
+    def _write(self, key: tuple, data: tuple):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({'key': key, 'data': data}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            # a missing cache only costs the next start the parsing
+            print(f"Can not write startup cache {self.path}: {e}")
+
+    def load(self, stock_code_file: str, config_file: str, region_code: str) -> tuple:
+        """
+        Load the stock code list and the filtered config.
+
+        Args:
+            stock_code_file (str): Path to the CSV file containing stock codes, one per line.
+            config_file (str): Path to the JSON configuration file.
+            region_code (str): The region code to filter relevant configuration data.
+
+        Returns:
+            tuple: (stock_code_list, interest_info_idxs, thresholds, urls, settings)
+        """
+        key = (self.version, region_code) + self._stamp(stock_code_file, config_file)
+        data = self._read(key)
+        if data is None:
+            data = (read_stock_codes(stock_code_file),) + tuple(JsonDataProcessor().split_json_to_dicts(config_file, region_code))
+            self._write(key, data)
+        return data
+
+# END OF CLASS DEFINITION
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# DEFINE FUNCTIONS HERE
+
+def read_stock_codes(path: str) -> list:
+    """Read the first column of a header-less CSV file, like pd.read_csv(path, header=None)[0] without pandas."""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return [row[0] for row in csv.reader(f) if row]
+
+
+def preload(module_names) -> threading.Thread:
+    """
+    Import modules in a background thread.
+
+    Importing pandas and aiohttp takes most of the startup time. Started right before a prompt,
+    the imports run while the user answers it, and a later import statement of the main thread
+    only waits for whatever is left.
+
+    Args:
+        module_names (list): Names of the modules to import, in order.
+
+    Returns:
+        threading.Thread: The (daemon) import thread.
+    """
+    def run():
+        for name in module_names:
+            try:
+                importlib.import_module(name)
+            except Exception:
+                # the import statement of the main thread raises the error where it is used
+                return
+
+    thread = threading.Thread(target=run, name='preload', daemon=True)
+    thread.start()
+    return thread
+
+# END OF FUNCTION DEFINITION
+#---------------------------------------------------------------------------------
+
+# END OF FILE
+#---------------------------------------------------------------------------------
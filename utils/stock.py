@@ -14,14 +14,173 @@
 
 import asyncio
 import aiohttp
-import unicodedata
 import json
 import os
+import time
 
+from collections import deque
+from operator import itemgetter
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
 
+from .component import AdaptiveConcurrencyLimiter, TokenBucketLimiter
+from .snapshot import CsvSnapshotBackend
+from .catalog import SnapshotCatalog
+from .index import SortedColumnIndex
+from .screen import compile_screen, ScreenBatch
+from .quotes import extract_quote, loads, parse_batch_body, ParseStage, QuoteColumns
+from .metrics import MetricsRegistry
+from .table import TableRenderer
+
+
+class FetchResult:
+    """
+    FetchResult is the outcome of one AsyncStockFetcher pass.
+
+    A pass no longer stops at the first failing stock code. Instead every code ends up either
+    in 'successes' or in 'failures' together with the reason, so a follow-up pass can re-fetch
+    only the codes that failed.
+
+    Attributes:
+        successes (list): Stock codes fetched successfully.
+        failures (dict): Stock code -> failure reason, one of FetchResult.REASONS.
+        retries (dict): Stock code -> number of retries spent on it (codes without retries are omitted).
+        resumed (int): The number of successes restored from a checkpoint instead of being fetched.
+
+    Methods:
+        add_success(stock_code, retries): Record a successfully fetched code.
+        add_failure(stock_code, reason, retries): Record a failed code and the reason.
+        merge(other): Fold the result of a follow-up pass into this one.
+    """
+    REDIRECT = 'redirect'
+    FORBIDDEN = 'forbidden'
+    FIREWALL = 'firewall'
+    PARSE_ERROR = 'parse_error'
+    CLIENT_ERROR = 'client_error'
+    HTTP_ERROR = 'http_error'
+    REASONS = (REDIRECT, FORBIDDEN, FIREWALL, PARSE_ERROR, CLIENT_ERROR, HTTP_ERROR)
+
+    def __init__(self) -> None:
+        self.successes = []
+        self.failures = {}
+        self.retries = {}
+        self.resumed = 0
+
+    @property
+    def total(self) -> int:
+        return len(self.successes) + len(self.failures)
+
+    @property
+    def success_ratio(self) -> float:
+        return len(self.successes) / self.total if self.total else 1.0
+
+    @property
+    def failed_codes(self) -> list:
+        return list(self.failures.keys())
+
+    def add_success(self, stock_code: str, retries=0):
+        self.successes.append(stock_code)
+        if retries:
+            self.retries[stock_code] = retries
+
+    def add_failure(self, stock_code: str, reason: str, retries=0):
+        self.failures[stock_code] = reason
+        if retries:
+            self.retries[stock_code] = retries
+
+    def reason_counts(self) -> dict:
+        """Count the failures per reason, e.g. {'firewall': 3, 'parse_error': 1}."""
+        counts = {}
+        for reason in self.failures.values():
+            counts[reason] = counts.get(reason, 0) + 1
+        return counts
+
+    def merge(self, other):
+        """
+        Fold the result of a follow-up pass (usually over the failed codes) into this result.
+
+        Args:
+            other (FetchResult): The result of the follow-up pass.
+
+        Returns:
+            FetchResult: self, updated in place.
+        """
+        recovered = set(other.successes)
+        self.successes.extend(code for code in other.successes if code not in self.successes)
+        self.failures = {code: reason for code, reason in self.failures.items() if code not in recovered}
+        self.failures.update(other.failures)
+        for code, count in other.retries.items():
+            self.retries[code] = self.retries.get(code, 0) + count
+        return self
+
+    def summary(self) -> str:
+        text = f"{len(self.successes)}/{self.total} stocks fetched ({self.success_ratio * 100:.2f}%)"
+        if self.resumed:
+            text += f', {self.resumed} resumed from checkpoint'
+        if self.failures:
+            text += ', failures: ' + ', '.join(f"{reason}={count}" for reason, count in self.reason_counts().items())
+        return text
+
+
+class FetchCheckpoint:
+    """
+    FetchCheckpoint is an append-only JSON-lines file holding the rows of an unfinished fetch pass.
+
+    Every row is written and flushed as soon as it arrives, so a run that dies half way can be
+    resumed by only fetching the codes which are missing from the file. Each line has the form
+    {"ts": <unix time>, "row": [...]}, where row is the pre-processed row of a stock.
+
+    Attributes:
+        path (str): The path of the checkpoint file.
+        freshness (float): Rows older than this many seconds are ignored when resuming.
+
+    Methods:
+        load(): Return the fresh rows in the file as a dict of stock code -> row.
+        append(row): Append a single row to the file.
+        clear(): Remove the file, usually after the pass has been saved.
+    """
+    def __init__(self, path: str, freshness=300) -> None:
+        self.path = path
+        self.freshness = freshness
+        self._file = None
+
+    def load(self) -> dict:
+        rows = {}
+        if not os.path.exists(self.path):
+            return rows
+
+        oldest = time.time() - self.freshness
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # the last line may be cut off if the process died while writing it
+                    continue
+                if entry.get('ts', 0) >= oldest:
+                    row = entry['row']
+                    rows[row[1]] = row
+        return rows
+
+    def append(self, row: list):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps({'ts': time.time(), 'row': row}, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def clear(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
 
 class AsyncStockFetcher:
     """
@@ -36,15 +195,84 @@ class AsyncStockFetcher:
         interest_info_idxs (dict): A dictionary mapping column names to their respective indexes 
                                    in the retrieved data.
         urls (dict): A dictionary containing URL prefixes, suffixes, and firewall warning texts.
+                     With a valid 'batchRequest' entry many codes are fetched per request.
+        concurrency (dict): Optional 'concurrency' settings (floor, ceiling, targetLatency) for the
+                            adaptive limiter. Without it the fetcher keeps a fixed 5-slot limit.
+        retry_limit (int): The number of attempts per stock code on client errors.
+        last_result (FetchResult): The ledger of the latest pass, None before the first one.
+        checkpoint (FetchCheckpoint): Optional checkpoint which completed rows are streamed to.
+        snapshot_backend: The storage backend used by save_data, a CSV file by default.
+        bar_store (MinuteBarStore): Optional store which the m1 bars of every mkline response are
+                                    merged into. The batch endpoint carries no bars, so with a store
+                                    stocks are fetched per code, unless 'batchRequest' sets 'withBars'
+                                    to true, which keeps batching and drops the store (bar_store is None).
+        parse (dict): Optional 'parse' settings (mode, workers, batchSize). Modes 'process',
+                      'thread' and 'auto' decode responses in a worker pool, see ParseStage.
+                      Without it responses are decoded on the event loop.
+        metrics (MetricsRegistry): Optional registry the timing spans and counters of every request
+                                   and pass are recorded in, see utils/metrics.py.
+        session (dict): Optional 'session' settings of the connection pool (limit, limitPerHost,
+                        dnsCacheTtl, keepAlive, totalTimeout, connectTimeout, readTimeout). The
+                        session is kept open across passes unless 'persistent' is false.
+        rate_limit (dict): Optional 'rateLimit' settings (rate, burst, cooldown, ...) of a token bucket
+                           all requests take a token from. A firewall page or 403 then pauses all
+                           requests for the cooldown and the blocked code is tried again after it.
+        rate_limiter (TokenBucketLimiter): The token bucket built from rate_limit, None without it.
 
     Methods:
-        fetch_data(): Fetch data for all stocks in the list asynchronously.
-        save_data(save_path): Save the filtered data to a CSV file.
+        fetch_data(stock_codes): Fetch data for all (or the given) stocks asynchronously.
+        seed(df): Start from the rows of a loaded snapshot, so partial passes have a full universe.
+        build_frame(): The latest row of every stock as a DataFrame.
+        refetch_failed(): Re-fetch only the stocks which failed in the latest pass.
+        save_data(save_path): Save the filtered data with the snapshot backend and record it in the manifest.
+        catalog(save_dir): The manifest of the snapshots in a directory.
+        close(): Close the HTTP session and shut down the worker pool of the parse stage.
     """
-    def __init__(self, stock_list, urls, interest_info_idxs, progress_callback=None) -> None:
+    def __init__(self, stock_list, urls, interest_info_idxs, progress_callback=None, concurrency=None,
+                 retry_limit=3, checkpoint=None, snapshot_backend=None, bar_store=None, parse=None,
+                 metrics=None, session=None, rate_limit=None) -> None:
         self._urls = urls
+        self._concurrency = concurrency or {}
+        self._retry_limit = retry_limit
+        # one limiter for all passes, so tiered passes share one concurrency budget and the
+        # learned limit carries over from pass to pass
+        self._limiter = None
+        # shared by all requests of all passes, so a cooldown holds back every task
+        self.rate_limiter = TokenBucketLimiter.from_config(rate_limit) if rate_limit else None
+        # 'session' settings of the connection pool, the session itself is opened by the first pass
+        self._session_config = session or {}
+        self._session = None
 
-        self._all_raw_data = []
+        # stock code -> pre-processed row, kept column-wise in arrays preallocated for the whole
+        # stock_list, so a follow-up pass can replace single rows
+        self._all_raw_data = QuoteColumns(list(interest_info_idxs.keys()), stock_list)
+        self._indices = tuple(idx['index'] for idx in interest_info_idxs.values())
+        self._pick_fields = itemgetter(*self._indices)
+        self._firewall_bytes = urls['firewallWarning']['text'].encode('utf-8')
+        self.last_result = None
+        self.checkpoint = checkpoint
+        # codes are packed into batch requests if the config provides a valid batch endpoint
+        batch_config = urls.get('batchRequest') or {}
+        self._batching = bool(batch_config.get('valid', False))
+        # the batch endpoint carries no minute bars, so a bar store turns batching off unless
+        # 'withBars' says the quotes are batched anyway, in which case the store is dropped
+        if self._batching and bar_store is not None:
+            if batch_config.get('withBars', False):
+                print("Minute bars are off: the batch endpoint carries no bars (batchRequest.withBars is true).")
+                bar_store = None
+            else:
+                print("Minute bars are on: stocks are fetched one mkline request each instead of in batches.")
+                self._batching = False
+        self._batch_firewall_bytes = urls['firewallWarning']['text'].encode(batch_config.get('encoding', 'gbk'))
+        # responses are decoded in a worker pool if configured, on the event loop otherwise
+        self._parse_stage = ParseStage.from_config(parse or {}, self._indices, with_bars=bar_store is not None)
+        # current batch size of the batch endpoint, adapted across passes
+        self._batch_size = batch_config.get('initialBatch', 20)
+        # unix time at which the latest pass finished
+        self.fetched_at = None
+        self.snapshot_backend = snapshot_backend or CsvSnapshotBackend()
+        self.bar_store = bar_store
+        self.metrics = metrics if metrics is not None else MetricsRegistry(enabled=False)
         self.stock_list = stock_list
         self.interest_info_idxs = interest_info_idxs
         self.df = pd.DataFrame()
@@ -54,112 +282,511 @@ class AsyncStockFetcher:
         self.total_stocks = len(stock_list)
 
     # CORE FUNCTION
-    async def _fetch_stock_data(self, session, stock_code: str, semaphore: asyncio.Semaphore, retry_limit=3):
-        """ Fetch stock data for a given stock code asynchronously. """
+    async def _fetch_stock_data(self, session, stock_code: str, limiter: AdaptiveConcurrencyLimiter,
+                                result: FetchResult, retry_limit=3):
+        """ Fetch stock data for a given stock code asynchronously and record the outcome in result. """
         url = f"{self._urls['request']['prefix']}{stock_code}{self._urls['request']['suffix']}"
-        # using semaphores to control concurrency
-        async with semaphore:
-            retries = 0
-            while retries < retry_limit:
-                try:
-                    async with session.get(url, headers=self._urls['request']['headers'], allow_redirects=True) as response:
-                        if 300 <= response.status < 400:
-                            print(f'Warning: Request for stock {stock_code} was redirected.')
-                            return None
-                        elif response.status == 403:
+        metrics = self.metrics
+        retries = 0
+        while retries < retry_limit:
+            # using the adaptive limiter to control concurrency
+            # every request reports its latency and whether the server looked healthy
+            # a shared token bucket paces the request rate and holds every task during a cooldown
+            waiting = time.monotonic()
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            await limiter.acquire()
+            start, healthy = time.monotonic(), False
+            metrics.observe('fetch.wait', start - waiting)
+            metrics.count('fetch.requests')
+            try:
+                async with session.get(url, headers=self._urls['request']['headers'], allow_redirects=False) as response:
+                    if 300 <= response.status < 400:
+                        print(f'Warning: Request for stock {stock_code} was redirected.')
+                        result.add_failure(stock_code, FetchResult.REDIRECT, retries)
+                        return None
+                    elif response.status == 403:
+                        print(f"Warning: Request for stock {stock_code} was blocked by a firewall.")
+                        if self._report_block() and retries + 1 < retry_limit:
+                            # tried again once the cooldown is over
+                            retries += 1
+                            continue
+                        result.add_failure(stock_code, FetchResult.FORBIDDEN, retries)
+                        return None
+                    elif response.status == 200:
+                        # work on the raw bytes, the payload is never decoded into a str as a whole
+                        body = await response.read()
+                        if self._firewall_bytes in body:
                             print(f"Warning: Request for stock {stock_code} was blocked by a firewall.")
+                            if self._report_block() and retries + 1 < retry_limit:
+                                retries += 1
+                                continue
+                            result.add_failure(stock_code, FetchResult.FIREWALL, retries)
                             return None
-                        elif response.status == 200:
-                            text = await response.text()
-                            if self._urls['firewallWarning']['text'] in text:
-                                print(f"Warning: Request for stock {stock_code} was blocked by a firewall.")
-                                return None
-                            
-                            try:
-                                information = json.loads(text)['data'][stock_code]['qt'][stock_code]
-                                # only remain data with interest
-                                raw_data = [information[idx['index']] for idx in self.interest_info_idxs.values()]
-                                
-                                # ***************************************************************************************************
-                                # PRE-PROCESSING OF RAW DATA
-                                # THIS PART OF CODE IS FRAGILE
-
-                                # stock code w/o prefix is placed at the 2nd place of raw data list
-                                # so the sub index of stock_code is 2 (sub index starts from 0)
-                                raw_data[1] = stock_code
-                                # all original value in raw data is string
-                                # map all number-type data into float type
-                                # raw_data[2:] = [float(item) if item.replace('.', '', 1).isdigit() else item for item in raw_data[2:]]
-                                raw_data[2:] = [float(item) for item in raw_data[2:]]
-
-                                # END OF PRE-PROCESSING OF RAW DATA
-                                # ***************************************************************************************************
-
-                                return raw_data
-                            except (KeyError, ValueError, json.JSONDecodeError) as e:
-                                print(f"Error processing data for stock {stock_code}: {e}")
-                                return None
-                        else:
-                            print(f"Error: Request for stock {stock_code} failed with status {response.status}.")
-                            return None
-                except aiohttp.ClientError as e:
-                    print(f"Client error: {e}")
-                    retries += 1
-                    await asyncio.sleep(2 ** retries)  # Exponential backoff
-                    continue  # retry
+
+                        # a normal page came back, the server is not pushing back on us
+                        healthy = True
+                        break
+                    else:
+                        print(f"Error: Request for stock {stock_code} failed with status {response.status}.")
+                        result.add_failure(stock_code, FetchResult.HTTP_ERROR, retries)
+                        return None
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"Client error: {e!r}")
+                retries += 1
+                metrics.count('fetch.retries')
+            finally:
+                latency = time.monotonic() - start
+                limiter.release(latency, healthy)
+                metrics.observe('fetch.request', latency)
+            with metrics.span('fetch.backoff'):
+                await asyncio.sleep(2 ** retries)  # Exponential backoff, the slot is released while sleeping
+        else:
+            result.add_failure(stock_code, FetchResult.CLIENT_ERROR, retries)
             return None
 
-    async def fetch_data(self) -> int:
-        """Fetch data for all stocks in the list asynchronously and update progress."""
-        fetched_count = 0  # number of stocks processed (get response)
-        max_concurrent_requests = 5  # maximum concurrency of requests
-        semaphore = asyncio.Semaphore(max_concurrent_requests)  # limiting the number of concurrent requests with semaphores
-
-        async with aiohttp.ClientSession() as session:
-            task_list = []
-            for stock_code in self.stock_list:
-                task = self._fetch_stock_data(session, stock_code, semaphore)
-                task_list.append(task)
-            
-            # gather results and update progress after each task finishes
-            for result in asyncio.as_completed(task_list):
-                fetched_data = await result
-
-                if fetched_data:
-                    self._all_raw_data.append(fetched_data)
+        # the body is complete and the slot released, decoding does not count as request latency
+        if self._parse_stage is not None:
+            with metrics.span('fetch.decode'):
+                name, numbers, error, bars = await self._parse_stage.submit(stock_code, body)
+            if error is not None:
+                print(f"Error processing data for stock {stock_code}: {error}")
+                result.add_failure(stock_code, FetchResult.PARSE_ERROR, retries)
+                return None
+            self._all_raw_data.put(stock_code, name, numbers)
+            result.add_success(stock_code, retries)
+            if isinstance(bars, str):
+                print(f"Error processing minute bars for stock {stock_code}: {bars}")
+            elif bars is not None:
+                self.bar_store.merge(stock_code, *bars)
+            return stock_code
+
+        try:
+            with metrics.span('fetch.decode'):
+                if self.bar_store is not None:
+                    payload = loads(body)['data'][stock_code]
+                    information = payload['qt'][stock_code]
                 else:
-                    return 1
+                    # only the quote is needed, the kline block is skipped
+                    information = extract_quote(body, stock_code)
+                self._store_quote(stock_code, information)
+            result.add_success(stock_code, retries)
+        except (KeyError, IndexError, TypeError, ValueError, json.JSONDecodeError) as e:
+            print(f"Error processing data for stock {stock_code}: {e}")
+            result.add_failure(stock_code, FetchResult.PARSE_ERROR, retries)
+            return None
+
+        # the minute bars come with the quote for free, a broken bar list does not spoil the quote
+        if self.bar_store is not None:
+            try:
+                self.bar_store.add(stock_code, payload.get('m1'))
+            except (IndexError, TypeError, ValueError) as e:
+                print(f"Error processing minute bars for stock {stock_code}: {e}")
+        return stock_code
+
+    def _report_block(self) -> bool:
+        """
+        Report a firewall page or 403 to the rate limiter, which pauses all tasks for its cooldown.
+
+        Returns:
+            bool: True if there is a rate limiter, so the request can be tried again after the cooldown.
+        """
+        self.metrics.count('fetch.blocks')
+        if self.rate_limiter is None:
+            return False
+        self.rate_limiter.penalize()
+        return True
+
+    def _store_quote(self, stock_code: str, information: list):
+        """Pick the fields of interest out of a quote list and write them into the column arrays."""
+        # only remain data with interest
+        raw_data = self._pick_fields(information)
+
+        # ***************************************************************************************************
+        # PRE-PROCESSING OF RAW DATA
+        # THIS PART OF CODE IS FRAGILE
+
+        # stock code w/o prefix is placed at the 2nd place of raw data list
+        # so the sub index of stock_code is 2 (sub index starts from 0), it is replaced by the code with prefix
+        # all original value in raw data is string
+        # number-type data (from the 3rd place on) is converted to float while being written into the arrays
+        self._all_raw_data.put(stock_code, raw_data[0], raw_data[2:])
+
+        # END OF PRE-PROCESSING OF RAW DATA
+        # ***************************************************************************************************
+
+    async def _fetch_batch(self, session, batch: list, limiter: AdaptiveConcurrencyLimiter) -> tuple:
+        """
+        Fetch quotes for several stock codes with a single request to the batch endpoint.
+
+        The batch endpoint answers with one line per code, e.g. 'v_sz000001="51~name~000001~...";',
+        whose '~'-separated fields use the same indexes as the 'qt' list of the single-code endpoint.
+
+        Returns:
+            tuple: (set of the stock codes found in the response and stored,
+                    None on success or the FetchResult reason why the whole request failed)
+        """
+        config = self._urls['batchRequest']
+        url = f"{config['prefix']}{config.get('separator', ',').join(batch)}"
+        waiting = time.monotonic()
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
+        await limiter.acquire()
+        start, healthy = time.monotonic(), False
+        self.metrics.observe('fetch.wait', start - waiting)
+        self.metrics.count('fetch.requests')
+        try:
+            async with session.get(url, headers=config.get('headers', self._urls['request']['headers']),
+                                   allow_redirects=False) as response:
+                if 300 <= response.status < 400:
+                    return set(), FetchResult.REDIRECT
+                elif response.status == 403:
+                    self._report_block()
+                    return set(), FetchResult.FORBIDDEN
+                elif response.status != 200:
+                    return set(), FetchResult.HTTP_ERROR
+
+                body = await response.read()
+                if self._batch_firewall_bytes in body:
+                    self._report_block()
+                    return set(), FetchResult.FIREWALL
+                healthy = True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Client error: {e!r}")
+            return set(), FetchResult.CLIENT_ERROR
+        finally:
+            latency = time.monotonic() - start
+            limiter.release(latency, healthy)
+            self.metrics.observe('fetch.request', latency)
+
+        # lines which cannot be converted are left out and go to the single-code fallback
+        args = (body, config.get('encoding', 'gbk'), self._indices)
+        with self.metrics.span('fetch.decode'):
+            if self._parse_stage is not None:
+                codes, names, numbers = await self._parse_stage.run(parse_batch_body, *args)
+            else:
+                codes, names, numbers = parse_batch_body(*args)
+            for stock_code, name, row in zip(codes, names, numbers):
+                self._all_raw_data.put(stock_code, name, row)
+        return set(codes), None
+
+    async def _dispatch_single(self, session, stock_codes: list, limiter: AdaptiveConcurrencyLimiter,
+                               result: FetchResult):
+        """Fetch every stock code with its own request, yielding the stored codes (None for failures) as they complete."""
+        task_list = [asyncio.ensure_future(
+                         self._fetch_stock_data(session, stock_code, limiter, result, retry_limit=self._retry_limit))
+                     for stock_code in stock_codes]
+        try:
+            for task in asyncio.as_completed(task_list):
+                yield await task
+        finally:
+            for task in task_list:
+                task.cancel()
+
+    async def _dispatch_batches(self, session, stock_codes: list, limiter: AdaptiveConcurrencyLimiter,
+                                result: FetchResult):
+        """
+        Fetch stock codes in batches, yielding every stored stock code (None for failures) once.
+
+        The batch size grows by 'step' after every successful batch up to 'maxBatch' and is halved
+        after a failed one. Codes of a failed batch are queued again and end up in smaller batches;
+        after 'maxAttempts' failed batches, or if a successful response does not contain them,
+        they fall back to the single-code endpoint.
+        """
+        config = self._urls['batchRequest']
+        max_batch = config.get('maxBatch', 60)
+        step = config.get('step', 10)
+        max_attempts = config.get('maxAttempts', 2)
+
+        pending = deque(stock_codes)
+        attempts = {}
+        tasks = {}
+        try:
+            while pending or tasks:
+                # cut new batches with the current size, but never queue more requests than the limiter admits
+                while pending and len(tasks) < max(1, int(limiter.limit)):
+                    size = min(self._batch_size, len(pending))
+                    batch = [pending.popleft() for _ in range(size)]
+                    tasks[asyncio.ensure_future(self._fetch_batch(session, batch, limiter))] = batch
+
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    batch = tasks.pop(task)
+                    if batch is None:
+                        # a single-code fallback request
+                        yield task.result()
+                        continue
+
+                    stored, reason = task.result()
+                    if reason is None:
+                        self._batch_size = min(max_batch, self._batch_size + step)
+                    else:
+                        self._batch_size = max(1, self._batch_size // 2)
+
+                    fallback = []
+                    for stock_code in batch:
+                        if stock_code in stored:
+                            result.add_success(stock_code, attempts.get(stock_code, 0))
+                            yield stock_code
+                        elif reason is None or attempts.get(stock_code, 0) + 1 >= max_attempts:
+                            fallback.append(stock_code)
+                        else:
+                            attempts[stock_code] = attempts.get(stock_code, 0) + 1
+                            pending.appendleft(stock_code)
+
+                    for stock_code in fallback:
+                        single = asyncio.ensure_future(
+                            self._fetch_stock_data(session, stock_code, limiter, result, retry_limit=self._retry_limit))
+                        tasks[single] = None
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def fetch_data(self, stock_codes=None) -> FetchResult:
+        """
+        Fetch data for stocks asynchronously and update progress.
+
+        A failing stock code does not abort the pass, it is recorded in the returned FetchResult.
+
+        Args:
+            stock_codes (list): Stock codes to fetch. Defaults to the whole stock_list, in which case
+                                rows from previous passes are discarded first and fresh rows from
+                                the checkpoint (if any) are reused. A partial list only replaces the
+                                rows of the given codes.
+
+        Returns:
+            FetchResult: Successes, failure reasons and retry counts of this pass.
+        """
+        started = time.perf_counter()
+        result = FetchResult()
+        if stock_codes is None:
+            stock_codes = self.stock_list
+            self._all_raw_data.clear()
+
+            # resume an unfinished pass, only the missing tail has to be fetched
+            if self.checkpoint is not None:
+                wanted = set(stock_codes)
+                for stock_code, row in self.checkpoint.load().items():
+                    if stock_code in wanted:
+                        self._all_raw_data[stock_code] = row
+                        result.add_success(stock_code)
+                        result.resumed += 1
+                stock_codes = [code for code in stock_codes if code not in self._all_raw_data]
+
+        fetched_count = 0  # number of stocks processed (get response)
+        total = len(stock_codes)
+        # limiting the number of concurrent requests with an AIMD controller
+        # the limit grows while the server answers quickly and shrinks on firewall pages or redirects
+        if self._limiter is None:
+            self._limiter = AdaptiveConcurrencyLimiter.from_config(self._concurrency)
+        limiter = self._limiter
+
+        # one session for all passes, its connections are kept alive from one refresh to the next
+        session = self._get_session()
+        # rows are written into the column arrays as responses arrive, the dispatchers only report which
+        if self._batching:
+            fetched = self._dispatch_batches(session, stock_codes, limiter, result)
+        else:
+            fetched = self._dispatch_single(session, stock_codes, limiter, result)
+        
+        try:
+            # gather results and update progress after each stock finishes
+            async for stock_code in fetched:
+                if stock_code and self.checkpoint is not None:
+                    self.checkpoint.append(self._all_raw_data[stock_code])
                 
                 # update the number of stocks which already received response
                 fetched_count += 1
 
                 if self.progress_callback:
-                    progress = fetched_count / self.total_stocks * 100
+                    progress = fetched_count / total * 100
                     self.progress_callback(progress)
-        return 0
+        finally:
+            # an interrupted pass must not leave requests running on a closed session
+            await fetched.aclose()
+            if self.checkpoint is not None:
+                self.checkpoint.close()
+            if not self._session_config.get('persistent', True):
+                await self.close_session()
+
+        self.fetched_at = time.time()
+        self.last_result = result
+        self.metrics.observe('fetch.pass', time.perf_counter() - started)
+        for reason, count in result.reason_counts().items():
+            self.metrics.count(f'fetch.failures.{reason}', count)
+        return result
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the session of the fetcher, creating it (again) if there is none or it was closed."""
+        if self._session is None or self._session.closed:
+            config = self._session_config
+            connector = aiohttp.TCPConnector(
+                limit=config.get('limit', 100),
+                limit_per_host=config.get('limitPerHost', 0),
+                ttl_dns_cache=config.get('dnsCacheTtl', 300),
+                keepalive_timeout=config.get('keepAlive', 30)
+            )
+            timeout = aiohttp.ClientTimeout(
+                total=config.get('totalTimeout'),
+                connect=config.get('connectTimeout'),
+                sock_read=config.get('readTimeout')
+            )
+            # connection setup is only traced while metrics are recorded
+            trace_configs = [self._trace_config()] if self.metrics.enabled else None
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout, trace_configs=trace_configs)
+        return self._session
+
+    async def close_session(self):
+        """Close the session and its connections, the next pass opens a new one."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        """Trace DNS lookups and new connections of a session into the metrics."""
+        metrics = self.metrics
+
+        async def on_dns_start(session, context, params):
+            context.dns_started = time.perf_counter()
+
+        async def on_dns_end(session, context, params):
+            metrics.observe('fetch.dns', time.perf_counter() - context.dns_started)
+
+        async def on_connect_start(session, context, params):
+            context.connect_started = time.perf_counter()
+
+        async def on_connect_end(session, context, params):
+            metrics.observe('fetch.connect', time.perf_counter() - context.connect_started)
+
+        async def on_reuse(session, context, params):
+            metrics.count('fetch.reused')
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_dns_resolvehost_start.append(on_dns_start)
+        trace_config.on_dns_resolvehost_end.append(on_dns_end)
+        trace_config.on_connection_create_start.append(on_connect_start)
+        trace_config.on_connection_create_end.append(on_connect_end)
+        trace_config.on_connection_reuseconn.append(on_reuse)
+        return trace_config
+
+    async def refetch_failed(self) -> FetchResult:
+        """
+        Re-fetch only the stock codes that failed in the previous pass.
+
+        Returns:
+            FetchResult: The previous result with the outcome of the follow-up pass merged in.
+        """
+        previous = self.last_result
+        if previous is None or not previous.failures:
+            return previous if previous is not None else FetchResult()
+
+        retried = await self.fetch_data(previous.failed_codes)
+        self.last_result = previous.merge(retried)
+        return self.last_result
+
+    def seed(self, df: pd.DataFrame):
+        """
+        Start from the rows of a previously saved snapshot.
+
+        Partial passes only replace the rows of the codes they fetched, so a snapshot loaded from
+        disk gives them the rest of the universe to build a complete frame from.
+
+        Args:
+            df (pd.DataFrame): The snapshot. Columns missing from it (older snapshots) are left empty.
+        """
+        df = df.reindex(columns=list(self.interest_info_idxs.keys()))
+        self._all_raw_data.clear()
+        for row in df.values.tolist():
+            self._all_raw_data[row[1]] = row
+        self.df = df
+
+    def build_frame(self) -> pd.DataFrame:
+        """Build the DataFrame of the latest row of every stock fetched so far, also kept in df."""
+        with self.metrics.span('fetch.frame'):
+            self.df = self._all_raw_data.frame()
+        return self.df
+
+    async def close(self):
+        """Close the HTTP session and shut down the worker pool of the parse stage, if there is one."""
+        await self.close_session()
+        if self._parse_stage is not None:
+            self._parse_stage.close()
+
+    def catalog(self, save_dir: str) -> SnapshotCatalog:
+        """
+        The manifest of the snapshots in a directory, kept current by save_data.
+
+        Args:
+            save_dir (str): The snapshot directory.
+
+        Returns:
+            SnapshotCatalog: The catalog of the directory.
+        """
+        return SnapshotCatalog.open(save_dir)
 
     def save_data(self, save_dir: str):
         """
-        Save the filtered data to a CSV file.
+        Save the filtered data with the configured snapshot backend and add it to the manifest of save_dir.
 
         Args:
             save_dir (str): The directory path to save data.
+
+        Returns:
+            str: The path of the saved snapshot, None if saving failed.
         """
 
         # check if the directory exits, if not exits then create one
         if not os.path.exists(save_dir):
             os.makedirs(save_dir)
 
-        save_path = os.path.join(save_dir, f"{datetime.now().strftime('%Y_%m_%d_%H_%M')}_raw.csv")
         try:
-            self.df = pd.DataFrame(self._all_raw_data, columns=self.interest_info_idxs.keys())
-            self.df.to_csv(save_path, index=False, encoding='utf-8-sig')
+            self.build_frame()
+            with self.metrics.span('save.write'):
+                save_path = self.snapshot_backend.save(self.df, save_dir, datetime.now().strftime('%Y_%m_%d_%H_%M'))
+            self.catalog(save_dir).add(save_path, self.df)
+            # the pass is safely on disk, a restart must not resume from it
+            if self.checkpoint is not None:
+                self.checkpoint.clear()
+            return save_path
         except Exception as e:
             print(f"Error saving data: {e}")
+            return None
+
+
+class SnapshotDelta:
+    """
+    SnapshotDelta describes what changed between two consecutive snapshots in a StockDatabase.
+
+    Attributes:
+        changed (list): Stock codes present in both snapshots whose row differs.
+        appeared (list): Stock codes only present in the new snapshot.
+        vanished (list): Stock codes only present in the old snapshot.
+        positions (np.ndarray): Row positions in the new raw_data of changed and appeared stocks.
+        reindexed (bool): True if row positions were not kept (because stocks vanished), in which
+                          case everything derived from row positions had to be rebuilt.
+    """
+    def __init__(self, changed=None, appeared=None, vanished=None, positions=None, reindexed=False) -> None:
+        self.changed = changed or []
+        self.appeared = appeared or []
+        self.vanished = vanished or []
+        self.positions = positions if positions is not None else np.empty(0, dtype=np.intp)
+        self.reindexed = reindexed
+
+    def __len__(self) -> int:
+        return len(self.changed) + len(self.appeared) + len(self.vanished)
+
+    @property
+    def codes(self) -> list:
+        """All stock codes touched by the delta."""
+        return self.changed + self.appeared + self.vanished
+
+    def summary(self) -> str:
+        return f"{len(self.changed)} changed, {len(self.appeared)} appeared, {len(self.vanished)} vanished"
 
 
 class StockDatabase:
-    def __init__(self, raw_data: pd.DataFrame, keyword=r'stockCode'):
+    def __init__(self, raw_data: pd.DataFrame, keyword=r'stockCode', history=None, timestamp=None,
+                 index_columns=None, indicators=None, metrics=None, page_size=None, alerts=None):
         """
         Initialize the StockDatabase with raw stock data.
 
@@ -167,128 +794,373 @@ class StockDatabase:
         raw_data (pd.DataFrame): A DataFrame where each row represents stock information.
                                  The DataFrame should have at least the following columns:
                                  ['Stock Code', 'Stock Name', 'Price', 'Volume', ...]
+        history (SnapshotHistory): Optional history store the snapshot and the rows changed by every update are appended to.
+        timestamp (float): Unix time at which raw_data was fetched, defaults to now.
+        index_columns (list): Numeric columns to keep a sorted index on, e.g. ['increase', 'turnOver'].
+        indicators (IndicatorEngine): Optional indicator engine fed with every full snapshot. Its indicators
+                                      can be screened by name like the columns of raw_data.
+        metrics (MetricsRegistry): Optional registry the time of update and filter_stocks is recorded in.
+        page_size (int): Rows show_stock_info prints at once, None for no pagination.
+        alerts (AlertEngine): Optional alert rules evaluated on the rows every update changes.
         """
-        self.raw_data = raw_data
         self._keyword = keyword
+        self.metrics = metrics if metrics is not None else MetricsRegistry(enabled=False)
+        self.table = TableRenderer(page_size=page_size)
+        self._index_columns = list(index_columns or [])
+        self.indicators = indicators
+        if self.indicators is not None:
+            self.indicators.append(raw_data, timestamp)
+        self.raw_data = raw_data.reset_index(drop=True)
+        self._build_indexes()
+
+        # the first snapshot only sets the state of the alert rules, it is no transition
+        self.alerts = alerts
+        if self.alerts is not None:
+            self.alerts.prime(self._alert_columns(np.arange(len(self.raw_data))), self._arrays[self._keyword])
+
+        # compiled screen -> boolean mask, and profile batch -> name -> mask, kept current by update()
+        self._mask_cache = {}
+        self._profile_cache = {}
+        self.last_delta = None
+        # bumped by every update, so readers of the snapshot (e.g. the query server) can tell it changed
+        self.version = 0
+        self.updated_at = timestamp if timestamp is not None else time.time()
+
+        self.history = history
+        if self.history is not None:
+            self.history.append(raw_data, timestamp)
+
+    def _build_indexes(self):
+        """Build the stockCode -> row position hash index and the sorted indexes from scratch."""
+        self._positions = {code: pos for pos, code in enumerate(self.raw_data[self._keyword])}
+        self._refresh_arrays()
+        self._sorted_indexes = {column: SortedColumnIndex(self.raw_data[column].to_numpy(dtype='float64'))
+                                for column in self._index_columns if column in self.raw_data.columns}
 
-    def _get_display_width(self, text: str) -> int:
+    def _refresh_arrays(self):
+        """Cache the columns of raw_data and the latest indicators as NumPy arrays for the screening engine."""
+        self._arrays = {column: self.raw_data[column].to_numpy() for column in self.raw_data.columns}
+        if self.indicators is not None:
+            self._arrays.update(self.indicators.values(self._arrays[self._keyword]))
+
+    def _align(self, new_data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Reorder new_data so every known stock keeps its row position, new stocks are appended
+        at the end. Returns None if stocks vanished, in which case positions have to be rebuilt.
         """
-        Calculate the display width of a string, considering the different widths of Chinese and English characters.
+        positions = new_data[self._keyword].map(self._positions)
+        known = positions.notna().to_numpy()
+        if known.sum() != len(self._positions):
+            return None
 
-        Parameters:
-        text (str): The input string.
+        order = np.empty(len(new_data), dtype=np.intp)
+        order[positions[known].to_numpy(dtype=np.intp)] = np.flatnonzero(known)
+        order[len(self._positions):] = np.flatnonzero(~known)
+        return new_data.iloc[order].reset_index(drop=True)
+
+    def _diff(self, old_arrays: dict, old_positions: dict) -> tuple:
+        """
+        Compare raw_data against the previous snapshot row by row.
 
         Returns:
-        int: The display width of the string.
+        tuple: (old row position of every current row or -1 for new stocks,
+                column -> boolean mask of current rows whose value in that column changed)
         """
-        width = 0
-        for char in text:
-            if unicodedata.east_asian_width(char) in ('F', 'W'):
-                width += 2  # Full-width or wide character (like Chinese)
+        old_pos = np.fromiter((old_positions.get(code, -1) for code in self._arrays[self._keyword]),
+                              dtype=np.intp, count=len(self.raw_data))
+        known = old_pos >= 0
+        column_changes = {}
+        for column, values in self._arrays.items():
+            if column not in old_arrays:
+                column_changes[column] = np.ones(len(values), dtype=bool)
+                continue
+            previous = old_arrays[column][old_pos[known]]
+            changed = np.zeros(len(values), dtype=bool)
+            if values.dtype.kind == 'f':
+                current = values[known]
+                # NaN != NaN, so a row that stays NaN must not count as changed
+                changed[known] = (current != previous) & ~(np.isnan(current) & np.isnan(previous))
             else:
-                width += 1  # Regular-width character (like English)
-        return width
+                changed[known] = values[known] != previous
+            column_changes[column] = changed
+        return old_pos, column_changes
 
-    def _format_cell(self, text: str, width: int) -> str:
+    def _update_indexes(self, n_old: int, column_changes: dict):
+        """Patch the indexes after raw_data was replaced by an aligned frame."""
+        for pos, code in enumerate(self._arrays[self._keyword][n_old:].tolist(), start=n_old):
+            self._positions[code] = pos
+
+        for column, index in self._sorted_indexes.items():
+            index.update(self._arrays[column].astype('float64', copy=False), np.flatnonzero(column_changes[column]))
+
+    def _update_caches(self, delta: SnapshotDelta, rows: np.ndarray):
+        """Re-evaluate cached screens and profiles on the changed rows only."""
+        if delta.reindexed:
+            self._mask_cache.clear()
+            self._profile_cache.clear()
+            return
+
+        n_rows = len(self.raw_data)
+        subset = None
+        for screen, mask in self._mask_cache.items():
+            if subset is None:
+                subset = {column: values[rows] for column, values in self._arrays.items()}
+            if mask.shape[0] < n_rows:
+                mask = np.concatenate([mask, np.zeros(n_rows - mask.shape[0], dtype=bool)])
+                self._mask_cache[screen] = mask
+            if rows.shape[0]:
+                mask[rows] = screen.mask(subset)
+
+        for batch, masks in self._profile_cache.items():
+            if subset is None:
+                subset = {column: values[rows] for column, values in self._arrays.items()}
+            fresh = batch.masks(subset) if rows.shape[0] else {}
+            for name, mask in masks.items():
+                if mask is None:
+                    continue
+                if mask.shape[0] < n_rows:
+                    mask = np.concatenate([mask, np.zeros(n_rows - mask.shape[0], dtype=bool)])
+                    masks[name] = mask
+                if rows.shape[0]:
+                    mask[rows] = fresh[name]
+
+    def lookup(self, stock_codes: list) -> pd.DataFrame:
         """
-        Format a cell's content by right-aligning it according to its display width.
+        Return the rows of the given stock codes through the hash index, in the requested order.
 
         Parameters:
-        text (str): The text to format.
-        width (int): The target display width for the cell.
+        stock_codes (list): A list of stock codes.
 
         Returns:
-        str: The formatted text, right-aligned.
+        pd.DataFrame: The matching rows, unknown codes are skipped.
         """
-        text_width = self._get_display_width(text)
-        padding = width - text_width
-        return ' ' * padding + text
+        positions = [self._positions[code] for code in dict.fromkeys(stock_codes) if code in self._positions]
+        return self.raw_data.iloc[positions]
+
+    def range_positions(self, column: str, lower=float('-inf'), upper=float('inf')) -> np.ndarray:
+        """
+        Return the row positions whose value in column lies within [lower, upper].
+
+        Uses the sorted index of the column if there is one, otherwise a vectorized scan.
+        """
+        if column in self._sorted_indexes:
+            return self._sorted_indexes[column].range(lower, upper)
+        values = self.raw_data[column].to_numpy(dtype='float64')
+        return np.flatnonzero((values >= lower) & (values <= upper))
 
     def show_stock_info(self, stock_codes: list):
         """
         Display stock information in a table format for the given stock codes.
 
+        Tables longer than the page size are shown one page at a time, see show_more().
+
         Parameters:
         stock_codes (list): A list of stock codes to display information for.
         """
-        # Filter the DataFrame to include only rows with the specified stock codes
-        filtered_data = self.raw_data[self.raw_data[self._keyword].isin(stock_codes)]
+        # Pick the rows of the specified stock codes through the hash index
+        filtered_data = self.lookup(stock_codes)
         
         if filtered_data.empty:
             print("No matching stock found.")
             return
 
-        # Extract column headers and the data to be displayed
-        columns = filtered_data.columns.tolist()
-        data = filtered_data.values.tolist()
-
-        # Determine the display width of each column for formatting
-        col_widths = [max(self._get_display_width(str(val)) for val in [col] + list(filtered_data[col])) for col in columns]
-
-        # Generate table border based on column widths
-        border = '+' + '+'.join(['-' * (w + 2) for w in col_widths]) + '+'
+        self.table.show(filtered_data)
 
-        # Function to format each row with right-aligned text
-        def format_row(row):
-            return '|' + '|'.join([f' {self._format_cell(str(val), w)} ' for val, w in zip(row, col_widths)]) + '|'
+    def show_more(self):
+        """Display the next page of the latest table shown by show_stock_info."""
+        if not self.table.more():
+            print("No more rows to show.")
 
-        # Print table header
-        print(border)
-        print(format_row(columns))
-        print(border)
-
-        # Print each row of stock information
-        for row in data:
-            print(format_row(row))
-        
-        # Print table bottom border
-        print(border)
-
-    def update(self, new_data: pd.DataFrame):
+    def update(self, new_data: pd.DataFrame, timestamp=None, sample=True) -> SnapshotDelta:
         """
         Update the raw_data with new stock data.
 
+        Only the rows that differ from the previous snapshot are re-indexed and re-screened,
+        so the work done per update is proportional to what changed.
+
         Parameters:
         new_data (pd.DataFrame): A new DataFrame to replace the existing raw_data.
                                  The DataFrame should have the same structure as the original raw_data,
                                  including a 'Stock Code' column.
+        timestamp (float): Unix time at which new_data was fetched, defaults to now.
+        sample (bool): Feed new_data to the indicators. Only a refresh of the whole market is a
+                       sample, a partial (tiered) pass holds stale rows of the stocks it skipped.
+
+        Returns:
+        SnapshotDelta: The changed, appeared and vanished stock codes, also kept in last_delta.
+        """
+        with self.metrics.span('db.update'):
+            print(f"Stock information is updated on {datetime.now().strftime('%Y-%m-%d %H:%M')}.")
+            old_arrays, old_positions, n_old = self._arrays, dict(self._positions), len(self.raw_data)
+            if self.indicators is not None and sample:
+                self.indicators.append(new_data, timestamp)
+
+            aligned = self._align(new_data)
+            self.raw_data = new_data.reset_index(drop=True) if aligned is None else aligned
+            self._refresh_arrays()
+
+            old_pos, column_changes = self._diff(old_arrays, old_positions)
+            known = old_pos >= 0
+            # the delta reports quote changes, indicators move with every snapshot
+            row_changed = np.logical_or.reduce([column_changes[column] for column in self.raw_data.columns]) & known
+            indicator_changed = np.logical_or.reduce([column_changes[column] for column in column_changes
+                                                      if column not in self.raw_data.columns] or [row_changed])
+            codes = self._arrays[self._keyword]
+            present = set(codes.tolist())
+            delta = SnapshotDelta(
+                changed=codes[row_changed].tolist(),
+                appeared=codes[~known].tolist(),
+                vanished=[code for code in old_positions if code not in present],
+                positions=np.flatnonzero(row_changed | ~known),
+                reindexed=aligned is None
+            )
+
+            if aligned is None:
+                # some stocks vanished, row positions can not be kept
+                self._build_indexes()
+            else:
+                self._update_indexes(n_old, column_changes)
+            # cached screens may read indicators, so rows whose indicators moved are re-screened too
+            self._update_caches(delta, np.flatnonzero(row_changed | indicator_changed | ~known))
+
+            # only the rows this refresh changed, an unchanged or unrefreshed stock has no new observation
+            if self.history is not None and len(delta.positions):
+                self.history.append(self.raw_data.iloc[delta.positions], timestamp)
+            if self.alerts is not None:
+                with self.metrics.span('db.alerts'):
+                    self._evaluate_alerts(delta, old_arrays, old_pos, timestamp, np.flatnonzero(indicator_changed & known))
+            self.last_delta = delta
+            self.version += 1
+            self.updated_at = timestamp if timestamp is not None else time.time()
+            return delta
+
+    def _alert_columns(self, rows: np.ndarray) -> dict:
+        """The columns read by the alert rules at the given row positions, as float arrays."""
+        return {column: (self._arrays[column][rows].astype(np.float64) if column in self._arrays
+                         else np.full(len(rows), np.nan)) for column in self.alerts.columns}
+
+    def _evaluate_alerts(self, delta: SnapshotDelta, old_arrays: dict, old_pos: np.ndarray, timestamp=None,
+                         indicator_rows=None):
         """
-        print(f"Stock information is updated on {datetime.now().strftime('%Y-%m-%d %H:%M')}.")
-        self.raw_data = new_data
+        Evaluate the alert rules on the changed and appeared rows against their previous values.
+        Rules reading an indicator also see the rows whose indicators moved while the quote did not.
+        """
+        rows = delta.positions
+        only = None
+        indicator_rules = self.alerts.rules_reading(self.indicators.names) if self.indicators is not None else []
+        if indicator_rules and indicator_rows is not None:
+            extra = np.setdiff1d(indicator_rows, rows)
+            if len(extra):
+                # the other rules keep their state on rows without a new quote
+                quote_rows = np.concatenate([np.ones(len(rows), dtype=bool), np.zeros(len(extra), dtype=bool)])
+                only = {name: quote_rows for name in self.alerts.rules if name not in indicator_rules}
+                rows = np.concatenate([rows, extra])
+        before = old_pos[rows]
+        known = before >= 0
+        previous = {}
+        for column in self.alerts.columns:
+            values = np.full(len(rows), np.nan)
+            if column in old_arrays:
+                values[known] = old_arrays[column][before[known]]
+            previous[column] = values
+        self.alerts.evaluate(self._alert_columns(rows), previous, self._arrays[self._keyword][rows], timestamp, rows=only)
 
-    def filter_stocks(self, thresholds: dict) -> list:
+    def show_history(self, stock_code: str, column: str):
         """
-        Filter stocks based on the provided threshold conditions using DataFrame.query()
-        and return the list of stock codes that meet the filtering criteria.
+        Display how one column of a stock evolved over the recorded snapshots.
 
         Parameters:
-        thresholds (dict): A dictionary where the key is the stock metric (column name) to filter by,
-                        and the value is another dictionary with 'lower', 'upper', and 'valid' keys.
+        stock_code (str): The stock code, e.g. 'sz000166'.
+        column (str): The column to display, matched case-insensitively, e.g. 'turnover'.
+        """
+        if self.history is None or not len(self.history):
+            print("No history recorded.")
+            return
+
+        # commands are lower-cased by the main loop, so match the column name case-insensitively
+        columns = {name.lower(): name for name in self.history.columns}
+        if column.lower() not in columns:
+            print(f"Unknown column {column}, available columns: {', '.join(self.history.columns)}.")
+            return
+
+        series = self.history.series(stock_code, columns[column.lower()])
+        if series.empty:
+            print("No matching stock found.")
+            return
+
+        print(f"{stock_code} {series.name}:")
+        for fetch_time, value in series.items():
+            print(f"  {fetch_time.strftime('%Y-%m-%d %H:%M:%S')}  {value}")
+
+    def filter_stocks(self, thresholds, cache=True) -> list:
+        """
+        Filter stocks based on the provided screen and return the list of stock codes that meet
+        the filtering criteria.
+
+        The screen is compiled once into NumPy mask operations (see utils/screen.py). If it bounds
+        an indexed column, the candidates are first narrowed down through the most selective sorted
+        index and the full screen is only evaluated on them.
+
+        Parameters:
+        thresholds: A dictionary where the key is the stock metric (column name) to filter by,
+                    and the value is another dictionary with 'lower', 'upper', and 'valid' keys
+                    or an 'expr' key holding a screen expression. A screen expression string or
+                    a compiled Screen are accepted as well.
+        cache (bool): Keep the screen and its mask current across updates. One-off screens pass False,
+                      so they do not evict the masks of the screens used over and over.
 
         Returns:
         list: A list of stock codes that meet the filtering criteria.
         """
-        # Initialize an empty list to hold query conditions
-        query_conditions = []
+        with self.metrics.span('db.filter'):
+            screen = compile_screen(thresholds, cache=cache)
+            codes = self._arrays[self._keyword]
 
-        # Build query conditions with 'and'
-        for metric, condition in thresholds.items():
-            lower = condition.get('lower', float('-inf'))
-            upper = condition.get('upper', float('inf'))
-            # create the query condition for current metric
-            query_conditions.append(f"{lower} <= {metric} <= {upper}")
+            # if there are no valid conditions, return all stock codes
+            # this will work when threshold is empty
+            if screen.tree is None:
+                return codes.tolist()
 
-        # combine al query conditions with 'and'
-        query_str = ' and '.join(query_conditions)
+            # the mask of a screen seen before is kept current by update(), no evaluation needed
+            mask = self._mask_cache.get(screen) if cache else None
+            if mask is None:
+                indexed = [self._sorted_indexes[column].range(lower, upper)
+                           for column, (lower, upper) in screen.bounds.items() if column in self._sorted_indexes]
+                if indexed:
+                    candidates = min(indexed, key=len)
+                    mask = np.zeros(len(codes), dtype=bool)
+                    mask[candidates] = screen.mask({column: self._arrays[column][candidates] for column in screen.columns
+                                                    if column in self._arrays})
+                else:
+                    mask = screen.mask(self._arrays)
+                if cache:
+                    self._remember(self._mask_cache, screen, mask)
+            return codes[np.flatnonzero(mask)].tolist()
 
-        # if there are no valid conditions, return all stock codes
-        # this will work when threshold is empty
-        if not query_str:
-            return self.raw_data[self._keyword].tolist()
-        
-        # use DataFrame.query() to filter the data
-        filtered_data = self.raw_data.query(query_str)
-        return filtered_data[self._keyword].tolist()
+    def filter_profiles(self, profiles) -> dict:
+        """
+        Evaluate many screen profiles in one vectorized sweep over the data.
+
+        Parameters:
+        profiles: A compiled ScreenBatch, or the 'profiles' section of config.json
+                  (profile name -> {'screens': {...}, 'valid': ...}).
+
+        Returns:
+        dict: Stock code -> tuple of matched profile names, only for stocks matching any profile.
+        """
+        batch = profiles if isinstance(profiles, ScreenBatch) else ScreenBatch.from_profiles(profiles)
+        masks = self._profile_cache.get(batch)
+        if masks is None:
+            masks = batch.masks(self._arrays)
+            self._remember(self._profile_cache, batch, masks)
+        return ScreenBatch.group(masks, self._arrays[self._keyword])
+
+    @staticmethod
+    def _remember(cache: dict, key, value, limit=64):
+        """Store a cached result, dropping the oldest entry once the cache is full."""
+        if len(cache) >= limit:
+            del cache[next(iter(cache))]
+        cache[key] = value
 
     
 # END OF CLASS DEFINITION
@@ -0,0 +1,136 @@
+# -*- coding:utf-8 -*-
+# !/usr/bin/env python
+#---------------------------------------------------------------------------------
+# Author: Zhang
+# FOR PERSONAL USE ONLY.
+#
+# Create Date: 2026/10/17
+# Last Update on: 2026/10/17
+#
+# FILE: table.py
+# Description: console tables with CJK-aware column widths, rendered column-wise and paginated
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# IMPORT REQUIRED PACKAGES HERE
+
+import sys
+import unicodedata
+
+import pandas as pd
+
+# END OF PACKAGE IMPORT
+#---------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------
+# DEFINE CLASS HERE
+
+class TableRenderer:
+    """
+    TableRenderer prints DataFrames as bordered console tables with right-aligned cells.
+
+    Full-width characters (e.g. Chinese stock names) take two columns on the console. Their
+    display width is computed once per distinct string and memoized, since the same names come
+    back with every refresh, while plain ASCII text (all numbers) is measured with len(). A
+    table is built column by column: every column is converted to text, measured and padded
+    in one go, and the rows are only joined at the end. The lines are written in chunks rather
+    than one print() per row.
+
+    Tables longer than page_size rows are paginated: the first page is shown and more() shows
+    the next one, so printing the whole market does not flood the console.
+
+    Attributes:
+        page_size (int): Rows per page, None to always print the whole table.
+        stream: The text stream written to, sys.stdout at the time of writing by default.
+
+    Methods:
+        display_width(text): The number of console columns a string takes.
+        render(df): The whole table as one string.
+        show(df): Print the table, or its first page.
+        more(): Print the next page of the latest table.
+    """
+    # lines written per stream.write call
+    CHUNK_LINES = 1000
+
+    def __init__(self, page_size=None, stream=None, cache_size=65536) -> None:
+        self.page_size = page_size
+        self.stream = stream
+        self._cache_size = cache_size
+        self._widths = {}
+        # (header line, border, body lines, next line to print) of the latest paginated table
+        self._pending = None
+
+    def display_width(self, text: str) -> int:
+        if text.isascii():
+            return len(text)
+        width = self._widths.get(text)
+        if width is None:
+            if len(self._widths) >= self._cache_size:
+                self._widths.clear()
+            width = 0
+            for char in text:
+                # full-width or wide characters (like Chinese) take two columns
+                width += 2 if unicodedata.east_asian_width(char) in ('F', 'W') else 1
+            self._widths[text] = width
+        return width
+
+    def _column(self, header: str, values: list) -> tuple:
+        """Convert a column to text and right-align it, the header first. Returns (display width, cells)."""
+        cells = [header] + [str(value) for value in values]
+        if ''.join(cells).isascii():
+            width = max(map(len, cells))
+            return width, [cell.rjust(width) for cell in cells]
+        widths = [self.display_width(cell) for cell in cells]
+        width = max(widths)
+        return width, [' ' * (width - cell_width) + cell for cell, cell_width in zip(cells, widths)]
+
+    def _lines(self, df: pd.DataFrame) -> tuple:
+        """Return (header line, border, body lines) of a table."""
+        widths, columns = zip(*[self._column(str(name), df[name].tolist()) for name in df.columns])
+        # the border follows the display width, a header with wide characters has fewer characters than columns
+        border = '+' + '+'.join('-' * (width + 2) for width in widths) + '+'
+        lines = ['| ' + ' | '.join(cells) + ' |' for cells in zip(*columns)]
+        return lines[0], border, lines[1:]
+
+    def render(self, df: pd.DataFrame) -> str:
+        header, border, body = self._lines(df)
+        return '\n'.join([border, header, border] + body + [border]) + '\n'
+
+    def _write(self, header: str, border: str, body: list):
+        stream = self.stream or sys.stdout
+        stream.write('\n'.join([border, header, border]) + '\n')
+        for start in range(0, len(body), self.CHUNK_LINES):
+            stream.write('\n'.join(body[start:start + self.CHUNK_LINES]) + '\n')
+        stream.write(border + '\n')
+
+    def _write_page(self):
+        header, border, body, start = self._pending
+        end = min(start + self.page_size, len(body))
+        self._write(header, border, body[start:end])
+        if end < len(body):
+            self._pending = (header, border, body, end)
+            (self.stream or sys.stdout).write(f"Rows {start + 1}-{end} of {len(body)}, 'more' shows the next {min(self.page_size, len(body) - end)}.\n")
+        else:
+            self._pending = None
+
+    def show(self, df: pd.DataFrame):
+        header, border, body = self._lines(df)
+        if self.page_size is None or len(body) <= self.page_size:
+            self._pending = None
+            self._write(header, border, body)
+        else:
+            self._pending = (header, border, body, 0)
+            self._write_page()
+
+    def more(self) -> bool:
+        """Print the next page of the latest table, False if there is none."""
+        if self._pending is None:
+            return False
+        self._write_page()
+        return True
+
+# END OF CLASS DEFINITION
+#---------------------------------------------------------------------------------
+
+# END OF FILE
+#---------------------------------------------------------------------------------